@@ -0,0 +1,35 @@
+"""Add composite indexes and unique rating constraint
+
+Revision ID: 3c5e9a1f7b20
+Revises: 11d8068a0a6a
+Create Date: 2026-10-15 09:12:41.503218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c5e9a1f7b20'
+down_revision = '11d8068a0a6a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # batch mode recreates the table on SQLite, which can't ALTER constraints
+    with op.batch_alter_table('ratings') as batch_op:
+        batch_op.create_unique_constraint('uq_rating_user_rest', ['user_id', 'restaurant_id'])
+    op.create_index('ix_rating_rest_user_rating', 'ratings', ['restaurant_id', 'user_id', 'rating'], unique=False)
+    op.create_index('ix_checkin_user_status', 'restaurant_checkins', ['user_id', 'status'], unique=False)
+    op.create_index('ix_point_transaction_user_month', 'point_transactions', ['user_id', 'month'], unique=False)
+    op.create_index('ix_weighted_rating_rest_cluster', 'weighted_ratings', ['restaurant_id', 'user_cluster'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_weighted_rating_rest_cluster', table_name='weighted_ratings')
+    op.drop_index('ix_point_transaction_user_month', table_name='point_transactions')
+    op.drop_index('ix_checkin_user_status', table_name='restaurant_checkins')
+    op.drop_index('ix_rating_rest_user_rating', table_name='ratings')
+    with op.batch_alter_table('ratings') as batch_op:
+        batch_op.drop_constraint('uq_rating_user_rest', type_='unique')
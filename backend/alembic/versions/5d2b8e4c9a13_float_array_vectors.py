@@ -0,0 +1,55 @@
+"""Store ML feature vectors as float arrays on Postgres
+
+Revision ID: 5d2b8e4c9a13
+Revises: 3c5e9a1f7b20
+Create Date: 2026-10-15 11:03:27.184561
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2b8e4c9a13'
+down_revision = '3c5e9a1f7b20'
+branch_labels = None
+depends_on = None
+
+VECTOR_COLUMNS = {
+    'bubble_preferences': ['preference_vector'],
+    'restaurant_features': [
+        'cuisine_vector', 'ambiance_vector', 'service_vector',
+        'price_vector', 'dietary_vector', 'feature_vector',
+    ],
+}
+
+
+def upgrade() -> None:
+    # Other backends keep JSON; only Postgres has a native float array type
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # ALTER ... USING can't take the subquery that unpacks a JSON array, so copy through a new column
+    for table, columns in VECTOR_COLUMNS.items():
+        for column in columns:
+            op.add_column(table, sa.Column(f'{column}_new', postgresql.ARRAY(sa.Float())))
+            op.execute(
+                f"UPDATE {table} SET {column}_new = ARRAY("
+                f"SELECT e.value::float8 FROM json_array_elements_text({column}) "
+                f"WITH ORDINALITY AS e(value, ord) ORDER BY e.ord) "
+                f"WHERE json_typeof({column}) = 'array'"
+            )
+            op.drop_column(table, column)
+            op.alter_column(table, f'{column}_new', new_column_name=column)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for table, columns in VECTOR_COLUMNS.items():
+        for column in columns:
+            op.alter_column(
+                table, column,
+                type_=sa.JSON(),
+                postgresql_using=f"to_json({column})",
+            )
@@ -0,0 +1,63 @@
+"""Move user ML profile columns into user_ml_profiles
+
+Revision ID: 7a4f1c6e2d85
+Revises: 5d2b8e4c9a13
+Create Date: 2026-10-15 13:48:09.562310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a4f1c6e2d85'
+down_revision = '5d2b8e4c9a13'
+branch_labels = None
+depends_on = None
+
+PROFILE_COLUMNS = (
+    'taste_profile', 'similarity_cluster', 'exploration_ratio',
+    'quality_standards', 'last_profile_update',
+)
+
+
+def upgrade() -> None:
+    op.create_table('user_ml_profiles',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('taste_profile', sa.JSON(), nullable=True),
+    sa.Column('similarity_cluster', sa.Integer(), nullable=True),
+    sa.Column('exploration_ratio', sa.Float(), nullable=True),
+    sa.Column('quality_standards', sa.Float(), nullable=True),
+    sa.Column('last_profile_update', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index(op.f('ix_user_ml_profiles_similarity_cluster'), 'user_ml_profiles', ['similarity_cluster'], unique=False)
+
+    columns = ', '.join(PROFILE_COLUMNS)
+    op.execute(
+        f"INSERT INTO user_ml_profiles (user_id, {columns}) "
+        f"SELECT id, {columns} FROM users"
+    )
+
+    with op.batch_alter_table('users') as batch_op:
+        for column in PROFILE_COLUMNS:
+            batch_op.drop_column(column)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('taste_profile', sa.JSON(), nullable=True))
+        batch_op.add_column(sa.Column('similarity_cluster', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('exploration_ratio', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('quality_standards', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('last_profile_update', sa.DateTime(timezone=True), nullable=True))
+
+    for column in PROFILE_COLUMNS:
+        op.execute(
+            f"UPDATE users SET {column} = (SELECT p.{column} FROM user_ml_profiles p "
+            f"WHERE p.user_id = users.id)"
+        )
+
+    op.drop_index(op.f('ix_user_ml_profiles_similarity_cluster'), table_name='user_ml_profiles')
+    op.drop_table('user_ml_profiles')
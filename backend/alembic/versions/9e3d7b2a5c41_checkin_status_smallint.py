@@ -0,0 +1,53 @@
+"""Store checkin status as a SMALLINT code
+
+Revision ID: 9e3d7b2a5c41
+Revises: 7a4f1c6e2d85
+Create Date: 2026-10-15 15:21:36.907412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '9e3d7b2a5c41'
+down_revision = '7a4f1c6e2d85'
+branch_labels = None
+depends_on = None
+
+STATUS_CODES = (('PENDING', 0), ('ACTIVE', 1), ('RATED', 2), ('EXPIRED', 3))
+
+checkin_status_enum = postgresql.ENUM(
+    'PENDING', 'ACTIVE', 'RATED', 'EXPIRED', name='checkinstatus', create_type=False
+)
+
+
+def _convert_status(new_type, cases, cast: str = '') -> None:
+    op.drop_index('ix_checkin_user_status', table_name='restaurant_checkins')
+    op.drop_index(op.f('ix_restaurant_checkins_status'), table_name='restaurant_checkins')
+    op.add_column('restaurant_checkins', sa.Column('status_new', new_type, nullable=True))
+    op.execute(
+        "UPDATE restaurant_checkins SET status_new = (CASE status "
+        + " ".join(f"WHEN {old} THEN {new}" for old, new in cases)
+        + f" END){cast}"
+    )
+    # batch mode recreates the table on SQLite, which can't drop/rename columns in place
+    with op.batch_alter_table('restaurant_checkins') as batch_op:
+        batch_op.drop_column('status')
+        batch_op.alter_column('status_new', new_column_name='status')
+    op.create_index(op.f('ix_restaurant_checkins_status'), 'restaurant_checkins', ['status'], unique=False)
+    op.create_index('ix_checkin_user_status', 'restaurant_checkins', ['user_id', 'status'], unique=False)
+
+
+def upgrade() -> None:
+    _convert_status(sa.SmallInteger(), [(f"'{name}'", code) for name, code in STATUS_CODES])
+    checkin_status_enum.drop(op.get_bind(), checkfirst=True)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    checkin_status_enum.create(bind, checkfirst=True)
+    # The CASE yields text, which Postgres won't assign to the enum column without a cast
+    cast = '::checkinstatus' if bind.dialect.name == 'postgresql' else ''
+    _convert_status(checkin_status_enum, [(code, f"'{name}'") for name, code in STATUS_CODES], cast)
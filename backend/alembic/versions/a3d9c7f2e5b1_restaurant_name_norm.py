@@ -0,0 +1,56 @@
+"""Add a normalized restaurant name with a trigram index on Postgres
+
+Revision ID: a3d9c7f2e5b1
+Revises: f6a1d4b8c2e7
+Create Date: 2026-10-15 23:48:12.204517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d9c7f2e5b1'
+down_revision = 'f6a1d4b8c2e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('restaurants') as batch_op:
+        batch_op.add_column(sa.Column('name_norm', sa.String(length=200), nullable=True))
+
+    # Backfill in Python so existing rows match what models.normalize_name writes
+    bind = op.get_bind()
+    restaurants = sa.table(
+        'restaurants',
+        sa.column('id', sa.Integer), sa.column('name', sa.String), sa.column('name_norm', sa.String),
+    )
+    rows = bind.execute(sa.select(restaurants.c.id, restaurants.c.name)).all()
+    if rows:
+        bind.execute(
+            restaurants.update().where(restaurants.c.id == sa.bindparam('rid')),
+            [{'rid': rid, 'name_norm': name.strip().lower()} for rid, name in rows],
+        )
+
+    # Trigram GIN so LIKE '%name%' can use an index; other backends keep the plain column
+    if bind.dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_restaurant_name_trgm', 'restaurants', ['name_norm'],
+            postgresql_using='gin', postgresql_ops={'name_norm': 'gin_trgm_ops'},
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index(
+                'ix_restaurant_name_trgm', table_name='restaurants',
+                postgresql_concurrently=True,
+            )
+    with op.batch_alter_table('restaurants') as batch_op:
+        batch_op.drop_column('name_norm')
@@ -0,0 +1,29 @@
+"""Composite latitude/longitude index over active restaurants
+
+Revision ID: b5e1c8d3f9a2
+Revises: d7b2f9e4a6c8
+Create Date: 2026-10-16 00:31:27.604193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e1c8d3f9a2'
+down_revision = 'd7b2f9e4a6c8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Partial where the backend supports it (SQLite only matches the literal "is_active = 1"
+    # that SQLAlchemy emits); elsewhere the where clause is ignored
+    op.create_index(
+        'ix_restaurants_lat_lng', 'restaurants', ['latitude', 'longitude'], unique=False,
+        postgresql_where=sa.text('is_active'), sqlite_where=sa.text('is_active = 1'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_restaurants_lat_lng', table_name='restaurants')
@@ -0,0 +1,53 @@
+"""Add cuisines lookup table and restaurants.cuisine_id
+
+Revision ID: b8c2e5f1a7d3
+Revises: 9e3d7b2a5c41
+Create Date: 2026-10-15 17:05:52.331874
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8c2e5f1a7d3'
+down_revision = '9e3d7b2a5c41'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of app.models.CUISINES; codes must never change once written
+CUISINES = (
+    "American", "Italian", "Chinese", "Mexican", "Japanese", "Thai",
+    "Indian", "French", "Pizza", "Cafe", "Bakery", "Bar & Grill",
+    "Fast Food", "Mediterranean", "Korean", "Vietnamese", "Greek"
+)
+
+
+def upgrade() -> None:
+    cuisines = op.create_table('cuisines',
+    sa.Column('id', sa.SmallInteger(), autoincrement=False, nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.bulk_insert(cuisines, [{'id': code, 'name': name} for code, name in enumerate(CUISINES, start=1)])
+
+    with op.batch_alter_table('restaurants') as batch_op:
+        batch_op.add_column(sa.Column('cuisine_id', sa.SmallInteger(), nullable=True))
+        batch_op.create_foreign_key('fk_restaurants_cuisine_id', 'cuisines', ['cuisine_id'], ['id'])
+
+    op.execute(
+        "UPDATE restaurants SET cuisine_id = "
+        "(SELECT c.id FROM cuisines c WHERE c.name = restaurants.cuisine_type)"
+    )
+    op.create_index(op.f('ix_restaurants_cuisine_id'), 'restaurants', ['cuisine_id'], unique=False)
+    op.create_index('ix_restaurant_cuisine_rating', 'restaurants', ['cuisine_id', 'avg_rating'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_restaurant_cuisine_rating', table_name='restaurants')
+    op.drop_index(op.f('ix_restaurants_cuisine_id'), table_name='restaurants')
+    with op.batch_alter_table('restaurants') as batch_op:
+        batch_op.drop_constraint('fk_restaurants_cuisine_id', type_='foreignkey')
+        batch_op.drop_column('cuisine_id')
+    op.drop_table('cuisines')
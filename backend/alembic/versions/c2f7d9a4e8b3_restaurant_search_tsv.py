@@ -0,0 +1,40 @@
+"""Full-text search column and GIN index on Postgres
+
+Revision ID: c2f7d9a4e8b3
+Revises: e9c4a2f7b1d6
+Create Date: 2026-10-16 01:24:09.581372
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f7d9a4e8b3'
+down_revision = 'e9c4a2f7b1d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Other backends keep searching with ILIKE; nothing to add there
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(
+        "ALTER TABLE restaurants ADD COLUMN search_tsv tsvector GENERATED ALWAYS AS ("
+        "to_tsvector('english', coalesce(name, '') || ' ' || coalesce(address, '') || ' ' || coalesce(cuisine_type, ''))"
+        ") STORED"
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_restaurant_search_tsv', 'restaurants', ['search_tsv'],
+            postgresql_using='gin', postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_restaurant_search_tsv', table_name='restaurants', postgresql_concurrently=True)
+    op.drop_column('restaurants', 'search_tsv')
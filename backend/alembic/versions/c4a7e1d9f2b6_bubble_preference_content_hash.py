@@ -0,0 +1,27 @@
+"""Add content hash to bubble preferences
+
+Revision ID: c4a7e1d9f2b6
+Revises: b8c2e5f1a7d3
+Create Date: 2026-10-15 23:04:12.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a7e1d9f2b6'
+down_revision = 'b8c2e5f1a7d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows stay NULL and get a hash on their next submit
+    with op.batch_alter_table('bubble_preferences') as batch_op:
+        batch_op.add_column(sa.Column('content_hash', sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('bubble_preferences') as batch_op:
+        batch_op.drop_column('content_hash')
@@ -0,0 +1,60 @@
+"""Unique user points per month and check-in time index
+
+Revision ID: d7b2f9e4a6c8
+Revises: a3d9c7f2e5b1
+Create Date: 2026-10-16 00:07:51.318406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7b2f9e4a6c8'
+down_revision = 'a3d9c7f2e5b1'
+branch_labels = None
+depends_on = None
+
+COUNTERS = ['total_points', 'monthly_points', 'total_ratings', 'total_photos', 'total_checkins', 'bulk_import_points']
+
+
+def upgrade() -> None:
+    # Concurrent first writes could have left duplicate rows; fold them into the oldest
+    bind = op.get_bind()
+    user_points = sa.table(
+        'user_points',
+        sa.column('id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('current_month', sa.String),
+        sa.column('bulk_import_completed', sa.Boolean), *(sa.column(name, sa.Integer) for name in COUNTERS),
+    )
+    duplicates = bind.execute(
+        sa.select(user_points.c.user_id, user_points.c.current_month)
+        .group_by(user_points.c.user_id, user_points.c.current_month)
+        .having(sa.func.count() > 1)
+    ).all()
+    for user_id, month in duplicates:
+        rows = bind.execute(
+            sa.select(user_points).where(
+                user_points.c.user_id == user_id, user_points.c.current_month == month
+            ).order_by(user_points.c.id)
+        ).all()
+        keep, *extra = rows
+        values = {name: sum(getattr(row, name) or 0 for row in rows) for name in COUNTERS}
+        values['bulk_import_completed'] = any(row.bulk_import_completed for row in rows)
+        bind.execute(user_points.update().where(user_points.c.id == keep.id).values(**values))
+        bind.execute(user_points.delete().where(user_points.c.id.in_([row.id for row in extra])))
+
+    with op.batch_alter_table('user_points') as batch_op:
+        batch_op.create_unique_constraint('uq_user_points_user_month', ['user_id', 'current_month'])
+
+    op.drop_index('ix_checkin_user_status', table_name='restaurant_checkins')
+    op.create_index(
+        'ix_checkin_user_status_time', 'restaurant_checkins', ['user_id', 'status', 'check_in_time'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_checkin_user_status_time', table_name='restaurant_checkins')
+    op.create_index('ix_checkin_user_status', 'restaurant_checkins', ['user_id', 'status'], unique=False)
+
+    with op.batch_alter_table('user_points') as batch_op:
+        batch_op.drop_constraint('uq_user_points_user_month', type_='unique')
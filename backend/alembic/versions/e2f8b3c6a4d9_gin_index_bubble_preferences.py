@@ -0,0 +1,57 @@
+"""Store bubble preference maps as JSONB with GIN indexes on Postgres
+
+Revision ID: e2f8b3c6a4d9
+Revises: c4a7e1d9f2b6
+Create Date: 2026-10-15 23:12:48.903115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2f8b3c6a4d9'
+down_revision = 'c4a7e1d9f2b6'
+branch_labels = None
+depends_on = None
+
+CATEGORIES = ['cuisine', 'atmosphere', 'price', 'service', 'dietary', 'adventure']
+
+
+def upgrade() -> None:
+    # GIN needs jsonb; other backends keep plain JSON and no index
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for category in CATEGORIES:
+        column = f'{category}_preferences'
+        op.alter_column(
+            'bubble_preferences', column,
+            type_=postgresql.JSONB(),
+            postgresql_using=f'{column}::jsonb',
+        )
+    # Build without blocking /submit writes; CONCURRENTLY can't run in a transaction
+    with op.get_context().autocommit_block():
+        for category in CATEGORIES:
+            op.create_index(
+                f'ix_bp_{category}_gin', 'bubble_preferences', [f'{category}_preferences'],
+                postgresql_using='gin', postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        for category in CATEGORIES:
+            op.drop_index(
+                f'ix_bp_{category}_gin', table_name='bubble_preferences',
+                postgresql_concurrently=True,
+            )
+    for category in CATEGORIES:
+        column = f'{category}_preferences'
+        op.alter_column(
+            'bubble_preferences', column,
+            type_=sa.JSON(),
+            postgresql_using=f'{column}::json',
+        )
@@ -0,0 +1,33 @@
+"""One review per user per restaurant
+
+Revision ID: e9c4a2f7b1d6
+Revises: b5e1c8d3f9a2
+Create Date: 2026-10-16 00:58:40.127935
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e9c4a2f7b1d6'
+down_revision = 'b5e1c8d3f9a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The old check-then-insert could race into duplicates; keep each user's first review
+    reviews = sa.table(
+        'reviews', sa.column('id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('restaurant_id', sa.Integer),
+    )
+    first_ids = sa.select(sa.func.min(reviews.c.id)).group_by(reviews.c.user_id, reviews.c.restaurant_id)
+    op.execute(reviews.delete().where(reviews.c.id.not_in(first_ids.scalar_subquery())))
+
+    with op.batch_alter_table('reviews') as batch_op:
+        batch_op.create_unique_constraint('uq_review_user_rest', ['user_id', 'restaurant_id'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('reviews') as batch_op:
+        batch_op.drop_constraint('uq_review_user_rest', type_='unique')
@@ -0,0 +1,58 @@
+"""Store user cuisine/price preferences as arrays on Postgres
+
+Revision ID: f3b8e6d1c9a7
+Revises: c2f7d9a4e8b3
+Create Date: 2026-10-16 02:12:45.930178
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8e6d1c9a7'
+down_revision = 'c2f7d9a4e8b3'
+branch_labels = None
+depends_on = None
+
+# column -> (array type, element cast)
+ARRAY_COLUMNS = {
+    'preferred_cuisines': (postgresql.ARRAY(sa.String()), 'text'),
+    'preferred_price_levels': (postgresql.ARRAY(sa.Integer()), 'int'),
+}
+
+
+def upgrade() -> None:
+    # Other backends keep JSON; only Postgres has native arrays
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # ALTER ... USING can't take the subquery that unpacks a JSON array, so copy through a new column
+    for column, (array_type, element) in ARRAY_COLUMNS.items():
+        op.add_column('users', sa.Column(f'{column}_new', array_type))
+        op.execute(
+            f"UPDATE users SET {column}_new = ARRAY("
+            f"SELECT e.value::{element} FROM json_array_elements_text({column}) "
+            f"WITH ORDINALITY AS e(value, ord) ORDER BY e.ord) "
+            f"WHERE json_typeof({column}) = 'array'"
+        )
+        op.drop_column('users', column)
+        op.alter_column('users', f'{column}_new', new_column_name=column)
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_preferred_cuisines_gin', 'users', ['preferred_cuisines'],
+            postgresql_using='gin', postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_users_preferred_cuisines_gin', table_name='users',
+            postgresql_concurrently=True,
+        )
+    for column in ARRAY_COLUMNS:
+        op.alter_column('users', column, type_=sa.JSON(), postgresql_using=f'to_json({column})')
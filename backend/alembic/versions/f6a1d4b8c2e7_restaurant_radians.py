@@ -0,0 +1,54 @@
+"""Store precomputed haversine terms on restaurants
+
+Revision ID: f6a1d4b8c2e7
+Revises: e2f8b3c6a4d9
+Create Date: 2026-10-15 23:21:37.640528
+
+"""
+import math
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6a1d4b8c2e7'
+down_revision = 'e2f8b3c6a4d9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('restaurants') as batch_op:
+        batch_op.add_column(sa.Column('lat_rad', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('lng_rad', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('cos_lat', sa.Float(), nullable=True))
+
+    # Backfill in Python; SQLite has no RADIANS/COS and Oracle no RADIANS
+    bind = op.get_bind()
+    restaurants = sa.table(
+        'restaurants',
+        sa.column('id', sa.Integer), sa.column('latitude', sa.Float), sa.column('longitude', sa.Float),
+        sa.column('lat_rad', sa.Float), sa.column('lng_rad', sa.Float), sa.column('cos_lat', sa.Float),
+    )
+    rows = bind.execute(sa.select(restaurants.c.id, restaurants.c.latitude, restaurants.c.longitude)).all()
+    if rows:
+        bind.execute(
+            restaurants.update().where(restaurants.c.id == sa.bindparam('rid')),
+            [
+                {
+                    'rid': rid,
+                    'lat_rad': math.radians(lat),
+                    'lng_rad': math.radians(lng),
+                    'cos_lat': math.cos(math.radians(lat)),
+                }
+                for rid, lat, lng in rows
+            ],
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('restaurants') as batch_op:
+        batch_op.drop_column('cos_lat')
+        batch_op.drop_column('lng_rad')
+        batch_op.drop_column('lat_rad')
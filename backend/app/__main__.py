@@ -0,0 +1,18 @@
+"""Production entry point: ``python -m app``."""
+import os
+
+import uvicorn
+
+
+if __name__ == "__main__":
+    uvicorn.run(
+        "app.main:app",
+        host=os.environ.get("HOST", "0.0.0.0"),
+        port=int(os.environ.get("PORT", "8000")),
+        workers=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        # C event loop and HTTP parser (both come with uvicorn[standard])
+        loop="uvloop",
+        http="httptools",
+        timeout_keep_alive=int(os.environ.get("KEEP_ALIVE_TIMEOUT", "15")),
+        proxy_headers=True,
+    )
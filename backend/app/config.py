@@ -11,9 +11,21 @@ class Settings(BaseSettings):
     environment: str = "development"
     log_level: str = "info"
 
+    # Connection pool settings
+    db_pool_size: int = 20
+    db_max_overflow: int = 30
+    db_pool_timeout: int = 10  # seconds to wait for a connection before failing
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True  # always off in production, see pool_pre_ping
+    db_use_pgbouncer: bool = False
+
+    # Create tables on startup (development only, production uses Alembic)
+    create_tables: bool = True
+
     # JWT settings
     access_token_expire_minutes: int = 30
     algorithm: str = "HS256"
+    login_rate_limit: int = 5  # attempts per client IP per minute, 0 disables
 
     # App settings
     app_name: str = "Rate My Rest"
@@ -29,6 +41,15 @@ class Settings(BaseSettings):
     def is_production(self) -> bool:
         return self.environment == "production"
 
+    @property
+    def uses_pgbouncer(self) -> bool:
+        return self.db_use_pgbouncer or "pgbouncer" in self.database_url
+
+    @property
+    def pool_pre_ping(self) -> bool:
+        # Pre-ping leaves PgBouncer transaction-mode connections idle in transaction
+        return self.db_pool_pre_ping and not self.is_production and not self.uses_pgbouncer
+
     @property
     def cors_origins(self) -> list:
         if self.is_production:
@@ -1,6 +1,13 @@
-from sqlalchemy import create_engine
+import asyncio
+
+import orjson
+from fastapi import Request
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from .config import get_settings
 import os
 
@@ -13,26 +20,104 @@ if settings.database_url.startswith("oracle"):
     if not os.environ.get('LD_LIBRARY_PATH'):
         os.environ['LD_LIBRARY_PATH'] = '/opt/oracle'
 
+is_sqlite = settings.database_url.startswith("sqlite")
+
+# Dialects with INSERT ... ON CONFLICT; the rest (Oracle) select first and then write
+UPSERT_INSERT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# Pool configuration shared by the sync and async engines
+pool_kwargs = {
+    "pool_recycle": 60 if settings.uses_pgbouncer else settings.db_pool_recycle,
+    "pool_pre_ping": settings.pool_pre_ping,
+}
+if is_sqlite:
+    # SQLite uses its own pool classes without sizing options
+    pool_kwargs["connect_args"] = {"check_same_thread": False}
+    if settings.database_url in ("sqlite://", "sqlite:///:memory:"):
+        # One shared connection, otherwise every session sees its own empty database
+        pool_kwargs["poolclass"] = StaticPool
+else:
+    pool_kwargs.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+    )
+
+
+def json_serializer(value) -> str:
+    """orjson for JSON columns; numpy values and int dict keys come from the ML code."""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+# Shared by the sync and async engines
+json_kwargs = {"json_serializer": json_serializer, "json_deserializer": orjson.loads}
+
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """WAL lets readers run alongside a writer; NORMAL sync skips the fsync per commit."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
+
 # Create engine with appropriate configuration for Oracle or SQLite
 if settings.database_url.startswith("oracle"):
     engine = create_engine(
         settings.database_url,
-        pool_pre_ping=True,
-        pool_recycle=300,
-        pool_size=5,
-        max_overflow=10,
+        **pool_kwargs,
+        **json_kwargs,
         echo=False,
         connect_args={"events": True}
     )
 else:
     engine = create_engine(
         settings.database_url,
-        pool_pre_ping=True,
-        pool_recycle=300,
+        **pool_kwargs,
+        **json_kwargs,
     )
 
+if is_sqlite:
+    event.listen(engine, "connect", set_sqlite_pragmas)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def get_async_database_url(database_url: str) -> str:
+    """Translate a sync database URL to its asyncio driver equivalent."""
+    if database_url.startswith("sqlite:"):
+        return database_url.replace("sqlite:", "sqlite+aiosqlite:", 1)
+    if database_url.startswith(("postgresql:", "postgresql+psycopg2:")):
+        return "postgresql+asyncpg:" + database_url.split(":", 1)[1]
+    if database_url.startswith(("oracle:", "oracle+cx_oracle:", "oracle+oracledb:")):
+        return "oracle+oracledb_async:" + database_url.split(":", 1)[1]
+    return database_url
+
+
+def create_async_db_engine() -> AsyncEngine:
+    """Create the async engine used by the non-blocking routers.
+
+    Called from the app lifespan so each worker process opens its own
+    connections after the server forks.
+    """
+    async_engine = create_async_engine(
+        get_async_database_url(settings.database_url),
+        **pool_kwargs,
+        **json_kwargs,
+        echo=False,
+    )
+    if is_sqlite:
+        event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+    return async_engine
+
+
+def create_async_sessionmaker(async_engine: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(
+        async_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False
+    )
+
 Base = declarative_base()
 
 
@@ -45,6 +130,27 @@ def get_db():
         db.close()
 
 
+async def get_async_db(request: Request):
+    """Dependency to get an async database session from the worker's engine."""
+    async with request.app.state.AsyncSessionLocal() as db:
+        yield db
+
+
+async def warm_pool(async_engine: AsyncEngine) -> int:
+    """Open pool_size connections up front so the first requests skip the handshake."""
+    if is_sqlite:
+        return 0
+
+    ping = "SELECT 1 FROM dual" if settings.database_url.startswith("oracle") else "SELECT 1"
+
+    async def _ping():
+        async with async_engine.connect() as conn:
+            await conn.execute(text(ping))
+
+    await asyncio.gather(*[_ping() for _ in range(settings.db_pool_size)])
+    return settings.db_pool_size
+
+
 def test_connection():
     """Test database connection and return status."""
     try:
@@ -0,0 +1,83 @@
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000  # Mean Earth radius in meters
+
+
+def calculate_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Calculate distance between two GPS coordinates in meters using Haversine formula."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    delta_phi = math.radians(lat2 - lat1)
+    delta_lambda = math.radians(lng2 - lng1)
+
+    a = (math.sin(delta_phi / 2) ** 2 +
+         math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2)
+    # Clamp: rounding can push a a hair past 1 for antipodal points
+    c = 2 * math.asin(math.sqrt(min(a, 1.0)))
+
+    return EARTH_RADIUS_M * c
+
+
+def bounding_box(lat: float, lng: float, radius_m: float) -> Tuple[float, float, Optional[float], Optional[float]]:
+    """(min_lat, max_lat, min_lng, max_lng) enclosing every point within radius_m of (lat, lng).
+
+    The longitude bounds are None when the circle reaches a pole or crosses
+    the antimeridian, where no single longitude range covers it.
+    """
+    angle = radius_m / EARTH_RADIUS_M
+    delta_lat = math.degrees(angle)
+    min_lat, max_lat = lat - delta_lat, lat + delta_lat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90.0), min(max_lat, 90.0), None, None
+
+    # Widest longitude offset of the circle, reached north/south of the centre latitude
+    delta_lng = math.degrees(math.asin(min(math.sin(angle) / math.cos(math.radians(lat)), 1.0)))
+    min_lng, max_lng = lng - delta_lng, lng + delta_lng
+    if min_lng < -180 or max_lng > 180:
+        return min_lat, max_lat, None, None
+
+    return min_lat, max_lat, min_lng, max_lng
+
+
+def calculate_distance_vector(lat: float, lng: float, lats, lngs) -> np.ndarray:
+    """Haversine distances in meters from one point to many, as an array.
+
+    Same formula as calculate_distance, evaluated with NumPy ufuncs so bulk
+    callers don't pay per-row Python trig.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lngs = np.asarray(lngs, dtype=np.float64)
+
+    phi1 = math.radians(lat)
+    phi2 = np.radians(lats)
+    delta_phi = phi2 - phi1
+    delta_lambda = np.radians(lngs - lng)
+
+    a = (np.sin(delta_phi / 2) ** 2 +
+         math.cos(phi1) * np.cos(phi2) * np.sin(delta_lambda / 2) ** 2)
+    c = 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    return EARTH_RADIUS_M * c
+
+
+def calculate_distance_precomputed(lat: float, lng: float, lat_rads, lng_rads, cos_lats) -> np.ndarray:
+    """calculate_distance_vector for rows with stored lat_rad/lng_rad/cos_lat.
+
+    The restaurant-side radians and cosine come from the database, leaving
+    two half-angle sines per row.
+    """
+    lat_rads = np.asarray(lat_rads, dtype=np.float64)
+    lng_rads = np.asarray(lng_rads, dtype=np.float64)
+    cos_lats = np.asarray(cos_lats, dtype=np.float64)
+
+    phi1 = math.radians(lat)
+    lambda1 = math.radians(lng)
+
+    a = (np.sin((lat_rads - phi1) / 2) ** 2 +
+         math.cos(phi1) * cos_lats * np.sin((lng_rads - lambda1) / 2) ** 2)
+    c = 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    return EARTH_RADIUS_M * c
@@ -1,11 +1,24 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import logging
+import orjson
+import os
+import redis.asyncio as redis
+import tempfile
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 from .config import get_settings
-from .database import engine
-from .models import Base
+from .database import create_async_db_engine, create_async_sessionmaker, engine, warm_pool
+from .models import Base, CUISINES
+from .services.google_places import get_google_places
 from .routers import auth, restaurants, ratings, reviews, recommendations, users, lottery, bubble_survey, data_pipeline
 
 # Configure logging
@@ -14,43 +27,97 @@ logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
+SCHEMA_LOCK_PATH = os.path.join(tempfile.gettempdir(), "rmr-schema.lock")
+
+CORS_ORIGINS = (
+    "http://localhost:3000",
+    "http://127.0.0.1:3000",
+    "http://localhost:3001",
+    "http://127.0.0.1:3001",
+)
+
+
+def create_tables() -> bool:
+    """Create missing tables, once per host when several workers start together."""
+    if fcntl is None:
+        Base.metadata.create_all(bind=engine)
+        return True
+
+    with open(SCHEMA_LOCK_PATH, "w") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            # Another worker is creating the schema; wait for it and skip
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            return False
+        Base.metadata.create_all(bind=engine)
+        return True
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up Rate My Rest API...")
 
-    # Create database tables
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created successfully")
+    # Per-worker database state; never reuse connections inherited across a fork
+    engine.dispose(close=False)
+    app.state.async_engine = create_async_db_engine()
+    app.state.AsyncSessionLocal = create_async_sessionmaker(app.state.async_engine)
+
+    # Create database tables (production schema is managed by Alembic)
+    if not settings.is_production and settings.create_tables:
+        if await asyncio.to_thread(create_tables):
+            logger.info("Database tables created successfully")
+
+    # Shared Redis client (rate limiting); the API runs without it if unreachable
+    app.state.redis = redis.from_url(settings.redis_url, socket_connect_timeout=1)
+    try:
+        await app.state.redis.ping()
+    except (redis.ConnectionError, redis.RedisError) as e:
+        logger.warning(f"Redis connection failed: {e}. Login rate limiting is disabled.")
+        await app.state.redis.aclose()
+        app.state.redis = None
+
+    # Pre-open pooled connections
+    try:
+        warmed = await warm_pool(app.state.async_engine)
+        if warmed:
+            logger.info(f"Warmed {warmed} database connections")
+    except Exception as e:
+        logger.warning(f"Connection pool warm-up failed: {e}")
 
     yield
 
     # Shutdown
     logger.info("Shutting down Rate My Rest API...")
+    await app.state.async_engine.dispose()
+    if app.state.redis is not None:
+        await app.state.redis.aclose()
+    if get_google_places.cache_info().currsize:
+        await get_google_places().aclose()
+        get_google_places.cache_clear()
 
 
 app = FastAPI(
     title=settings.app_name,
     version=settings.app_version,
     description="A restaurant discovery and rating application for Chapel Hill, NC",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",
-        "http://127.0.0.1:3000",
-        "http://localhost:3001",
-        "http://127.0.0.1:3001"
-    ],
+    allow_origins=CORS_ORIGINS,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["Content-Type", "Authorization"],
 )
 
+# Compress larger JSON payloads (restaurant lists, recommendations)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(restaurants.router)
@@ -63,46 +130,65 @@ app.include_router(bubble_survey.router)
 app.include_router(data_pipeline.router)
 
 
+# Static payloads, serialized once at import (settings don't change after boot)
+_ROOT_BYTES = orjson.dumps({
+    "message": "Welcome to Rate My Rest API",
+    "version": settings.app_version,
+    "environment": settings.environment
+})
+
+_HEALTH_BYTES = orjson.dumps({
+    "status": "healthy",
+    "version": settings.app_version,
+    "environment": settings.environment
+})
+
+_CUISINES_BYTES = orjson.dumps({"cuisines": list(CUISINES)})
+
+_PRICE_LEVELS_BYTES = orjson.dumps({
+    "price_levels": [
+        {"level": 1, "label": "$", "description": "Inexpensive"},
+        {"level": 2, "label": "$$", "description": "Moderate"},
+        {"level": 3, "label": "$$$", "description": "Expensive"},
+        {"level": 4, "label": "$$$$", "description": "Very Expensive"}
+    ]
+})
+
+_CACHEABLE = {"Cache-Control": "public, max-age=3600"}
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
-    return {
-        "message": "Welcome to Rate My Rest API",
-        "version": settings.app_version,
-        "environment": settings.environment
-    }
+    return Response(_ROOT_BYTES, media_type="application/json")
 
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {
-        "status": "healthy",
-        "version": settings.app_version,
-        "environment": settings.environment
-    }
+    return Response(_HEALTH_BYTES, media_type="application/json")
 
 
 @app.get("/cuisines")
 async def get_cuisines():
     """Get list of available cuisine types."""
-    return {
-        "cuisines": [
-            "American", "Italian", "Chinese", "Mexican", "Japanese", "Thai",
-            "Indian", "French", "Pizza", "Cafe", "Bakery", "Bar & Grill",
-            "Fast Food", "Mediterranean", "Korean", "Vietnamese", "Greek"
-        ]
-    }
+    return Response(_CUISINES_BYTES, media_type="application/json", headers=_CACHEABLE)
 
 
 @app.get("/price-levels")
 async def get_price_levels():
     """Get available price levels."""
-    return {
-        "price_levels": [
-            {"level": 1, "label": "$", "description": "Inexpensive"},
-            {"level": 2, "label": "$$", "description": "Moderate"},
-            {"level": 3, "label": "$$$", "description": "Expensive"},
-            {"level": 4, "label": "$$$$", "description": "Very Expensive"}
-        ]
-    }
\ No newline at end of file
+    return Response(_PRICE_LEVELS_BYTES, media_type="application/json", headers=_CACHEABLE)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Connection pool gauges in Prometheus text format."""
+    pool = app.state.async_engine.pool
+    lines = []
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        gauge = getattr(pool, name, None)
+        if gauge is not None:
+            lines.append(f"# TYPE db_pool_{name} gauge")
+            lines.append(f"db_pool_{name} {gauge()}")
+    return Response("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
@@ -1,8 +1,20 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean, JSON, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, SmallInteger, String, Float, DateTime, Text, ForeignKey, Boolean, JSON, Index, UniqueConstraint, TypeDecorator, DDL, event, insert, update, and_, case, literal_column, text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.orm import deferred, relationship, validates
 from sqlalchemy.sql import func
 from .database import Base
+from .geo import bounding_box
 import enum
+import math
+
+
+# Numeric ML vectors: native float8[] on Postgres, JSON elsewhere (SQLite, Oracle)
+FloatVector = JSON().with_variant(ARRAY(Float), "postgresql")
+# Small value lists (user preferences): native text[]/int[] on Postgres, JSON elsewhere
+StringList = JSON().with_variant(ARRAY(String), "postgresql")
+IntegerList = JSON().with_variant(ARRAY(Integer), "postgresql")
+# Preference maps: JSONB on Postgres so they can be GIN-indexed, JSON elsewhere
+PreferenceMap = JSON().with_variant(JSONB(), "postgresql")
 
 
 class User(Base):
@@ -18,23 +30,69 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Enhanced user preferences
-    preferred_cuisines = Column(JSON, default=list)
-    preferred_price_levels = Column(JSON, default=list)
+    preferred_cuisines = Column(StringList, default=list)
+    preferred_price_levels = Column(IntegerList, default=list)
     location_lat = Column(Float)
     location_lng = Column(Float)
     max_distance = Column(Float, default=10.0)  # km
 
-    # ML Profile Data
+    # Relationships
+    ratings = relationship("Rating", back_populates="user")
+    reviews = relationship("Review", back_populates="user")
+    bubble_preferences = relationship("BubblePreference", back_populates="user", uselist=False)
+    # ML data lives in its own table so auth reads stay narrow; load it explicitly
+    ml_profile = relationship(
+        "UserMLProfile", back_populates="user", uselist=False, lazy="raise", passive_deletes=True
+    )
+
+    __table_args__ = (
+        # ":cuisine = ANY(preferred_cuisines)" / "@>" lookups for the recommender
+        Index("ix_users_preferred_cuisines_gin", "preferred_cuisines", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
+
+class UserMLProfile(Base):
+    """Computed ML profile data, kept off the hot users row"""
+    __tablename__ = "user_ml_profiles"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
     taste_profile = Column(JSON, default=dict)  # Computed taste preferences
-    similarity_cluster = Column(Integer)  # User cluster for collaborative filtering
+    similarity_cluster = Column(Integer, index=True)  # User cluster for collaborative filtering
     exploration_ratio = Column(Float, default=0.5)  # Tendency to try new things
     quality_standards = Column(Float, default=0.0)  # How user rates vs avg
     last_profile_update = Column(DateTime(timezone=True))
 
     # Relationships
-    ratings = relationship("Rating", back_populates="user")
-    reviews = relationship("Review", back_populates="user")
-    bubble_preferences = relationship("BubblePreference", back_populates="user", uselist=False)
+    user = relationship("User", back_populates="ml_profile")
+
+
+# Canonical cuisines; position + 1 is the stable small-int code stored on restaurants
+CUISINES = (
+    "American", "Italian", "Chinese", "Mexican", "Japanese", "Thai",
+    "Indian", "French", "Pizza", "Cafe", "Bakery", "Bar & Grill",
+    "Fast Food", "Mediterranean", "Korean", "Vietnamese", "Greek"
+)
+CUISINE_CODES = {name: code for code, name in enumerate(CUISINES, start=1)}
+
+
+class Cuisine(Base):
+    __tablename__ = "cuisines"
+
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    name = Column(String(50), unique=True, nullable=False)
+
+
+@event.listens_for(Cuisine.__table__, "after_create")
+def _seed_cuisines(target, connection, **kw):
+    connection.execute(
+        insert(target), [{"id": code, "name": name} for name, code in CUISINE_CODES.items()]
+    )
+
+
+def normalize_name(name):
+    """Form of a restaurant name stored in name_norm and used to match against it."""
+    return name.strip().lower()
 
 
 class Restaurant(Base):
@@ -43,18 +101,25 @@ class Restaurant(Base):
     id = Column(Integer, primary_key=True, index=True)
     google_place_id = Column(String(100), unique=True, index=True)
     name = Column(String(200), nullable=False, index=True)
+    # Lowercased, trimmed name for substring lookups; trigram-indexed on Postgres
+    name_norm = Column(String(200))
     address = Column(String(500))
     phone = Column(String(20))
     website = Column(String(200))
     cuisine_type = Column(String(100), index=True)
+    cuisine_id = Column(SmallInteger, ForeignKey("cuisines.id"), index=True)  # Set from cuisine_type
     price_level = Column(Integer)  # 1-4 scale ($ to $$$$)
 
     # Location
     latitude = Column(Float, nullable=False, index=True)
     longitude = Column(Float, nullable=False, index=True)
+    # Restaurant-side haversine terms, set from latitude/longitude on write
+    lat_rad = Column(Float)
+    lng_rad = Column(Float)
+    cos_lat = Column(Float)
 
-    # Hours (JSON format)
-    hours = Column(JSON, default=dict)
+    # Hours (JSON format); deferred with google_photos, undefer the "details" group to load them
+    hours = deferred(Column(JSON, default=dict), group="details")
 
     # Metadata
     is_active = Column(Boolean, default=True)
@@ -65,7 +130,7 @@ class Restaurant(Base):
     # Google Places data
     google_rating = Column(Float)
     google_rating_count = Column(Integer)
-    google_photos = Column(JSON, default=list)
+    google_photos = deferred(Column(JSON, default=list), group="details")
 
     # Calculated fields
     avg_rating = Column(Float, default=0.0, index=True)
@@ -75,6 +140,109 @@ class Restaurant(Base):
     ratings = relationship("Rating", back_populates="restaurant")
     reviews = relationship("Review", back_populates="restaurant")
 
+    __table_args__ = (
+        # "Top rated <cuisine>" lookups
+        Index("ix_restaurant_cuisine_rating", "cuisine_id", "avg_rating"),
+        # Bounding-box scans (within_radius_clause) over active restaurants only
+        Index(
+            "ix_restaurants_lat_lng", "latitude", "longitude",
+            postgresql_where=text("is_active"), sqlite_where=text("is_active = 1"),
+        ),
+        # Lets LIKE '%name%' probe an index instead of scanning
+        Index(
+            "ix_restaurant_name_trgm", "name_norm",
+            postgresql_using="gin", postgresql_ops={"name_norm": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
+    @validates("name")
+    def _sync_name_norm(self, key, value):
+        self.name_norm = normalize_name(value) if value is not None else None
+        return value
+
+    @validates("cuisine_type")
+    def _sync_cuisine_id(self, key, value):
+        self.cuisine_id = CUISINE_CODES.get(value)
+        return value
+
+    @validates("latitude", "longitude")
+    def _sync_radians(self, key, value):
+        rad = math.radians(value) if value is not None else None
+        if key == "latitude":
+            self.lat_rad = rad
+            self.cos_lat = math.cos(rad) if rad is not None else None
+        else:
+            self.lng_rad = rad
+        return value
+
+
+# gin_trgm_ops comes from the pg_trgm extension
+event.listen(
+    Restaurant.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+# Postgres full-text search over name, address and cuisine. The generated column is
+# left unmapped since other backends have no equivalent; query it via text_search_clause
+event.listen(
+    Restaurant.__table__, "after_create",
+    DDL(
+        "ALTER TABLE restaurants ADD COLUMN search_tsv tsvector GENERATED ALWAYS AS ("
+        "to_tsvector('english', coalesce(name, '') || ' ' || coalesce(address, '') || ' ' || coalesce(cuisine_type, ''))"
+        ") STORED"
+    ).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Restaurant.__table__, "after_create",
+    DDL("CREATE INDEX ix_restaurant_search_tsv ON restaurants USING gin (search_tsv)").execute_if(dialect="postgresql"),
+)
+
+
+def within_radius_clause(lat, lng, radius_m):
+    """Bounding-box prefilter on the indexed latitude/longitude columns.
+
+    Keeps every restaurant within radius_m and a few corner ones beyond it;
+    callers still check the exact distance on the rows it returns.
+    """
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_m)
+    clause = Restaurant.latitude.between(min_lat, max_lat)
+    if min_lng is not None:
+        clause = and_(clause, Restaurant.longitude.between(min_lng, max_lng))
+    return clause
+
+
+def text_search_clause(terms):
+    """Postgres-only full-text match of any of terms, served by the search_tsv GIN index."""
+    tsquery = func.plainto_tsquery("english", terms[0])
+    for term in terms[1:]:
+        tsquery = tsquery.op("||")(func.plainto_tsquery("english", term))
+    return literal_column("restaurants.search_tsv").op("@@")(tsquery)
+
+
+def rating_stats_update(restaurant_id, added, removed, count_delta):
+    """UPDATE folding a rating change into the restaurant's stored avg_rating and rating_count.
+
+    O(1) per write instead of re-aggregating the restaurant's ratings. Accepts
+    bindparams as well as values, so several restaurants can go in one executemany.
+    """
+    restaurants = Restaurant.__table__
+    count = func.coalesce(restaurants.c.rating_count, 0)
+    total = func.coalesce(restaurants.c.avg_rating, 0.0) * count + added - removed
+    new_count = count + count_delta
+    return update(restaurants).where(restaurants.c.id == restaurant_id).values(
+        avg_rating=case((new_count > 0, total / new_count), else_=0.0),
+        rating_count=new_count,
+    )
+
+
+def cuisine_filter_clause(cuisines):
+    """Exact cuisine filter, comparing small-int codes when every name is canonical."""
+    codes = [CUISINE_CODES.get(name) for name in cuisines]
+    if all(codes):
+        return Restaurant.cuisine_id.in_(codes)
+    return Restaurant.cuisine_type.in_(cuisines)
+
+
 
 class Rating(Base):
     __tablename__ = "ratings"
@@ -90,9 +258,11 @@ class Rating(Base):
     user = relationship("User", back_populates="ratings")
     restaurant = relationship("Restaurant", back_populates="ratings")
 
-    # Ensure one rating per user per restaurant
+    # Ensure one rating per user per restaurant; the covering index serves
+    # per-restaurant AVG/COUNT aggregations without touching the table
     __table_args__ = (
-        {"schema": None},
+        UniqueConstraint("user_id", "restaurant_id", name="uq_rating_user_rest"),
+        Index("ix_rating_rest_user_rating", "restaurant_id", "user_id", "rating"),
     )
 
 
@@ -111,6 +281,11 @@ class Review(Base):
     user = relationship("User", back_populates="reviews")
     restaurant = relationship("Restaurant", back_populates="reviews")
 
+    # One review per user per restaurant; edits go through PUT
+    __table_args__ = (
+        UniqueConstraint("user_id", "restaurant_id", name="uq_review_user_rest"),
+    )
+
 
 class UserPreference(Base):
     __tablename__ = "user_preferences"
@@ -132,11 +307,27 @@ class UserPreference(Base):
 
 # Lottery System Models
 
-class CheckinStatus(enum.Enum):
-    PENDING = "pending"  # User checked in but hasn't stayed 10 minutes
-    ACTIVE = "active"    # Ready for rating (10+ minutes elapsed)
-    RATED = "rated"      # User has submitted rating
-    EXPIRED = "expired"  # 48 hours passed without rating
+class CheckinStatus(enum.IntEnum):
+    PENDING = 0  # User checked in but hasn't stayed 10 minutes
+    ACTIVE = 1   # Ready for rating (10+ minutes elapsed)
+    RATED = 2    # User has submitted rating
+    EXPIRED = 3  # 48 hours passed without rating
+
+
+class IntEnumType(TypeDecorator):
+    """Store an IntEnum as a SMALLINT code and load it back as the enum member"""
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_class):
+        super().__init__()
+        self.enum_class = enum_class
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else int(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else self.enum_class(value)
 
 
 class RestaurantCheckin(Base):
@@ -157,7 +348,7 @@ class RestaurantCheckin(Base):
     rating_deadline = Column(DateTime(timezone=True))  # 48 hours from min_stay_completed
 
     # Status tracking
-    status = Column(Enum(CheckinStatus), default=CheckinStatus.PENDING, index=True)
+    status = Column(IntEnumType(CheckinStatus), default=CheckinStatus.PENDING, index=True)
 
     # Connected rating if completed
     rating_id = Column(Integer, ForeignKey("ratings.id"))
@@ -170,6 +361,11 @@ class RestaurantCheckin(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # Active check-ins per user, and the same-day duplicate check on check-in
+        Index("ix_checkin_user_status_time", "user_id", "status", "check_in_time"),
+    )
+
 
 class UserPoints(Base):
     __tablename__ = "user_points"
@@ -197,6 +393,11 @@ class UserPoints(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
+    __table_args__ = (
+        # One points row per user per month
+        UniqueConstraint("user_id", "current_month", name="uq_user_points_user_month"),
+    )
+
 
 class PointTransaction(Base):
     __tablename__ = "point_transactions"
@@ -222,6 +423,10 @@ class PointTransaction(Base):
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index("ix_point_transaction_user_month", "user_id", "month"),
+    )
+
 
 class MonthlyLottery(Base):
     __tablename__ = "monthly_lotteries"
@@ -306,6 +511,15 @@ class DetailedRating(Base):
 class BubblePreference(Base):
     """Store user's bubble survey preferences with hierarchical data"""
     __tablename__ = "bubble_preferences"
+    # Key-existence lookups (cuisine_preferences ? 'italian'); Postgres only
+    __table_args__ = (
+        Index("ix_bp_cuisine_gin", "cuisine_preferences", postgresql_using="gin").ddl_if(dialect="postgresql"),
+        Index("ix_bp_atmosphere_gin", "atmosphere_preferences", postgresql_using="gin").ddl_if(dialect="postgresql"),
+        Index("ix_bp_price_gin", "price_preferences", postgresql_using="gin").ddl_if(dialect="postgresql"),
+        Index("ix_bp_service_gin", "service_preferences", postgresql_using="gin").ddl_if(dialect="postgresql"),
+        Index("ix_bp_dietary_gin", "dietary_preferences", postgresql_using="gin").ddl_if(dialect="postgresql"),
+        Index("ix_bp_adventure_gin", "adventure_preferences", postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True, index=True)
@@ -316,16 +530,17 @@ class BubblePreference(Base):
     final_score = Column(Integer, default=0)
 
     # Preference categories with weights and round survival
-    cuisine_preferences = Column(JSON, default=dict)  # {"italian": {"weight": 5, "round_survived": 1}}
-    atmosphere_preferences = Column(JSON, default=dict)
-    price_preferences = Column(JSON, default=dict)
-    service_preferences = Column(JSON, default=dict)
-    dietary_preferences = Column(JSON, default=dict)
-    adventure_preferences = Column(JSON, default=dict)
+    cuisine_preferences = Column(PreferenceMap, default=dict)  # {"italian": {"weight": 5, "round_survived": 1}}
+    atmosphere_preferences = Column(PreferenceMap, default=dict)
+    price_preferences = Column(PreferenceMap, default=dict)
+    service_preferences = Column(PreferenceMap, default=dict)
+    dietary_preferences = Column(PreferenceMap, default=dict)
+    adventure_preferences = Column(PreferenceMap, default=dict)
 
     # Computed preference vectors for ML
-    preference_vector = Column(JSON, default=list)  # Normalized preference vector
+    preference_vector = Column(FloatVector, default=list)  # Normalized preference vector
     preference_strength = Column(Float, default=1.0)  # How confident the preferences are
+    content_hash = Column(String(32))  # blake2b of the submitted survey; unchanged resubmits skip the write
 
     # Relationships
     user = relationship("User", back_populates="bubble_preferences")
@@ -371,11 +586,11 @@ class RestaurantFeatures(Base):
     restaurant_id = Column(Integer, ForeignKey("restaurants.id"), nullable=False, unique=True, index=True)
 
     # Enhanced feature vectors
-    cuisine_vector = Column(JSON, default=list)  # Multi-hot encoded cuisine features
-    ambiance_vector = Column(JSON, default=list)  # Atmosphere features
-    service_vector = Column(JSON, default=list)  # Service style features
-    price_vector = Column(JSON, default=list)  # Price/value features
-    dietary_vector = Column(JSON, default=list)  # Dietary accommodation features
+    cuisine_vector = Column(FloatVector, default=list)  # Multi-hot encoded cuisine features
+    ambiance_vector = Column(FloatVector, default=list)  # Atmosphere features
+    service_vector = Column(FloatVector, default=list)  # Service style features
+    price_vector = Column(FloatVector, default=list)  # Price/value features
+    dietary_vector = Column(FloatVector, default=list)  # Dietary accommodation features
 
     # Computed features from ratings
     quality_percentile = Column(Float, default=0.5)  # How this restaurant ranks quality-wise
@@ -391,7 +606,7 @@ class RestaurantFeatures(Base):
     seasonal_patterns = Column(JSON, default=dict)  # Seasonal preference patterns
 
     # Feature vector for ML (normalized)
-    feature_vector = Column(JSON, default=list)
+    feature_vector = Column(FloatVector, default=list)
     last_computed = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
@@ -433,4 +648,8 @@ class WeightedRating(Base):
     restaurant = relationship("Restaurant")
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_weighted_rating_rest_cluster", "restaurant_id", "user_cluster"),
+    )
\ No newline at end of file
@@ -0,0 +1,42 @@
+import logging
+
+import redis.asyncio as redis
+from fastapi import HTTPException, Request, status
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Fixed-window rate limit per client IP, counted in Redis.
+
+    Fails open when Redis isn't configured or reachable, so a cache outage
+    never locks users out.
+    """
+
+    def __init__(self, scope: str, limit: int, window_seconds: int = 60):
+        self.scope = scope
+        self.limit = limit
+        self.window_seconds = window_seconds
+
+    async def __call__(self, request: Request) -> None:
+        client = getattr(request.app.state, "redis", None)
+        if client is None or self.limit <= 0:
+            return
+
+        ip = request.client.host if request.client else "unknown"
+        key = f"rl:{self.scope}:{ip}"
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.incr(key)
+                pipe.expire(key, self.window_seconds, nx=True)
+                count, _ = await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Rate limit check failed: {e}")
+            return
+
+        if count > self.limit:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts, try again later",
+                headers={"Retry-After": str(self.window_seconds)},
+            )
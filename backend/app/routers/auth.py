@@ -1,59 +1,71 @@
-from datetime import timedelta
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import case, exists, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_db
+from ..database import get_async_db
 from ..schemas import Token, User, UserCreate
 from ..models import User as UserModel
-from ..auth import authenticate_user, create_access_token, get_password_hash
+from ..auth import ACCESS_TOKEN_EXPIRES, authenticate_user, create_access_token, get_password_hash
 from ..config import get_settings
+from ..rate_limit import RateLimiter
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 settings = get_settings()
 
+# Each login attempt costs a password hash; cap brute forcing before that work
+login_rate_limit = RateLimiter("login", limit=settings.login_rate_limit)
+
 
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
-    # Check if user already exists
-    db_user = db.query(UserModel).filter(
-        (UserModel.username == user.username) | (UserModel.email == user.email)
-    ).first()
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    # Check if username or email already exist in one query without loading the row
+    # (CASE keeps the EXISTS flags portable to Oracle, which can't select booleans)
+    result = await db.execute(
+        select(
+            case((exists().where(UserModel.username == user.username), 1), else_=0).label("username_taken"),
+            case((exists().where(UserModel.email == user.email), 1), else_=0).label("email_taken"),
+        )
+    )
+    username_taken, email_taken = result.one()
 
-    if db_user:
-        if db_user.username == user.username:
-            raise HTTPException(
-                status_code=400,
-                detail="Username already registered"
-            )
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail="Email already registered"
-            )
+    if username_taken:
+        raise HTTPException(
+            status_code=400,
+            detail="Username already registered"
+        )
+    if email_taken:
+        raise HTTPException(
+            status_code=400,
+            detail="Email already registered"
+        )
 
     # Create new user
-    hashed_password = get_password_hash(user.password)
-    db_user = UserModel(
-        username=user.username,
-        email=user.email,
-        full_name=user.full_name,
-        hashed_password=hashed_password
+    hashed_password = await asyncio.to_thread(get_password_hash, user.password)
+    # INSERT ... RETURNING hands back the new row without a refresh round-trip
+    result = await db.execute(
+        insert(UserModel)
+        .values(
+            username=user.username,
+            email=user.email,
+            full_name=user.full_name,
+            hashed_password=hashed_password
+        )
+        .returning(UserModel)
     )
-
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    db_user = result.scalar_one()
+    await db.commit()
 
     return db_user
 
 
-@router.post("/token", response_model=Token)
+@router.post("/token", response_model=Token, dependencies=[Depends(login_rate_limit)])
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -61,9 +73,8 @@ async def login_for_access_token(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username}, expires_delta=ACCESS_TOKEN_EXPIRES
     )
 
     return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
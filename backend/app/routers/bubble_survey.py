@@ -1,20 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import Dict, Any, Optional
-from pydantic import BaseModel, Field
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import bindparam, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from typing import Annotated, Dict, Any, Final, Optional
+from pydantic import BaseModel, ConfigDict, Field, WithJsonSchema
+from collections import OrderedDict
+import hashlib
+import heapq
 import json
 import logging
+import orjson
+import redis.asyncio as redis
 from datetime import datetime
 
-from ..database import get_db
-from ..models import User, BubblePreference
+from ..database import UPSERT_INSERT, get_async_db
+from ..models import User, UserMLProfile, BubblePreference
 from ..auth import get_current_user
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/bubble-survey", tags=["bubble-survey"])
 
+# Lookups by the unique user_id index, built once and reused from SQLAlchemy's statement cache
+_PREFS_BY_USER = select(BubblePreference).where(BubblePreference.user_id == bindparam("user_id"))
+# Read endpoints never use the stored ML vector
+_PREFS_BY_USER_NO_VECTOR = _PREFS_BY_USER.options(
+    load_only(
+        BubblePreference.id, BubblePreference.user_id, BubblePreference.survey_completed_at,
+        BubblePreference.total_rounds_completed, BubblePreference.final_score,
+        BubblePreference.preference_strength, BubblePreference.cuisine_preferences,
+        BubblePreference.atmosphere_preferences, BubblePreference.price_preferences,
+        BubblePreference.service_preferences, BubblePreference.dietary_preferences,
+        BubblePreference.adventure_preferences,
+    )
+)
+# Enough to tell whether a cached /analysis is still current
+_PREFS_STAMP_BY_USER = select(BubblePreference.id, BubblePreference.survey_completed_at).where(
+    BubblePreference.user_id == bindparam("user_id")
+)
+
+# /analysis payloads keyed on (preference id, survey_completed_at): every submit
+# stamps a new timestamp, so stale entries are never hit
+_ANALYSIS_CACHE: "OrderedDict[tuple[int, datetime], bytes]" = OrderedDict()
+_ANALYSIS_CACHE_SIZE: Final = 4096
+_ANALYSIS_TTL_SECONDS: Final = 24 * 60 * 60
+
 # Schemas
 class BubblePreferenceData(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     weight: float = Field(..., ge=0, le=10)
     round_survived: int = Field(..., ge=1, le=6)
     selection_order: int = Field(..., ge=1)
@@ -29,6 +62,13 @@ class BubblePreferenceCreate(BaseModel):
     total_rounds_completed: int = Field(..., ge=1, le=6)
     final_score: int = Field(..., ge=0)
 
+# Stored preference JSON is passed through untouched: Any skips the per-key walk in
+# pydantic-core, while the schema still documents the {name: BubblePreferenceData} shape
+StoredPreferences = Annotated[Any, WithJsonSchema({
+    "type": "object",
+    "additionalProperties": BubblePreferenceData.model_json_schema(),
+})]
+
 class BubblePreferenceResponse(BaseModel):
     id: int
     user_id: int
@@ -36,12 +76,12 @@ class BubblePreferenceResponse(BaseModel):
     total_rounds_completed: int
     final_score: int
     preference_strength: float
-    cuisine_preferences: Optional[Dict[str, Any]] = None
-    atmosphere_preferences: Optional[Dict[str, Any]] = None
-    price_preferences: Optional[Dict[str, Any]] = None
-    service_preferences: Optional[Dict[str, Any]] = None
-    dietary_preferences: Optional[Dict[str, Any]] = None
-    adventure_preferences: Optional[Dict[str, Any]] = None
+    cuisine_preferences: Optional[StoredPreferences] = None
+    atmosphere_preferences: Optional[StoredPreferences] = None
+    price_preferences: Optional[StoredPreferences] = None
+    service_preferences: Optional[StoredPreferences] = None
+    dietary_preferences: Optional[StoredPreferences] = None
+    adventure_preferences: Optional[StoredPreferences] = None
     initial_recommendations: Optional[list] = None
     message: Optional[str] = None
 
@@ -50,59 +90,60 @@ class BubblePreferenceResponse(BaseModel):
 async def submit_bubble_preferences(
     preferences: BubblePreferenceCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Submit bubble survey preferences and compute recommendation profile"""
 
     try:
-        # Check if user already has preferences
-        existing_prefs = db.query(BubblePreference).filter(
-            BubblePreference.user_id == current_user.id
-        ).first()
-
-        if existing_prefs:
-            # Update existing preferences
-            existing_prefs.cuisine_preferences = preferences.cuisine_preferences
-            existing_prefs.atmosphere_preferences = preferences.atmosphere_preferences
-            existing_prefs.price_preferences = preferences.price_preferences
-            existing_prefs.service_preferences = preferences.service_preferences
-            existing_prefs.dietary_preferences = preferences.dietary_preferences
-            existing_prefs.adventure_preferences = preferences.adventure_preferences
-            existing_prefs.total_rounds_completed = preferences.total_rounds_completed
-            existing_prefs.final_score = preferences.final_score
-            existing_prefs.survey_completed_at = datetime.utcnow()
-
-            bubble_pref = existing_prefs
+        # JSON columns take plain dicts, not the parsed models
+        values = preferences.model_dump()
+        content_hash = hashlib.blake2b(
+            orjson.dumps(values, option=orjson.OPT_SORT_KEYS), digest_size=16
+        ).hexdigest()
+        values['content_hash'] = content_hash
+        values['preference_vector'], values['preference_strength'] = _compute_preference_vector(preferences)
+        # Set here rather than by the server default so resubmits within a second stay distinct
+        values['survey_completed_at'] = datetime.utcnow()
+
+        upsert = UPSERT_INSERT.get(db.bind.dialect.name)
+        if upsert is not None:
+            # One round trip whether or not the user already has preferences
+            stmt = upsert(BubblePreference).values(user_id=current_user.id, **values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[BubblePreference.user_id],
+                set_={**{key: stmt.excluded[key] for key in values}, 'updated_at': func.now()},
+                # An identical resubmission leaves the row (and its WAL) alone
+                where=BubblePreference.content_hash.is_distinct_from(stmt.excluded.content_hash)
+            ).returning(BubblePreference)
+            bubble_pref = await db.scalar(stmt, execution_options={"populate_existing": True})
+            changed = bubble_pref is not None
+            if not changed:
+                bubble_pref = await db.scalar(_PREFS_BY_USER_NO_VECTOR, {"user_id": current_user.id})
         else:
-            # Create new preferences
-            bubble_pref = BubblePreference(
-                user_id=current_user.id,
-                cuisine_preferences=preferences.cuisine_preferences,
-                atmosphere_preferences=preferences.atmosphere_preferences,
-                price_preferences=preferences.price_preferences,
-                service_preferences=preferences.service_preferences,
-                dietary_preferences=preferences.dietary_preferences,
-                adventure_preferences=preferences.adventure_preferences,
-                total_rounds_completed=preferences.total_rounds_completed,
-                final_score=preferences.final_score
-            )
-            db.add(bubble_pref)
-
-        # Compute preference vector and strength
-        preference_vector, preference_strength = _compute_preference_vector(preferences)
-        bubble_pref.preference_vector = preference_vector
-        bubble_pref.preference_strength = preference_strength
-
-        db.commit()
-        db.refresh(bubble_pref)
-
-        # Update user's taste profile
-        _update_user_taste_profile(current_user.id, preferences, db)
+            bubble_pref = await db.scalar(_PREFS_BY_USER, {"user_id": current_user.id})
+            if not bubble_pref:
+                bubble_pref = BubblePreference(user_id=current_user.id)
+                db.add(bubble_pref)
+            changed = bubble_pref.content_hash != content_hash
+            if changed:
+                for key, value in values.items():
+                    setattr(bubble_pref, key, value)
+
+        if changed:
+            # Update user's taste profile in the same transaction
+            profile = await db.get(UserMLProfile, current_user.id)
+            if not profile:
+                profile = UserMLProfile(user_id=current_user.id)
+                db.add(profile)
+            _update_user_taste_profile(profile, preferences)
+
+        await db.commit()
 
         # Generate initial recommendations based on preferences (simplified for now)
         initial_recs = []  # TODO: Implement advanced recommendations
 
-        return BubblePreferenceResponse(
+        # Values come from the validated request and the DB row; skip revalidating them
+        response = BubblePreferenceResponse.model_construct(
             id=bubble_pref.id,
             user_id=bubble_pref.user_id,
             survey_completed_at=bubble_pref.survey_completed_at,
@@ -112,6 +153,7 @@ async def submit_bubble_preferences(
             initial_recommendations=initial_recs,
             message="Taste profile updated successfully! 🎯"
         )
+        return Response(response.model_dump_json(), media_type="application/json")
 
     except Exception as e:
         logger.error(f"Error submitting bubble preferences for user {current_user.id}: {str(e)}")
@@ -124,13 +166,11 @@ async def submit_bubble_preferences(
 @router.get("/preferences", response_model=BubblePreferenceResponse)
 async def get_bubble_preferences(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get user's current bubble survey preferences"""
 
-    bubble_prefs = db.query(BubblePreference).filter(
-        BubblePreference.user_id == current_user.id
-    ).first()
+    bubble_prefs = await db.scalar(_PREFS_BY_USER_NO_VECTOR, {"user_id": current_user.id})
 
     if not bubble_prefs:
         raise HTTPException(
@@ -138,7 +178,7 @@ async def get_bubble_preferences(
             detail="No bubble survey preferences found. Please complete the taste survey first."
         )
 
-    return BubblePreferenceResponse(
+    response = BubblePreferenceResponse.model_construct(
         id=bubble_prefs.id,
         user_id=bubble_prefs.user_id,
         survey_completed_at=bubble_prefs.survey_completed_at,
@@ -152,165 +192,126 @@ async def get_bubble_preferences(
         dietary_preferences=bubble_prefs.dietary_preferences,
         adventure_preferences=bubble_prefs.adventure_preferences
     )
+    # Serialized by pydantic-core straight to JSON bytes, skipping the dict round trip
+    return Response(response.model_dump_json(), media_type="application/json")
 
 
 @router.delete("/preferences")
 async def delete_bubble_preferences(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete user's bubble survey preferences (allows retaking survey)"""
 
-    bubble_prefs = db.query(BubblePreference).filter(
-        BubblePreference.user_id == current_user.id
-    ).first()
+    result = await db.execute(delete(BubblePreference).where(BubblePreference.user_id == current_user.id))
 
-    if not bubble_prefs:
+    if not result.rowcount:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No bubble survey preferences found"
         )
 
-    db.delete(bubble_prefs)
-    db.commit()
+    await db.commit()
 
     return {"message": "Bubble survey preferences deleted. You can now retake the taste survey."}
 
 
 @router.get("/analysis")
 async def get_preference_analysis(
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get detailed analysis of user's taste preferences"""
 
-    bubble_prefs = db.query(BubblePreference).filter(
-        BubblePreference.user_id == current_user.id
-    ).first()
+    stamp = (await db.execute(_PREFS_STAMP_BY_USER, {"user_id": current_user.id})).first()
 
-    if not bubble_prefs:
+    if not stamp:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="No bubble survey preferences found"
         )
 
-    analysis = _analyze_taste_profile(bubble_prefs)
-
-    return {
-        "user_id": current_user.id,
-        "preference_strength": bubble_prefs.preference_strength,
-        "taste_profile": analysis,
-        "recommendations_accuracy": _estimate_recommendation_accuracy(bubble_prefs, db),
-        "profile_completeness": _calculate_profile_completeness(bubble_prefs)
-    }
-
-
-def _compute_preference_vector(preferences: BubblePreferenceCreate) -> tuple[list, float]:
+    cache_key = tuple(stamp)
+    payload = _ANALYSIS_CACHE.get(cache_key)
+    if payload is not None:
+        _ANALYSIS_CACHE.move_to_end(cache_key)
+        return Response(payload, media_type="application/json")
+
+    # Shared across workers; the API runs without it if Redis is down
+    redis_client = getattr(request.app.state, "redis", None)
+    redis_key = f"taste:{current_user.id}:{stamp.id}:{stamp.survey_completed_at.isoformat()}"
+    if redis_client is not None:
+        try:
+            payload = await redis_client.get(redis_key)
+        except redis.RedisError as e:
+            logger.warning(f"Taste analysis cache read failed: {e}")
+
+    if payload is None:
+        bubble_prefs = await db.scalar(_PREFS_BY_USER_NO_VECTOR, {"user_id": current_user.id})
+        payload = orjson.dumps({
+            "user_id": current_user.id,
+            "preference_strength": bubble_prefs.preference_strength,
+            "taste_profile": _analyze_taste_profile(bubble_prefs),
+            "recommendations_accuracy": _estimate_recommendation_accuracy(bubble_prefs),
+            "profile_completeness": _calculate_profile_completeness(bubble_prefs)
+        })
+        if redis_client is not None:
+            try:
+                await redis_client.set(redis_key, payload, ex=_ANALYSIS_TTL_SECONDS)
+            except redis.RedisError as e:
+                logger.warning(f"Taste analysis cache write failed: {e}")
+
+    _ANALYSIS_CACHE[cache_key] = payload
+    if len(_ANALYSIS_CACHE) > _ANALYSIS_CACHE_SIZE:
+        _ANALYSIS_CACHE.popitem(last=False)
+
+    return Response(payload, media_type="application/json")
+
+
+def _compute_preference_vector(preferences: BubblePreferenceCreate) -> tuple[list[float], float]:
     """Convert bubble preferences to normalized vector for ML"""
 
-    vector = []
-    total_weight = 0
-
-    # Cuisine preferences (first 20 dimensions)
-    cuisine_weights = [0.0] * 20
-    for cuisine, data in preferences.cuisine_preferences.items():
-        idx = _get_cuisine_index(cuisine)
-        if idx < 20:
-            weight = data.get('weight', 1.0)
-            cuisine_weights[idx] = weight
+    vector = [0.0] * PREFERENCE_VECTOR_SIZE
+    total_weight = 0.0
+    slots = set()
+
+    # One pass over every category, scattering into the shared buffer and
+    # summing weights as we go; unknown keys share the slice's last slot
+    for category, slot_map, fallback_slot in _VECTOR_SLOTS:
+        for key, data in getattr(preferences, category).items():
+            weight = data.weight
+            slot = slot_map.get(key, fallback_slot)
+            vector[slot] += weight
+            slots.add(slot)
             total_weight += weight
 
-    vector.extend(cuisine_weights)
-
-    # Atmosphere preferences (next 10 dimensions)
-    atmosphere_weights = [0.0] * 10
-    for atmosphere, data in preferences.atmosphere_preferences.items():
-        idx = _get_atmosphere_index(atmosphere)
-        if idx < 10:
-            weight = data.get('weight', 1.0)
-            atmosphere_weights[idx] = weight
-            total_weight += weight
-
-    vector.extend(atmosphere_weights)
-
-    # Price preferences (next 6 dimensions)
-    price_weights = [0.0] * 6
-    for price, data in preferences.price_preferences.items():
-        idx = _get_price_index(price)
-        if idx < 6:
-            weight = data.get('weight', 1.0)
-            price_weights[idx] = weight
-            total_weight += weight
-
-    vector.extend(price_weights)
-
-    # Service preferences (next 6 dimensions)
-    service_weights = [0.0] * 6
-    for service, data in preferences.service_preferences.items():
-        idx = _get_service_index(service)
-        if idx < 6:
-            weight = data.get('weight', 1.0)
-            service_weights[idx] = weight
-            total_weight += weight
-
-    vector.extend(service_weights)
-
-    # Dietary preferences (next 8 dimensions)
-    dietary_weights = [0.0] * 8
-    for dietary, data in preferences.dietary_preferences.items():
-        idx = _get_dietary_index(dietary)
-        if idx < 8:
-            weight = data.get('weight', 1.0)
-            dietary_weights[idx] = weight
-            total_weight += weight
-
-    vector.extend(dietary_weights)
-
-    # Adventure preferences (last 5 dimensions)
-    adventure_weights = [0.0] * 5
-    for adventure, data in preferences.adventure_preferences.items():
-        idx = _get_adventure_index(adventure)
-        if idx < 5:
-            weight = data.get('weight', 1.0)
-            adventure_weights[idx] = weight
-            total_weight += weight
-
-    vector.extend(adventure_weights)
-
-    # Normalize vector
+    # Normalize in place; untouched slots are zero and stay zero
     if total_weight > 0:
-        vector = [w / total_weight for w in vector]
+        for slot in slots:
+            vector[slot] /= total_weight
 
     # Calculate preference strength (0-1 scale)
-    non_zero_prefs = sum(1 for w in vector if w > 0)
-    preference_strength = min(non_zero_prefs / 20, 1.0)  # Normalize to max 20 preferences
+    # Only written slots can be non-zero; zero-weight picks leave theirs at 0
+    non_zero_prefs = sum(vector[slot] > 0 for slot in slots)
+    preference_strength = min(non_zero_prefs, 20) / 20  # Normalize to max 20 preferences
 
     return vector, preference_strength
 
 
-def _update_user_taste_profile(user_id: int, preferences: BubblePreferenceCreate, db: Session):
-    """Update user's taste profile based on bubble survey"""
-
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        return
+def _update_user_taste_profile(profile: UserMLProfile, preferences: BubblePreferenceCreate):
+    """Update user's taste profile based on bubble survey (caller commits)"""
 
-    # Create comprehensive taste profile
+    # Only derived values; the raw per-category weights already live on BubblePreference
     taste_profile = {
-        "cuisine_affinities": _calculate_cuisine_affinities(preferences.cuisine_preferences),
-        "atmosphere_preferences": _calculate_atmosphere_preferences(preferences.atmosphere_preferences),
-        "price_sensitivity": _calculate_price_sensitivity(preferences.price_preferences),
-        "service_expectations": _calculate_service_expectations(preferences.service_preferences),
         "dietary_requirements": _extract_dietary_requirements(preferences.dietary_preferences),
         "adventure_level": _calculate_adventure_level(preferences.adventure_preferences),
         "profile_confidence": _calculate_profile_confidence(preferences),
         "last_updated": datetime.utcnow().isoformat()
     }
 
-    user.taste_profile = taste_profile
-    user.last_profile_update = datetime.utcnow()
-
-    db.commit()
+    profile.taste_profile = taste_profile
+    profile.last_profile_update = datetime.utcnow()
 
 
 def _analyze_taste_profile(bubble_prefs: BubblePreference) -> Dict[str, Any]:
@@ -330,66 +331,74 @@ def _analyze_taste_profile(bubble_prefs: BubblePreference) -> Dict[str, Any]:
     return analysis
 
 
-# Helper functions for mapping preferences to indices
-def _get_cuisine_index(cuisine: str) -> int:
-    """Map cuisine types to vector indices"""
-    cuisine_map = {
-        'italian': 0, 'mexican': 1, 'chinese': 2, 'japanese': 3, 'indian': 4,
-        'thai': 5, 'american': 6, 'french': 7, 'mediterranean': 8, 'korean': 9,
-        'vietnamese': 10, 'middle_eastern': 11
-    }
-    return cuisine_map.get(cuisine, 19)  # Last index for unknown
-
-def _get_atmosphere_index(atmosphere: str) -> int:
-    """Map atmosphere types to vector indices"""
-    atmosphere_map = {
-        'romantic': 0, 'casual': 1, 'upscale': 2, 'family_friendly': 3,
-        'lively': 4, 'quiet': 5, 'outdoor': 6, 'cozy': 7
-    }
-    return atmosphere_map.get(atmosphere, 9)  # Last index for unknown
-
-def _get_price_index(price: str) -> int:
-    """Map price preferences to vector indices"""
-    price_map = {
-        'budget_friendly': 0, 'moderate': 1, 'upscale_worth_it': 2,
-        'price_no_object': 3, 'happy_hour': 4, 'deal_seeker': 5
-    }
-    return price_map.get(price, 5)
-
-def _get_service_index(service: str) -> int:
-    """Map service styles to vector indices"""
-    service_map = {
-        'fast_casual': 0, 'full_service': 1, 'takeout': 2,
-        'buffet': 3, 'food_truck': 4, 'fine_dining': 5
-    }
-    return service_map.get(service, 5)
-
-def _get_dietary_index(dietary: str) -> int:
-    """Map dietary preferences to vector indices"""
-    dietary_map = {
-        'vegetarian_friendly': 0, 'vegan_options': 1, 'gluten_free': 2,
-        'keto_friendly': 3, 'healthy_options': 4, 'comfort_food': 5,
-        'no_restrictions': 6
-    }
-    return dietary_map.get(dietary, 7)
-
-def _get_adventure_index(adventure: str) -> int:
-    """Map adventure levels to vector indices"""
-    adventure_map = {
-        'stick_to_favorites': 0, 'mild_adventurer': 1, 'food_explorer': 2,
-        'extreme_foodie': 3, 'try_anything_once': 4
-    }
-    return adventure_map.get(adventure, 4)
-
-# Additional helper functions would go here...
-def _calculate_cuisine_affinities(cuisine_prefs: dict) -> dict:
-    """Calculate cuisine affinity scores"""
-    return {k: v.get('weight', 1.0) for k, v in cuisine_prefs.items()}
-
-def _get_top_preferences(prefs: dict, limit: int) -> list:
+# Preference name -> vector index tables
+CUISINE_INDEX: Final[dict[str, int]] = {
+    'italian': 0, 'mexican': 1, 'chinese': 2, 'japanese': 3, 'indian': 4,
+    'thai': 5, 'american': 6, 'french': 7, 'mediterranean': 8, 'korean': 9,
+    'vietnamese': 10, 'middle_eastern': 11
+}
+
+ATMOSPHERE_INDEX: Final[dict[str, int]] = {
+    'romantic': 0, 'casual': 1, 'upscale': 2, 'family_friendly': 3,
+    'lively': 4, 'quiet': 5, 'outdoor': 6, 'cozy': 7
+}
+
+PRICE_INDEX: Final[dict[str, int]] = {
+    'budget_friendly': 0, 'moderate': 1, 'upscale_worth_it': 2,
+    'price_no_object': 3, 'happy_hour': 4, 'deal_seeker': 5
+}
+
+SERVICE_INDEX: Final[dict[str, int]] = {
+    'fast_casual': 0, 'full_service': 1, 'takeout': 2,
+    'buffet': 3, 'food_truck': 4, 'fine_dining': 5
+}
+
+DIETARY_INDEX: Final[dict[str, int]] = {
+    'vegetarian_friendly': 0, 'vegan_options': 1, 'gluten_free': 2,
+    'keto_friendly': 3, 'healthy_options': 4, 'comfort_food': 5,
+    'no_restrictions': 6
+}
+
+ADVENTURE_INDEX: Final[dict[str, int]] = {
+    'stick_to_favorites': 0, 'mild_adventurer': 1, 'food_explorer': 2,
+    'extreme_foodie': 3, 'try_anything_once': 4
+}
+
+# (category, index table, slice offset, slice size) for each part of the preference vector
+_VECTOR_LAYOUT: Final[tuple[tuple[str, dict[str, int], int, int], ...]] = (
+    ('cuisine_preferences', CUISINE_INDEX, 0, 20),
+    ('atmosphere_preferences', ATMOSPHERE_INDEX, 20, 10),
+    ('price_preferences', PRICE_INDEX, 30, 6),
+    ('service_preferences', SERVICE_INDEX, 36, 6),
+    ('dietary_preferences', DIETARY_INDEX, 42, 8),
+    ('adventure_preferences', ADVENTURE_INDEX, 50, 5),
+)
+PREFERENCE_VECTOR_SIZE: Final = 55
+
+# The layout resolved once: per category, preference name -> absolute vector slot,
+# plus the slot unknown names share. Keeps the per-key work to a single dict.get.
+_VECTOR_SLOTS: Final[tuple[tuple[str, dict[str, int], int], ...]] = tuple(
+    (category, {key: offset + index for key, index in index_map.items()}, offset + size - 1)
+    for category, index_map, offset, size in _VECTOR_LAYOUT
+)
+
+
+def _extract_dietary_requirements(dietary_prefs: dict[str, BubblePreferenceData]) -> list[str]:
+    """Dietary needs the user selected, strongest first"""
+    return [k for k in _get_top_preferences(dietary_prefs, len(dietary_prefs)) if k != 'no_restrictions']
+
+def _calculate_adventure_level(adventure_prefs: dict[str, BubblePreferenceData]) -> str:
+    """The adventure level the user weighted highest"""
+    top = _get_top_preferences(adventure_prefs, 1)
+    return top[0] if top else 'mild_adventurer'
+
+def _w(value) -> float:
+    """Weight of a submitted preference model or of one loaded back from JSON"""
+    return value.weight if hasattr(value, 'weight') else value.get('weight', 0)
+
+def _get_top_preferences(prefs: dict, limit: int) -> list[str]:
     """Get top N preferences by weight"""
-    sorted_prefs = sorted(prefs.items(), key=lambda x: x[1].get('weight', 0), reverse=True)
-    return [pref[0] for pref in sorted_prefs[:limit]]
+    return [key for key, _ in heapq.nlargest(limit, prefs.items(), key=lambda kv: _w(kv[1]))]
 
 def _calculate_profile_confidence(preferences: BubblePreferenceCreate) -> float:
     """Calculate how confident the profile is based on survey completion"""
@@ -405,4 +414,38 @@ def _calculate_profile_confidence(preferences: BubblePreferenceCreate) -> float:
 
     return completed_categories / total_categories
 
-# More helper functions would be implemented here...
\ No newline at end of file
+def _determine_adventure_personality(adventure_prefs: dict) -> str:
+    """Adventure level from stored preferences"""
+    return _calculate_adventure_level(adventure_prefs)
+
+def _calculate_profile_completeness(bubble_prefs: BubblePreference) -> float:
+    """Share of survey categories the user answered"""
+    categories = [
+        bubble_prefs.cuisine_preferences,
+        bubble_prefs.atmosphere_preferences,
+        bubble_prefs.price_preferences,
+        bubble_prefs.service_preferences,
+        bubble_prefs.dietary_preferences,
+        bubble_prefs.adventure_preferences
+    ]
+    return sum(1 for prefs in categories if prefs) / len(categories)
+
+def _calculate_taste_diversity(bubble_prefs: BubblePreference) -> float:
+    """How many of the known cuisines the user gave weight to (0-1)"""
+    cuisines = bubble_prefs.cuisine_preferences or {}
+    liked = sum(1 for v in cuisines.values() if _w(v) > 0)
+    return min(liked / len(CUISINE_INDEX), 1.0)
+
+def _generate_recommendation_themes(bubble_prefs: BubblePreference) -> list[str]:
+    """Pair top cuisines with the preferred atmosphere, e.g. cozy italian"""
+    cuisines = _get_top_preferences(bubble_prefs.cuisine_preferences or {}, 2)
+    atmospheres = _get_top_preferences(bubble_prefs.atmosphere_preferences or {}, 1)
+    if not atmospheres:
+        return [c.replace('_', ' ') for c in cuisines]
+    atmosphere = atmospheres[0].replace('_', ' ')
+    return [f"{atmosphere} {c.replace('_', ' ')}" for c in cuisines]
+
+def _estimate_recommendation_accuracy(bubble_prefs: BubblePreference) -> float:
+    """Rough expected accuracy from preference strength and survey coverage"""
+    strength = bubble_prefs.preference_strength or 0.0
+    return round(0.5 + 0.5 * strength * _calculate_profile_completeness(bubble_prefs), 2)
\ No newline at end of file
@@ -1,9 +1,9 @@
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
 from typing import Dict, Any
 
-from ..database import get_db
-from ..services.google_places import GooglePlacesService
+from ..database import SessionLocal
+from ..services.google_places import GooglePlacesService, get_google_places
 from ..auth import get_current_user
 from ..models import User
 
@@ -14,21 +14,23 @@ router = APIRouter(prefix="/data-pipeline", tags=["data-pipeline"])
 async def update_restaurant_data(
     background_tasks: BackgroundTasks,
     limit: int = 20,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    google_places: GooglePlacesService = Depends(get_google_places)
 ):
     """
     Update restaurant data from Google Places API.
     Runs as background task to avoid timeout.
     """
-    google_places = GooglePlacesService()
-
-    def update_task():
+    async def update_task():
+        # Own session: background work must not outlive the request's one
+        db = SessionLocal()
         try:
-            result = google_places.batch_update_restaurant_data(db, limit)
+            result = await google_places.batch_update_restaurant_data(db, limit)
             return result
         except Exception as e:
             return {"error": str(e), "updated": 0}
+        finally:
+            await asyncio.to_thread(db.close)
 
     # Run update in background
     background_tasks.add_task(update_task)
@@ -43,21 +45,22 @@ async def update_restaurant_data(
 @router.post("/discover-restaurants", response_model=Dict[str, Any])
 async def discover_new_restaurants(
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    google_places: GooglePlacesService = Depends(get_google_places)
 ):
     """
     Discover and add new restaurants from Google Places API.
     Runs as background task to avoid timeout.
     """
-    google_places = GooglePlacesService()
-
-    def discover_task():
+    async def discover_task():
+        db = SessionLocal()
         try:
-            result = google_places.discover_new_restaurants(db)
+            result = await google_places.discover_new_restaurants(db)
             return result
         except Exception as e:
             return {"error": str(e), "added": 0}
+        finally:
+            await asyncio.to_thread(db.close)
 
     # Run discovery in background
     background_tasks.add_task(discover_task)
@@ -70,9 +73,11 @@ async def discover_new_restaurants(
 
 
 @router.get("/api-usage")
-async def get_api_usage(current_user: User = Depends(get_current_user)):
+async def get_api_usage(
+    current_user: User = Depends(get_current_user),
+    google_places: GooglePlacesService = Depends(get_google_places)
+):
     """Get current Google Places API usage stats."""
-    google_places = GooglePlacesService()
 
     return {
         "daily_requests_used": google_places.daily_requests,
@@ -85,22 +90,23 @@ async def get_api_usage(current_user: User = Depends(get_current_user)):
 @router.post("/sync-images")
 async def sync_restaurant_images(
     background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_user),
+    google_places: GooglePlacesService = Depends(get_google_places)
 ):
     """
     Sync restaurant images from Google Places.
     Prioritizes restaurants without photos.
     """
-    google_places = GooglePlacesService()
-
-    def sync_images_task():
+    async def sync_images_task():
+        db = SessionLocal()
         try:
             # Focus on restaurants without photos first
-            result = google_places.batch_update_restaurant_data(db, limit=30)
+            result = await google_places.batch_update_restaurant_data(db, limit=30)
             return result
         except Exception as e:
             return {"error": str(e), "updated": 0}
+        finally:
+            await asyncio.to_thread(db.close)
 
     background_tasks.add_task(sync_images_task)
 
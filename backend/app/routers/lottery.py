@@ -1,31 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import Float, bindparam, false, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Final, List, Optional
 from datetime import datetime, timedelta
-import math
-import random
-
-from ..database import get_db
+import logging
+import secrets
+import numpy as np
+import orjson
+import redis.asyncio as redis
+
+from ..database import UPSERT_INSERT, get_async_db
+from ..geo import calculate_distance
 from ..auth import get_current_active_user
 from .. import models, schemas
+from ..serializers import CHECKIN_LIST, json_list_response
 
 router = APIRouter(prefix="/lottery", tags=["lottery"])
+logger = logging.getLogger(__name__)
 
-
-def calculate_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
-    """Calculate distance between two GPS coordinates in meters using Haversine formula."""
-    R = 6371000  # Earth's radius in meters
-
-    phi1 = math.radians(lat1)
-    phi2 = math.radians(lat2)
-    delta_phi = math.radians(lat2 - lat1)
-    delta_lambda = math.radians(lng2 - lng1)
-
-    a = (math.sin(delta_phi / 2) ** 2 +
-         math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2)
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-
-    return R * c
+# Read-heavy lottery views are cached in Redis briefly and dropped on points writes
+_POINTS_CACHE_TTL_SECONDS: Final = 30
 
 
 def get_current_month() -> str:
@@ -33,39 +27,106 @@ def get_current_month() -> str:
     return datetime.now().strftime("%Y-%m")
 
 
-def get_or_create_user_points(db: Session, user_id: int) -> models.UserPoints:
-    """Get or create user points record for current month."""
+async def get_or_create_user_points(db: AsyncSession, user_id: int) -> models.UserPoints:
+    """Get or create user points record for current month; the caller commits."""
     current_month = get_current_month()
 
-    user_points = db.query(models.UserPoints).filter(
+    lookup = select(models.UserPoints).where(
         models.UserPoints.user_id == user_id,
         models.UserPoints.current_month == current_month
-    ).first()
-
-    if not user_points:
+    )
+    user_points = await db.scalar(lookup)
+    if user_points:
+        return user_points
+
+    upsert = UPSERT_INSERT.get(db.bind.dialect.name)
+    if upsert is not None:
+        # Insert against the (user_id, current_month) constraint so a concurrent first
+        # write for the same month can't fail; whoever loses the race reads the winner's row
+        stmt = upsert(models.UserPoints).values(
+            user_id=user_id, current_month=current_month
+        ).on_conflict_do_nothing(
+            index_elements=[models.UserPoints.user_id, models.UserPoints.current_month]
+        ).returning(models.UserPoints)
+        user_points = await db.scalar(stmt) or await db.scalar(lookup)
+    else:
         user_points = models.UserPoints(
             user_id=user_id,
             current_month=current_month
         )
         db.add(user_points)
-        db.commit()
-        db.refresh(user_points)
+        await db.flush()
 
     return user_points
 
 
+async def _cache_get(request: Request, key: str, field: Optional[str] = None) -> Optional[bytes]:
+    """Cached payload for key (or a field of the hash at key); None on miss or without Redis."""
+    redis_client = getattr(request.app.state, "redis", None)
+    if redis_client is None:
+        return None
+    try:
+        if field is None:
+            return await redis_client.get(key)
+        return await redis_client.hget(key, field)
+    except redis.RedisError as e:
+        logger.warning(f"Lottery cache read failed: {e}")
+        return None
+
+
+async def _cache_set(request: Request, key: str, payload: bytes, field: Optional[str] = None) -> None:
+    redis_client = getattr(request.app.state, "redis", None)
+    if redis_client is None:
+        return
+    try:
+        if field is None:
+            await redis_client.set(key, payload, ex=_POINTS_CACHE_TTL_SECONDS)
+        else:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.hset(key, field, payload)
+                pipe.expire(key, _POINTS_CACHE_TTL_SECONDS)
+                await pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Lottery cache write failed: {e}")
+
+
+async def _invalidate_points_cache(request: Request, month: str, user_id: Optional[int] = None) -> None:
+    """Drop cached views that read user points for month; call after committing points changes."""
+    redis_client = getattr(request.app.state, "redis", None)
+    if redis_client is None:
+        return
+    keys = [f"leaderboard:{month}", f"lottery:{month}"]
+    if user_id is not None:
+        keys.append(f"points:{user_id}:{month}")
+    try:
+        await redis_client.delete(*keys)
+    except redis.RedisError as e:
+        logger.warning(f"Lottery cache invalidation failed: {e}")
+
+
 @router.post("/checkin", response_model=schemas.RestaurantCheckin)
 async def check_into_restaurant(
+    request: Request,
     checkin_data: schemas.RestaurantCheckinCreate,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Check into a restaurant for lottery eligibility."""
 
-    # Get restaurant
-    restaurant = db.query(models.Restaurant).filter(
+    # One round trip for everything the check-in is validated against: the restaurant's
+    # coordinates and whether the user already has an open check-in there today
+    today = datetime.now().date()
+    has_open_checkin = select(models.RestaurantCheckin.id).where(
+        models.RestaurantCheckin.user_id == current_user.id,
+        models.RestaurantCheckin.restaurant_id == checkin_data.restaurant_id,
+        models.RestaurantCheckin.check_in_time >= datetime.combine(today, datetime.min.time()),
+        models.RestaurantCheckin.status.in_([models.CheckinStatus.PENDING, models.CheckinStatus.ACTIVE])
+    ).exists()
+    restaurant = (await db.execute(select(
+        models.Restaurant.latitude, models.Restaurant.longitude, has_open_checkin.label("has_open_checkin")
+    ).where(
         models.Restaurant.id == checkin_data.restaurant_id
-    ).first()
+    ))).first()
 
     if not restaurant:
         raise HTTPException(
@@ -86,22 +147,13 @@ async def check_into_restaurant(
             detail=f"You must be within 100 meters of the restaurant to check in. You are {distance:.0f}m away."
         )
 
-    # Check if user already has an active checkin for this restaurant today
-    today = datetime.now().date()
-    existing_checkin = db.query(models.RestaurantCheckin).filter(
-        models.RestaurantCheckin.user_id == current_user.id,
-        models.RestaurantCheckin.restaurant_id == checkin_data.restaurant_id,
-        models.RestaurantCheckin.check_in_time >= datetime.combine(today, datetime.min.time()),
-        models.RestaurantCheckin.status.in_([models.CheckinStatus.PENDING, models.CheckinStatus.ACTIVE])
-    ).first()
-
-    if existing_checkin:
+    if restaurant.has_open_checkin:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="You already have an active check-in for this restaurant today"
         )
 
-    # Create check-in record
+    # Create check-in record; the INSERT returns its generated columns
     checkin = models.RestaurantCheckin(
         user_id=current_user.id,
         restaurant_id=checkin_data.restaurant_id,
@@ -110,15 +162,22 @@ async def check_into_restaurant(
         distance_from_restaurant=distance,
         status=models.CheckinStatus.PENDING
     )
-
     db.add(checkin)
-    db.commit()
-    db.refresh(checkin)
 
-    # Update user points (increment checkin count)
-    user_points = get_or_create_user_points(db, current_user.id)
-    user_points.total_checkins += 1
-    db.commit()
+    # Update user points (increment checkin count) in place; create the row on the first check-in of the month
+    current_month = get_current_month()
+    incremented = await db.execute(update(models.UserPoints).where(
+        models.UserPoints.user_id == current_user.id,
+        models.UserPoints.current_month == current_month
+    ).values(
+        total_checkins=models.UserPoints.total_checkins + 1
+    ).execution_options(synchronize_session=False))
+    if incremented.rowcount == 0:
+        user_points = await get_or_create_user_points(db, current_user.id)
+        user_points.total_checkins += 1
+
+    await db.commit()
+    await _invalidate_points_cache(request, current_month, current_user.id)
 
     return checkin
 
@@ -126,49 +185,55 @@ async def check_into_restaurant(
 @router.get("/checkins/active", response_model=List[schemas.RestaurantCheckin])
 async def get_active_checkins(
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get user's active check-ins (pending or ready for rating)."""
 
-    checkins = db.query(models.RestaurantCheckin).filter(
-        models.RestaurantCheckin.user_id == current_user.id,
-        models.RestaurantCheckin.status.in_([models.CheckinStatus.PENDING, models.CheckinStatus.ACTIVE])
-    ).order_by(models.RestaurantCheckin.created_at.desc()).all()
-
-    # Update statuses based on time elapsed
+    # Update statuses based on time elapsed, in two set-based UPDATEs
     now = datetime.now()
-    for checkin in checkins:
-        if checkin.status == models.CheckinStatus.PENDING:
-            time_elapsed = now - checkin.check_in_time
+    Checkin = models.RestaurantCheckin
 
-            if time_elapsed >= timedelta(minutes=10):
-                # Mark as active and set deadline
-                checkin.status = models.CheckinStatus.ACTIVE
-                checkin.min_stay_completed_at = now
-                checkin.rating_deadline = now + timedelta(hours=48)
-                db.commit()
+    # Pending for 10+ minutes: mark as active and set deadline
+    await db.execute(update(Checkin).where(
+        Checkin.user_id == current_user.id,
+        Checkin.status == models.CheckinStatus.PENDING,
+        Checkin.check_in_time <= now - timedelta(minutes=10)
+    ).values(
+        status=models.CheckinStatus.ACTIVE,
+        min_stay_completed_at=now,
+        rating_deadline=now + timedelta(hours=48)
+    ).execution_options(synchronize_session=False))
 
-        elif checkin.status == models.CheckinStatus.ACTIVE:
-            # Check if deadline has passed
-            if checkin.rating_deadline and now > checkin.rating_deadline:
-                checkin.status = models.CheckinStatus.EXPIRED
-                db.commit()
+    # Active past the rating deadline: expire
+    await db.execute(update(Checkin).where(
+        Checkin.user_id == current_user.id,
+        Checkin.status == models.CheckinStatus.ACTIVE,
+        Checkin.rating_deadline < now
+    ).values(status=models.CheckinStatus.EXPIRED).execution_options(synchronize_session=False))
 
-    return checkins
+    checkins = (await db.scalars(select(Checkin).where(
+        Checkin.user_id == current_user.id,
+        Checkin.status.in_([models.CheckinStatus.PENDING, models.CheckinStatus.ACTIVE])
+    ).order_by(Checkin.created_at.desc()))).all()
+
+    await db.commit()
+
+    return json_list_response(CHECKIN_LIST, checkins)
 
 
 @router.post("/ratings", response_model=schemas.DetailedRating)
 async def submit_detailed_rating(
+    request: Request,
     rating_data: schemas.DetailedRatingCreate,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Submit a detailed rating for lottery points."""
 
     # Get restaurant
-    restaurant = db.query(models.Restaurant).filter(
+    restaurant = await db.scalar(select(models.Restaurant).where(
         models.Restaurant.id == rating_data.restaurant_id
-    ).first()
+    ))
 
     if not restaurant:
         raise HTTPException(
@@ -179,11 +244,11 @@ async def submit_detailed_rating(
     # If checkin_id provided, validate it
     checkin = None
     if rating_data.checkin_id:
-        checkin = db.query(models.RestaurantCheckin).filter(
+        checkin = await db.scalar(select(models.RestaurantCheckin).where(
             models.RestaurantCheckin.id == rating_data.checkin_id,
             models.RestaurantCheckin.user_id == current_user.id,
             models.RestaurantCheckin.status == models.CheckinStatus.ACTIVE
-        ).first()
+        ))
 
         if not checkin:
             raise HTTPException(
@@ -192,145 +257,167 @@ async def submit_detailed_rating(
             )
 
     # Create or update basic rating
-    existing_rating = db.query(models.Rating).filter(
+    existing_rating = await db.scalar(select(models.Rating).where(
         models.Rating.user_id == current_user.id,
         models.Rating.restaurant_id == rating_data.restaurant_id
-    ).first()
-
-    if existing_rating:
-        existing_rating.rating = rating_data.overall_rating
-        existing_rating.updated_at = datetime.now()
-        rating = existing_rating
-    else:
-        rating = models.Rating(
-            user_id=current_user.id,
-            restaurant_id=rating_data.restaurant_id,
-            rating=rating_data.overall_rating
-        )
-        db.add(rating)
-
-    db.commit()
-    db.refresh(rating)
+    ))
 
     # Calculate points
     base_points = 10
     photo_bonus = 5 if rating_data.photos and len(rating_data.photos) > 0 else 0
     total_points = base_points + photo_bonus
 
-    # Create detailed rating
-    detailed_rating = models.DetailedRating(
-        user_id=current_user.id,
-        restaurant_id=rating_data.restaurant_id,
-        rating_id=rating.id,
-        checkin_id=rating_data.checkin_id,
-        overall_rating=rating_data.overall_rating,
-        food_quality_expectation=rating_data.food_quality_expectation,
-        portion_size_appropriate=rating_data.portion_size_appropriate,
-        food_fresh_prepared=rating_data.food_fresh_prepared,
-        service_attentive=rating_data.service_attentive,
-        wait_times_reasonable=rating_data.wait_times_reasonable,
-        atmosphere_pleasant=rating_data.atmosphere_pleasant,
-        restaurant_clean=rating_data.restaurant_clean,
-        noise_level_appropriate=rating_data.noise_level_appropriate,
-        restaurant_welcoming=rating_data.restaurant_welcoming,
-        prices_fair=rating_data.prices_fair,
-        would_recommend=rating_data.would_recommend,
-        would_return=rating_data.would_return,
-        photos=rating_data.photos or [],
-        has_photos=bool(rating_data.photos and len(rating_data.photos) > 0),
-        points_earned=total_points
-    )
-
-    db.add(detailed_rating)
-    db.commit()
-    db.refresh(detailed_rating)
+    # Everything below is written in one transaction; flush only where generated ids are needed
+    try:
+        if existing_rating:
+            rating_stats = models.rating_stats_update(
+                rating_data.restaurant_id, rating_data.overall_rating, existing_rating.rating, 0
+            )
+            existing_rating.rating = rating_data.overall_rating
+            existing_rating.updated_at = datetime.now()
+            rating = existing_rating
+        else:
+            rating_stats = models.rating_stats_update(rating_data.restaurant_id, rating_data.overall_rating, 0.0, 1)
+            rating = models.Rating(
+                user_id=current_user.id,
+                restaurant_id=rating_data.restaurant_id,
+                rating=rating_data.overall_rating
+            )
+            db.add(rating)
+            await db.flush()
 
-    # Update checkin status if applicable
-    if checkin:
-        checkin.status = models.CheckinStatus.RATED
-        checkin.rating_id = rating.id
-        db.commit()
+        # Keep the restaurant's average in step, as POST /ratings does
+        await db.execute(rating_stats)
 
-    # Award points
-    user_points = get_or_create_user_points(db, current_user.id)
-    user_points.total_points += total_points
-    user_points.monthly_points += total_points
-    user_points.total_ratings += 1
-    if photo_bonus > 0:
-        user_points.total_photos += 1
+        # Create detailed rating
+        detailed_rating = models.DetailedRating(
+            user_id=current_user.id,
+            restaurant_id=rating_data.restaurant_id,
+            rating_id=rating.id,
+            checkin_id=rating_data.checkin_id,
+            overall_rating=rating_data.overall_rating,
+            food_quality_expectation=rating_data.food_quality_expectation,
+            portion_size_appropriate=rating_data.portion_size_appropriate,
+            food_fresh_prepared=rating_data.food_fresh_prepared,
+            service_attentive=rating_data.service_attentive,
+            wait_times_reasonable=rating_data.wait_times_reasonable,
+            atmosphere_pleasant=rating_data.atmosphere_pleasant,
+            restaurant_clean=rating_data.restaurant_clean,
+            noise_level_appropriate=rating_data.noise_level_appropriate,
+            restaurant_welcoming=rating_data.restaurant_welcoming,
+            prices_fair=rating_data.prices_fair,
+            would_recommend=rating_data.would_recommend,
+            would_return=rating_data.would_return,
+            photos=rating_data.photos or [],
+            has_photos=bool(rating_data.photos and len(rating_data.photos) > 0),
+            points_earned=total_points
+        )
+        db.add(detailed_rating)
+
+        # Update checkin status if applicable
+        if checkin:
+            checkin.status = models.CheckinStatus.RATED
+            checkin.rating_id = rating.id
+
+        # Award points
+        user_points = await get_or_create_user_points(db, current_user.id)
+        user_points.total_points += total_points
+        user_points.monthly_points += total_points
+        user_points.total_ratings += 1
+        if photo_bonus > 0:
+            user_points.total_photos += 1
+
+        # Create point transaction record
+        current_month = get_current_month()
+        transaction = models.PointTransaction(
+            user_id=current_user.id,
+            points=total_points,
+            reason="detailed_rating" + ("_with_photo" if photo_bonus > 0 else ""),
+            rating_id=rating.id,
+            checkin_id=rating_data.checkin_id,
+            month=current_month
+        )
+        db.add(transaction)
 
-    db.commit()
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
 
-    # Create point transaction record
-    current_month = get_current_month()
-    transaction = models.PointTransaction(
-        user_id=current_user.id,
-        points=total_points,
-        reason="detailed_rating" + ("_with_photo" if photo_bonus > 0 else ""),
-        rating_id=rating.id,
-        checkin_id=rating_data.checkin_id,
-        month=current_month
-    )
-    db.add(transaction)
-    db.commit()
+    await _invalidate_points_cache(request, current_month, current_user.id)
 
     return detailed_rating
 
 
 @router.get("/points", response_model=schemas.UserPoints)
 async def get_user_points(
+    request: Request,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get user's current points and statistics."""
 
-    user_points = get_or_create_user_points(db, current_user.id)
-    return user_points
+    cache_key = f"points:{current_user.id}:{get_current_month()}"
+    payload = await _cache_get(request, cache_key)
+    if payload is None:
+        user_points = await get_or_create_user_points(db, current_user.id)
+        await db.commit()
+        payload = schemas.UserPoints.model_validate(user_points).model_dump_json()
+        await _cache_set(request, cache_key, payload)
+
+    return Response(payload, media_type="application/json")
 
 
 @router.get("/leaderboard", response_model=List[schemas.LeaderboardEntry])
 async def get_leaderboard(
+    request: Request,
     month: Optional[str] = None,
     limit: int = 20,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get leaderboard for current or specified month."""
 
     target_month = month or get_current_month()
 
-    # Get top users for the month
-    user_points = db.query(models.UserPoints, models.User).join(
+    # One hash per month, one field per limit, so a points write drops them all at once
+    cache_key = f"leaderboard:{target_month}"
+    payload = await _cache_get(request, cache_key, str(limit))
+    if payload is not None:
+        return Response(payload, media_type="application/json")
+
+    # Project only the columns the response needs and let the database rank them
+    rows = await db.execute(select(
+        models.User.id.label("user_id"),
+        models.User.username,
+        models.UserPoints.total_points,
+        models.UserPoints.monthly_points,
+        models.UserPoints.total_ratings,
+        models.UserPoints.total_photos,
+        func.row_number().over(order_by=models.UserPoints.monthly_points.desc()).label("rank")
+    ).join(
         models.User, models.UserPoints.user_id == models.User.id
-    ).filter(
+    ).where(
         models.UserPoints.current_month == target_month
     ).order_by(
         models.UserPoints.monthly_points.desc()
-    ).limit(limit).all()
-
-    leaderboard = []
-    for rank, (points, user) in enumerate(user_points, 1):
-        leaderboard.append(schemas.LeaderboardEntry(
-            user_id=user.id,
-            username=user.username,
-            total_points=points.total_points,
-            monthly_points=points.monthly_points,
-            rank=rank,
-            total_ratings=points.total_ratings,
-            total_photos=points.total_photos
-        ))
+    ).limit(limit))
+
+    payload = orjson.dumps([dict(row._mapping) for row in rows])
+    await _cache_set(request, cache_key, payload, str(limit))
 
-    return leaderboard
+    return Response(payload, media_type="application/json")
 
 
 @router.post("/bulk-import")
 async def bulk_import_past_visits(
+    request: Request,
     import_data: schemas.BulkImportRequest,
     current_user: models.User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Allow users to bulk import past restaurant visits for bonus points."""
 
-    user_points = get_or_create_user_points(db, current_user.id)
+    user_points = await get_or_create_user_points(db, current_user.id)
 
     # Check if user already completed bulk import
     if user_points.bulk_import_completed:
@@ -346,48 +433,61 @@ async def bulk_import_past_visits(
             detail="Maximum 50 restaurants can be imported at once"
         )
 
-    imported_count = 0
-    total_points = 0
     current_month = get_current_month()
 
-    for restaurant_data in import_data.restaurants:
-        # Try to find existing restaurant by name and cuisine
-        existing_restaurant = db.query(models.Restaurant).filter(
-            models.Restaurant.name.ilike(f"%{restaurant_data.name}%")
-        ).first()
-
-        if existing_restaurant:
-            # Check if user already rated this restaurant
-            existing_rating = db.query(models.Rating).filter(
-                models.Rating.user_id == current_user.id,
-                models.Rating.restaurant_id == existing_restaurant.id
-            ).first()
-
-            if not existing_rating:
-                # Create rating
-                rating = models.Rating(
-                    user_id=current_user.id,
-                    restaurant_id=existing_restaurant.id,
-                    rating=restaurant_data.rating
-                )
-                db.add(rating)
-                db.commit()
-                db.refresh(rating)
-
-                # Award points (base points only for bulk import)
-                points_earned = 10
-                total_points += points_earned
-                imported_count += 1
-
-                # Create point transaction
-                transaction = models.PointTransaction(
-                    user_id=current_user.id,
-                    points=points_earned,
-                    reason="bulk_import",
-                    rating_id=rating.id,
-                    month=current_month
-                )
-                db.add(transaction)
+    # Match every imported name in one query; each name takes the first restaurant containing it.
+    # name_norm is already lowercased, so plain LIKE works and hits the trigram index on Postgres
+    names = [models.normalize_name(restaurant_data.name) for restaurant_data in import_data.restaurants]
+    candidates = []
+    if names:
+        candidates = (await db.execute(select(models.Restaurant.id, models.Restaurant.name_norm).where(
+            or_(*(models.Restaurant.name_norm.contains(name) for name in names))
+        ).order_by(models.Restaurant.id))).all()
+
+    # Restaurants the user has already rated are skipped
+    rated_ids = set((await db.scalars(select(models.Rating.restaurant_id).where(
+        models.Rating.user_id == current_user.id,
+        models.Rating.restaurant_id.in_([candidate.id for candidate in candidates])
+    ))).all()) if candidates else set()
+
+    ratings = []
+    for restaurant_data, name in zip(import_data.restaurants, names):
+        restaurant_id = next(
+            (candidate.id for candidate in candidates if name in candidate.name_norm), None
+        )
+
+        if restaurant_id is not None and restaurant_id not in rated_ids:
+            rated_ids.add(restaurant_id)
+            ratings.append(models.Rating(
+                user_id=current_user.id,
+                restaurant_id=restaurant_id,
+                rating=restaurant_data.rating
+            ))
+
+    # Award points (base points only for bulk import)
+    points_earned = 10
+    imported_count = len(ratings)
+    total_points = points_earned * imported_count
+
+    # One batched INSERT for the ratings, then one for their point transactions
+    db.add_all(ratings)
+    await db.flush()
+    if ratings:
+        # Each imported restaurant is distinct, so one executemany folds them all into the averages
+        await db.execute(
+            models.rating_stats_update(bindparam("rid"), bindparam("added", type_=Float), 0.0, 1),
+            [{"rid": rating.restaurant_id, "added": rating.rating} for rating in ratings]
+        )
+    db.add_all([
+        models.PointTransaction(
+            user_id=current_user.id,
+            points=points_earned,
+            reason="bulk_import",
+            rating_id=rating.id,
+            month=current_month
+        )
+        for rating in ratings
+    ])
 
     # Apply point cap (200 points maximum)
     if total_points > 200:
@@ -400,7 +500,8 @@ async def bulk_import_past_visits(
     user_points.bulk_import_completed = True
     user_points.total_ratings += imported_count
 
-    db.commit()
+    await db.commit()
+    await _invalidate_points_cache(request, current_month, current_user.id)
 
     return {
         "message": f"Successfully imported {imported_count} restaurant ratings",
@@ -410,42 +511,51 @@ async def bulk_import_past_visits(
 
 
 @router.get("/lottery/current", response_model=schemas.MonthlyLottery)
-async def get_current_lottery(db: Session = Depends(get_db)):
+async def get_current_lottery(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Get current month's lottery information."""
 
     current_month = get_current_month()
-    lottery = db.query(models.MonthlyLottery).filter(
+    cache_key = f"lottery:{current_month}"
+    payload = await _cache_get(request, cache_key)
+    if payload is not None:
+        return Response(payload, media_type="application/json")
+
+    lottery = await db.scalar(select(models.MonthlyLottery).where(
         models.MonthlyLottery.month == current_month
-    ).first()
+    ))
 
     if not lottery:
         # Create current month's lottery
         lottery = models.MonthlyLottery(month=current_month)
         db.add(lottery)
-        db.commit()
-        db.refresh(lottery)
+        await db.commit()
+        await db.refresh(lottery)
 
     # Calculate total tickets (points) for the month
-    total_points = db.query(models.UserPoints.monthly_points).filter(
-        models.UserPoints.current_month == current_month
-    ).all()
+    lottery.total_tickets = await db.scalar(
+        select(func.coalesce(func.sum(models.UserPoints.monthly_points), 0)).where(
+            models.UserPoints.current_month == current_month
+        )
+    )
+    await db.commit()
 
-    lottery.total_tickets = sum(points[0] for points in total_points)
-    db.commit()
+    payload = schemas.MonthlyLottery.model_validate(lottery).model_dump_json()
+    await _cache_set(request, cache_key, payload)
 
-    return lottery
+    return Response(payload, media_type="application/json")
 
 
 @router.post("/lottery/draw")
 async def draw_monthly_lottery(
+    request: Request,
     month: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Draw the monthly lottery (admin function - should be secured)."""
 
-    lottery = db.query(models.MonthlyLottery).filter(
+    lottery = (await db.execute(select(models.MonthlyLottery.is_drawn).where(
         models.MonthlyLottery.month == month
-    ).first()
+    ))).first()
 
     if not lottery:
         raise HTTPException(
@@ -453,17 +563,18 @@ async def draw_monthly_lottery(
             detail="Lottery not found for specified month"
         )
 
+    already_drawn = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Lottery already drawn for this month"
+    )
     if lottery.is_drawn:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Lottery already drawn for this month"
-        )
+        raise already_drawn
 
     # Get all users with points for this month
-    user_points = db.query(models.UserPoints).filter(
+    user_points = (await db.execute(select(models.UserPoints.user_id, models.UserPoints.monthly_points).where(
         models.UserPoints.current_month == month,
         models.UserPoints.monthly_points > 0
-    ).all()
+    ))).all()
 
     if not user_points:
         raise HTTPException(
@@ -471,33 +582,34 @@ async def draw_monthly_lottery(
             detail="No eligible participants for lottery"
         )
 
-    # Create weighted random selection based on points
-    total_tickets = sum(up.monthly_points for up in user_points)
-    winning_ticket = random.randint(1, total_tickets)
-
-    # Find winner
-    current_ticket = 0
-    winner = None
-    for up in user_points:
-        current_ticket += up.monthly_points
-        if current_ticket >= winning_ticket:
-            winner = up
-            break
-
-    if not winner:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error determining lottery winner"
-        )
-
-    # Update lottery record
-    lottery.is_drawn = True
-    lottery.winner_user_id = winner.user_id
-    lottery.winning_ticket_number = winning_ticket
-    lottery.total_tickets = total_tickets
-    lottery.draw_date = datetime.now()
-
-    db.commit()
+    # Create weighted random selection based on points: the winner is the first
+    # participant whose running ticket total reaches the drawn ticket
+    cumulative_tickets = np.cumsum(np.fromiter(
+        (up.monthly_points for up in user_points), dtype=np.int64, count=len(user_points)
+    ))
+    total_tickets = int(cumulative_tickets[-1])
+    # Drawn from the OS CSPRNG so the winner can't be predicted from interpreter state
+    winning_ticket = secrets.randbelow(total_tickets) + 1
+    winner = user_points[int(np.searchsorted(cumulative_tickets, winning_ticket))]
+
+    # Update lottery record, only if no concurrent draw got there first
+    drawn_id = await db.scalar(update(models.MonthlyLottery).where(
+        models.MonthlyLottery.month == month,
+        models.MonthlyLottery.is_drawn == false()
+    ).values(
+        is_drawn=True,
+        winner_user_id=winner.user_id,
+        winning_ticket_number=winning_ticket,
+        total_tickets=total_tickets,
+        draw_date=datetime.now()
+    ).returning(models.MonthlyLottery.id).execution_options(synchronize_session=False))
+
+    if drawn_id is None:
+        await db.rollback()
+        raise already_drawn
+
+    await db.commit()
+    await _invalidate_points_cache(request, month)
 
     return {
         "message": "Lottery drawn successfully",
@@ -1,68 +1,90 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from ..database import get_db
+from ..database import UPSERT_INSERT, get_async_db
 from ..schemas import Rating, RatingCreate
-from ..models import Rating as RatingModel, Restaurant as RestaurantModel, User
+from ..models import Rating as RatingModel, Restaurant as RestaurantModel, User, rating_stats_update
 from ..auth import get_current_active_user
-from ..services.recommendation import RecommendationEngine
+from ..services.recommendation import RecommendationEngine, get_recommendation_engine
 
 router = APIRouter(prefix="/ratings", tags=["ratings"])
 
 
+async def _insert_rating(db: AsyncSession, user_id: int, rating: RatingCreate) -> Optional[RatingModel]:
+    """Insert a new rating; None if one already exists for this user and restaurant."""
+    upsert = UPSERT_INSERT.get(db.bind.dialect.name)
+    if upsert is None:
+        db_rating = RatingModel(user_id=user_id, restaurant_id=rating.restaurant_id, rating=rating.rating)
+        db.add(db_rating)
+        await db.flush()
+        return db_rating
+
+    # Against uq_rating_user_rest, so a double submit can't raise IntegrityError
+    stmt = upsert(RatingModel).values(
+        user_id=user_id, restaurant_id=rating.restaurant_id, rating=rating.rating
+    ).on_conflict_do_nothing(
+        index_elements=[RatingModel.user_id, RatingModel.restaurant_id]
+    ).returning(RatingModel)
+    return await db.scalar(stmt)
+
+
+async def _update_user_preferences(
+    session_factory: async_sessionmaker, recommendation_engine: RecommendationEngine, user_id: int
+):
+    """Background task: recompute preferences in a session of its own, not the finished request's."""
+    async with session_factory() as db:
+        await db.run_sync(recommendation_engine.update_user_preferences, user_id)
+
+
 @router.post("/", response_model=Rating, status_code=status.HTTP_201_CREATED)
 async def create_rating(
     rating: RatingCreate,
+    request: Request,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    recommendation_engine: RecommendationEngine = Depends(get_recommendation_engine)
 ):
     """Create or update a rating for a restaurant."""
 
     # Check if restaurant exists
-    restaurant = db.query(RestaurantModel).filter(RestaurantModel.id == rating.restaurant_id).first()
-    if not restaurant:
+    restaurant_id = await db.scalar(select(RestaurantModel.id).where(RestaurantModel.id == rating.restaurant_id))
+    if not restaurant_id:
         raise HTTPException(status_code=404, detail="Restaurant not found")
 
     # Check if user already rated this restaurant
-    existing_rating = db.query(RatingModel).filter(
+    lookup = select(RatingModel).where(
         RatingModel.user_id == current_user.id,
         RatingModel.restaurant_id == rating.restaurant_id
-    ).first()
+    )
+    existing_rating = await db.scalar(lookup)
 
-    if existing_rating:
-        # Update existing rating
+    db_rating = None
+    if existing_rating is None:
+        # Create new rating
+        db_rating = await _insert_rating(db, current_user.id, rating)
+        if db_rating is None:
+            # A concurrent request rated it first; update that row instead
+            existing_rating = await db.scalar(lookup)
+
+    if db_rating is None:
+        # Update existing rating; the average moves by the difference
+        adjustment = rating_stats_update(rating.restaurant_id, rating.rating, existing_rating.rating, 0)
         existing_rating.rating = rating.rating
         db_rating = existing_rating
     else:
-        # Create new rating
-        db_rating = RatingModel(
-            user_id=current_user.id,
-            restaurant_id=rating.restaurant_id,
-            rating=rating.rating
-        )
-        db.add(db_rating)
+        adjustment = rating_stats_update(rating.restaurant_id, rating.rating, 0.0, 1)
 
-    db.commit()
-    db.refresh(db_rating)
+    # Update restaurant's average rating in place rather than re-aggregating its ratings
+    await db.execute(adjustment)
+    await db.commit()
 
-    # Update restaurant's average rating
-    avg_rating = db.query(func.avg(RatingModel.rating)).filter(
-        RatingModel.restaurant_id == rating.restaurant_id
-    ).scalar()
-
-    rating_count = db.query(func.count(RatingModel.id)).filter(
-        RatingModel.restaurant_id == rating.restaurant_id
-    ).scalar()
-
-    restaurant.avg_rating = float(avg_rating) if avg_rating else 0.0
-    restaurant.rating_count = rating_count
-    db.commit()
-
-    # Update user preferences asynchronously
-    recommendation_engine = RecommendationEngine()
-    recommendation_engine.update_user_preferences(db, current_user.id)
+    # Update user preferences after the response is sent
+    background_tasks.add_task(
+        _update_user_preferences, request.app.state.AsyncSessionLocal, recommendation_engine, current_user.id
+    )
 
     return db_rating
 
@@ -70,10 +92,10 @@ async def create_rating(
 @router.get("/user", response_model=List[Rating])
 async def get_user_ratings(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all ratings for the current user."""
-    ratings = db.query(RatingModel).filter(RatingModel.user_id == current_user.id).all()
+    ratings = (await db.scalars(select(RatingModel).where(RatingModel.user_id == current_user.id))).all()
     return ratings
 
 
@@ -81,54 +103,45 @@ async def get_user_ratings(
 async def get_restaurant_ratings(
     restaurant_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all ratings for a specific restaurant."""
 
     # Check if restaurant exists
-    restaurant = db.query(RestaurantModel).filter(RestaurantModel.id == restaurant_id).first()
+    restaurant = await db.get(RestaurantModel, restaurant_id)
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
 
-    ratings = db.query(RatingModel).filter(RatingModel.restaurant_id == restaurant_id).all()
+    ratings = (await db.scalars(select(RatingModel).where(RatingModel.restaurant_id == restaurant_id))).all()
     return ratings
 
 
 @router.delete("/{rating_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_rating(
     rating_id: int,
+    request: Request,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    recommendation_engine: RecommendationEngine = Depends(get_recommendation_engine)
 ):
     """Delete a rating."""
 
-    rating = db.query(RatingModel).filter(
+    rating = await db.scalar(select(RatingModel).where(
         RatingModel.id == rating_id,
         RatingModel.user_id == current_user.id
-    ).first()
+    ))
 
     if not rating:
         raise HTTPException(status_code=404, detail="Rating not found")
 
-    restaurant_id = rating.restaurant_id
-    db.delete(rating)
-    db.commit()
+    await db.delete(rating)
 
     # Update restaurant's average rating
-    avg_rating = db.query(func.avg(RatingModel.rating)).filter(
-        RatingModel.restaurant_id == restaurant_id
-    ).scalar()
-
-    rating_count = db.query(func.count(RatingModel.id)).filter(
-        RatingModel.restaurant_id == restaurant_id
-    ).scalar()
-
-    restaurant = db.query(RestaurantModel).filter(RestaurantModel.id == restaurant_id).first()
-    if restaurant:
-        restaurant.avg_rating = float(avg_rating) if avg_rating else 0.0
-        restaurant.rating_count = rating_count
-        db.commit()
-
-    # Update user preferences
-    recommendation_engine = RecommendationEngine()
-    recommendation_engine.update_user_preferences(db, current_user.id)
\ No newline at end of file
+    await db.execute(rating_stats_update(rating.restaurant_id, 0.0, rating.rating, -1))
+    await db.commit()
+
+    # Update user preferences in the background
+    background_tasks.add_task(
+        _update_user_preferences, request.app.state.AsyncSessionLocal, recommendation_engine, current_user.id
+    )
@@ -1,12 +1,12 @@
 from typing import List, Dict, Any
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_db
+from ..database import get_async_db
 from ..schemas import RecommendationRequest
 from ..models import User
 from ..auth import get_current_active_user
-from ..services.recommendation import RecommendationEngine
+from ..services.recommendation import RecommendationEngine, get_recommendation_engine
 
 router = APIRouter(prefix="/recommendations", tags=["recommendations"])
 
@@ -15,14 +15,14 @@ router = APIRouter(prefix="/recommendations", tags=["recommendations"])
 async def get_recommendations(
     request: RecommendationRequest,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    recommendation_engine: RecommendationEngine = Depends(get_recommendation_engine)
 ):
     """Get personalized restaurant recommendations for the current user."""
 
-    recommendation_engine = RecommendationEngine()
-
-    recommendations = recommendation_engine.get_recommendations(
-        db=db,
+    # The engine is synchronous; run it on the session's sync facade
+    recommendations = await db.run_sync(
+        recommendation_engine.get_recommendations,
         user=current_user,
         user_lat=request.user_lat,
         user_lng=request.user_lng,
@@ -39,16 +39,15 @@ async def get_recommendations(
 async def get_user_recommendations(
     recommendation_type: str = Query("for-you", description="Type of recommendations: for-you, trending, favorites"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db),
+    recommendation_engine: RecommendationEngine = Depends(get_recommendation_engine)
 ):
     """Get personalized recommendations based on type."""
 
-    recommendation_engine = RecommendationEngine()
-
     if recommendation_type == "trending":
         # Get trending restaurants (high ratings, recent activity)
-        recommendations = recommendation_engine.get_trending_recommendations(
-            db=db,
+        recommendations = await db.run_sync(
+            recommendation_engine.get_trending_recommendations,
             user=current_user,
             user_lat=current_user.location_lat,
             user_lng=current_user.location_lng,
@@ -56,8 +55,8 @@ async def get_user_recommendations(
         )
     elif recommendation_type == "favorites":
         # Get restaurants similar to user's highly rated ones
-        recommendations = recommendation_engine.get_similar_recommendations(
-            db=db,
+        recommendations = await db.run_sync(
+            recommendation_engine.get_similar_recommendations,
             user=current_user,
             user_lat=current_user.location_lat,
             user_lng=current_user.location_lng,
@@ -65,8 +64,8 @@ async def get_user_recommendations(
         )
     else:  # for-you (default)
         # Get personalized AI recommendations
-        recommendations = recommendation_engine.get_recommendations(
-            db=db,
+        recommendations = await db.run_sync(
+            recommendation_engine.get_recommendations,
             user=current_user,
             user_lat=current_user.location_lat,
             user_lng=current_user.location_lng,
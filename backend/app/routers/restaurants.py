@@ -1,179 +1,217 @@
+import hashlib
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
-from geopy.distance import geodesic
-
-from ..database import get_db
-from ..schemas import Restaurant, RestaurantSearch
-from ..models import Restaurant as RestaurantModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, undefer_group
+import numpy as np
+import orjson
+
+from ..database import get_async_db
+from ..geo import calculate_distance_precomputed
+from ..schemas import Restaurant, RestaurantSearch, RestaurantSummary
+from ..models import Restaurant as RestaurantModel, cuisine_filter_clause, text_search_clause, within_radius_clause
 from ..auth import get_current_active_user
+from ..serializers import RESTAURANT_LIST, json_list_response
 from ..models import User
-from ..services.search_intelligence import search_intelligence
+from ..services.geo_index import geo_index
+from ..services.search_intelligence import (
+    search_intelligence, find_similar_restaurant_names, get_available_cuisines, get_restaurant_names
+)
 
 router = APIRouter(prefix="/restaurants", tags=["restaurants"])
 
+# Columns the RestaurantSummary schema serializes
+_SUMMARY_COLUMNS = (
+    RestaurantModel.id, RestaurantModel.name, RestaurantModel.address,
+    RestaurantModel.phone, RestaurantModel.website, RestaurantModel.cuisine_type, RestaurantModel.price_level,
+    RestaurantModel.latitude, RestaurantModel.longitude,
+    RestaurantModel.google_rating, RestaurantModel.google_rating_count, RestaurantModel.google_photos,
+    RestaurantModel.avg_rating, RestaurantModel.rating_count,
+)
 
-@router.get("/", response_model=List[Restaurant])
+# Both endpoints sit behind auth, so keep shared caches out of it
+_CACHE_CONTROL = "private, max-age=60"
+
+
+def _not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Attach cache validators; return a bare 304 when the client already holds etag."""
+    headers = {"ETag": etag, "Cache-Control": _CACHE_CONTROL}
+    # If-None-Match uses weak comparison, so ignore W/ prefixes on either side
+    presented = {tag.strip().removeprefix("W/") for tag in request.headers.get("if-none-match", "").split(",")}
+    if "*" in presented or etag.removeprefix("W/") in presented:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+@router.get("/", response_model=List[RestaurantSummary])
 async def get_restaurants(
     search: RestaurantSearch = Depends(),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get restaurants with search and filter options."""
-    query = db.query(RestaurantModel).filter(RestaurantModel.is_active == True)
+    # Summary columns plus the precomputed haversine terms for the distance pass
+    query = select(RestaurantModel).options(load_only(
+        *_SUMMARY_COLUMNS, RestaurantModel.lat_rad, RestaurantModel.lng_rad, RestaurantModel.cos_lat
+    )).where(
+        RestaurantModel.is_active == True
+    )
 
     # Intelligent text search with semantic expansion
     if search.query:
         # Analyze search intent and expand query
         search_analysis = search_intelligence.analyze_search_intent(search.query)
-        expanded_terms = search_analysis["expanded_terms"]
-
-        # Create search conditions for original and expanded terms
-        search_conditions = []
-
-        # Original query
-        original_term = f"%{search.query}%"
-        search_conditions.extend([
-            RestaurantModel.name.ilike(original_term),
-            RestaurantModel.address.ilike(original_term),
-            RestaurantModel.cuisine_type.ilike(original_term)
-        ])
-
-        # Expanded terms
-        for term in expanded_terms:
-            expanded_term = f"%{term}%"
-            search_conditions.extend([
-                RestaurantModel.name.ilike(expanded_term),
-                RestaurantModel.cuisine_type.ilike(expanded_term)
-            ])
-
-        # Apply semantic cuisine filtering if detected
-        if search_analysis["filters"]["cuisine_types"]:
-            search_conditions.extend([
-                RestaurantModel.cuisine_type.ilike(f"%{cuisine}%")
-                for cuisine in search_analysis["filters"]["cuisine_types"]
-            ])
-
-        query = query.filter(or_(*search_conditions))
+        # Expansions overlap with the query and with each other, and matching is
+        # case-insensitive, so each distinct term becomes one predicate per column
+        expanded_terms = list(dict.fromkeys(
+            term.lower() for term in [search.query, *search_analysis["expanded_terms"]]
+        ))
+        cuisine_terms = list(dict.fromkeys(
+            [*expanded_terms, *(cuisine.lower() for cuisine in search_analysis["filters"]["cuisine_types"])]
+        ))
+
+        if db.bind.dialect.name == "postgresql":
+            # One indexed tsvector match for the query, its expansions and detected cuisines
+            query = query.where(text_search_clause(cuisine_terms))
+        else:
+            # The original query also matches addresses; expansions match names, and
+            # expansions plus detected cuisines match cuisine types
+            search_conditions = [RestaurantModel.address.ilike(f"%{search.query}%")]
+            search_conditions.extend(RestaurantModel.name.ilike(f"%{term}%") for term in expanded_terms)
+            search_conditions.extend(RestaurantModel.cuisine_type.ilike(f"%{term}%") for term in cuisine_terms)
+
+            query = query.where(or_(*search_conditions))
 
     # Cuisine filter
     if search.cuisine_filter:
-        query = query.filter(RestaurantModel.cuisine_type.in_(search.cuisine_filter))
+        query = query.where(cuisine_filter_clause(search.cuisine_filter))
 
     # Price filter
     if search.price_filter:
-        query = query.filter(RestaurantModel.price_level.in_(search.price_filter))
+        query = query.where(RestaurantModel.price_level.in_(search.price_filter))
 
     # Minimum rating filter
     if search.min_rating:
-        query = query.filter(RestaurantModel.avg_rating >= search.min_rating)
+        query = query.where(RestaurantModel.avg_rating >= search.min_rating)
+
+    # Keep only restaurants that can be within range before paginating; the
+    # bounding box runs on the latitude/longitude indexes
+    if search.user_lat and search.user_lng:
+        query = query.where(within_radius_clause(search.user_lat, search.user_lng, search.max_distance * 1000))
 
     # Order by rating
     query = query.order_by(RestaurantModel.avg_rating.desc())
 
     # Pagination
-    restaurants = query.offset(search.offset).limit(search.limit).all()
+    restaurants = (await db.scalars(query.offset(search.offset).limit(search.limit))).all()
 
-    # Calculate distances if user location provided
-    if search.user_lat and search.user_lng:
-        user_location = (search.user_lat, search.user_lng)
-
-        filtered_restaurants = []
-        for restaurant in restaurants:
-            restaurant_location = (restaurant.latitude, restaurant.longitude)
-            distance = geodesic(user_location, restaurant_location).kilometers
-
-            if distance <= search.max_distance:
-                # Add distance to the restaurant object
-                restaurant.distance = distance
-                filtered_restaurants.append(restaurant)
+    # Calculate distances if user location provided, for the whole page at once
+    distances = None
+    if restaurants and search.user_lat and search.user_lng:
+        km = calculate_distance_precomputed(
+            search.user_lat, search.user_lng,
+            [r.lat_rad for r in restaurants], [r.lng_rad for r in restaurants], [r.cos_lat for r in restaurants]
+        ) / 1000
+        in_range = np.flatnonzero(km <= search.max_distance)
 
         # Sort by distance
-        filtered_restaurants.sort(key=lambda x: x.distance)
-        restaurants = filtered_restaurants
+        order = in_range[np.argsort(km[in_range], kind="stable")]
+        restaurants = [restaurants[i] for i in order]
+        distances = km[order].tolist()
 
-    return restaurants
+    return json_list_response(RESTAURANT_LIST, restaurants, distances)
 
 
 @router.get("/{restaurant_id}", response_model=Restaurant)
 async def get_restaurant(
     restaurant_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific restaurant by ID."""
-    restaurant = db.query(RestaurantModel).filter(
+    restaurant = await db.scalar(select(RestaurantModel).options(undefer_group("details")).where(
         RestaurantModel.id == restaurant_id,
         RestaurantModel.is_active == True
-    ).first()
+    ))
 
     if not restaurant:
         raise HTTPException(status_code=404, detail="Restaurant not found")
 
-    return restaurant
+    # updated_at is unset until the first write and only has second resolution on SQLite,
+    # so the rating stats go in too: two ratings within one second must still change the tag
+    changed = restaurant.updated_at or restaurant.created_at
+    etag = (
+        f'W/"{restaurant.id}-{changed.timestamp() if changed else 0}'
+        f'-{restaurant.rating_count}-{restaurant.avg_rating}"'
+    )
+    return _not_modified(request, response, etag) or restaurant
 
 
-@router.get("/nearby/", response_model=List[Restaurant])
+@router.get("/nearby/", response_model=List[RestaurantSummary])
 async def get_nearby_restaurants(
     lat: float = Query(..., description="Latitude"),
     lng: float = Query(..., description="Longitude"),
     radius: float = Query(10.0, description="Search radius in kilometers"),
     limit: int = Query(20, description="Maximum number of results"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get restaurants near a specific location."""
-    restaurants = db.query(RestaurantModel).filter(RestaurantModel.is_active == True).all()
-
-    user_location = (lat, lng)
-    nearby_restaurants = []
-
-    for restaurant in restaurants:
-        restaurant_location = (restaurant.latitude, restaurant.longitude)
-        distance = geodesic(user_location, restaurant_location).kilometers
-
-        if distance <= radius:
-            restaurant.distance = distance
-            nearby_restaurants.append(restaurant)
+    # Nearest ids come from the in-process coordinate index; only their rows are loaded
+    ids, km = await geo_index.nearest(db, lat, lng, radius, limit)
+    if not len(ids):
+        return []
+
+    distances = dict(zip(ids.tolist(), km.tolist()))
+    # is_active is rechecked since the index may be up to a minute old
+    nearby_restaurants = (await db.scalars(select(RestaurantModel).options(load_only(*_SUMMARY_COLUMNS)).where(
+        RestaurantModel.id.in_(distances),
+        RestaurantModel.is_active == True
+    ))).all()
 
     # Sort by distance
-    nearby_restaurants.sort(key=lambda x: x.distance)
+    nearby_restaurants = sorted(nearby_restaurants, key=lambda r: distances[r.id])
 
-    return nearby_restaurants[:limit]
+    return json_list_response(
+        RESTAURANT_LIST, nearby_restaurants, [distances[r.id] for r in nearby_restaurants]
+    )
 
 
 @router.get("/search/suggestions")
 async def get_search_suggestions(
+    request: Request,
+    response: Response,
     q: str = Query(..., min_length=2, description="Partial search query"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get search auto-complete suggestions."""
-    # Get available cuisines from database
-    available_cuisines = db.query(RestaurantModel.cuisine_type).distinct().all()
-    available_cuisines = [c[0] for c in available_cuisines if c[0]]
+    available_cuisines = await get_available_cuisines(db)
 
     suggestions = search_intelligence.get_search_suggestions(q, available_cuisines)
 
-    return {"suggestions": suggestions}
+    etag = f'W/"{hashlib.blake2b(orjson.dumps(suggestions), digest_size=8).hexdigest()}"'
+    return _not_modified(request, response, etag) or {"suggestions": suggestions}
 
 
 @router.get("/search/corrections")
 async def get_search_corrections(
     q: str = Query(..., description="Search query that might need correction"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get 'did you mean' suggestions for search queries."""
-    # Get available cuisines and restaurant names
-    available_cuisines = db.query(RestaurantModel.cuisine_type).distinct().all()
-    available_cuisines = [c[0] for c in available_cuisines if c[0]]
-
-    restaurant_names = db.query(RestaurantModel.name).distinct().limit(100).all()
-    restaurant_names = [r[0] for r in restaurant_names if r[0]]
+    if db.bind.dialect.name == "postgresql":
+        # Closest names by trigram similarity rather than an arbitrary hundred
+        restaurant_names = await find_similar_restaurant_names(db, q)
+    else:
+        restaurant_names = await get_restaurant_names(db)
 
-    available_terms = available_cuisines + restaurant_names
+    available_terms = await get_available_cuisines(db) + restaurant_names
 
     corrections = search_intelligence.suggest_corrections(q, available_terms)
 
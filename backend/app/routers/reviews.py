@@ -1,80 +1,99 @@
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, String, Text, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
-from ..database import get_db
+from ..database import UPSERT_INSERT, get_async_db
 from ..schemas import Review, ReviewCreate
 from ..models import Review as ReviewModel, Restaurant as RestaurantModel, User
 from ..auth import get_current_active_user
+from ..serializers import REVIEW_LIST, json_list_response
 
 router = APIRouter(prefix="/reviews", tags=["reviews"])
 
+_REVIEWS = ReviewModel.__table__
+
+
+async def _insert_review(db: AsyncSession, user_id: int, review: ReviewCreate) -> Optional[Row]:
+    """Insert a review and return its row; None if the restaurant is missing or already reviewed."""
+    upsert = UPSERT_INSERT.get(db.bind.dialect.name)
+    if upsert is None:
+        # No ON CONFLICT (Oracle): check first, then insert
+        restaurant_id = await db.scalar(select(RestaurantModel.id).where(RestaurantModel.id == review.restaurant_id))
+        reviewed = await db.scalar(select(ReviewModel.id).where(
+            ReviewModel.user_id == user_id,
+            ReviewModel.restaurant_id == review.restaurant_id
+        ))
+        if restaurant_id is None or reviewed is not None:
+            return None
+        stmt = insert(_REVIEWS).values(
+            user_id=user_id, restaurant_id=review.restaurant_id, title=review.title, content=review.content
+        )
+    else:
+        # restaurant_id comes from the restaurant row, so a missing restaurant inserts nothing;
+        # uq_review_user_rest turns a repeat review into a no-op
+        source = select(
+            literal(user_id), RestaurantModel.id, literal(review.title, String), literal(review.content, Text)
+        ).where(RestaurantModel.id == review.restaurant_id)
+        stmt = upsert(_REVIEWS).from_select(
+            ["user_id", "restaurant_id", "title", "content"], source
+        ).on_conflict_do_nothing(index_elements=[_REVIEWS.c.user_id, _REVIEWS.c.restaurant_id])
+    return (await db.execute(stmt.returning(*_REVIEWS.c))).first()
+
 
 @router.post("/", response_model=Review, status_code=status.HTTP_201_CREATED)
 async def create_review(
     review: ReviewCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a review for a restaurant."""
+    created = await _insert_review(db, current_user.id, review)
 
-    # Check if restaurant exists
-    restaurant = db.query(RestaurantModel).filter(RestaurantModel.id == review.restaurant_id).first()
-    if not restaurant:
-        raise HTTPException(status_code=404, detail="Restaurant not found")
-
-    # Check if user already reviewed this restaurant
-    existing_review = db.query(ReviewModel).filter(
-        ReviewModel.user_id == current_user.id,
-        ReviewModel.restaurant_id == review.restaurant_id
-    ).first()
-
-    if existing_review:
+    if created is None:
+        # Only on failure: tell a missing restaurant apart from a repeat review
+        if await db.scalar(select(RestaurantModel.id).where(RestaurantModel.id == review.restaurant_id)) is None:
+            raise HTTPException(status_code=404, detail="Restaurant not found")
         raise HTTPException(
             status_code=400,
             detail="You have already reviewed this restaurant. Use PUT to update your review."
         )
 
-    # Create new review
-    db_review = ReviewModel(
-        user_id=current_user.id,
-        restaurant_id=review.restaurant_id,
-        title=review.title,
-        content=review.content
-    )
+    await db.commit()
 
-    db.add(db_review)
-    db.commit()
-    db.refresh(db_review)
-
-    return db_review
+    return {**created._mapping, "user": current_user}
 
 
 @router.get("/user", response_model=List[Review])
 async def get_user_reviews(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all reviews by the current user."""
-    reviews = db.query(ReviewModel).filter(ReviewModel.user_id == current_user.id).all()
-    return reviews
+    reviews = (await db.scalars(select(ReviewModel).options(selectinload(ReviewModel.user)).where(
+        ReviewModel.user_id == current_user.id
+    ))).all()
+    return json_list_response(REVIEW_LIST, reviews)
 
 
 @router.get("/restaurant/{restaurant_id}", response_model=List[Review])
 async def get_restaurant_reviews(
     restaurant_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all reviews for a specific restaurant."""
 
     # Check if restaurant exists
-    restaurant = db.query(RestaurantModel).filter(RestaurantModel.id == restaurant_id).first()
-    if not restaurant:
+    if await db.scalar(select(RestaurantModel.id).where(RestaurantModel.id == restaurant_id)) is None:
         raise HTTPException(status_code=404, detail="Restaurant not found")
 
-    reviews = db.query(ReviewModel).filter(ReviewModel.restaurant_id == restaurant_id).all()
-    return reviews
+    # Load every reviewer in one query rather than one per review during serialization
+    reviews = (await db.scalars(select(ReviewModel).options(selectinload(ReviewModel.user)).where(
+        ReviewModel.restaurant_id == restaurant_id
+    ))).all()
+    return json_list_response(REVIEW_LIST, reviews)
 
 
 @router.put("/{review_id}", response_model=Review)
@@ -82,14 +101,15 @@ async def update_review(
     review_id: int,
     review_update: ReviewCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a review."""
 
-    review = db.query(ReviewModel).filter(
+    # The author is serialized with the review; async sessions can't lazy-load it
+    review = await db.scalar(select(ReviewModel).options(selectinload(ReviewModel.user)).where(
         ReviewModel.id == review_id,
         ReviewModel.user_id == current_user.id
-    ).first()
+    ))
 
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
@@ -98,8 +118,7 @@ async def update_review(
     review.title = review_update.title
     review.content = review_update.content
 
-    db.commit()
-    db.refresh(review)
+    await db.commit()
 
     return review
 
@@ -108,17 +127,17 @@ async def update_review(
 async def delete_review(
     review_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a review."""
 
-    review = db.query(ReviewModel).filter(
+    review = await db.scalar(select(ReviewModel).where(
         ReviewModel.id == review_id,
         ReviewModel.user_id == current_user.id
-    ).first()
+    ))
 
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
 
-    db.delete(review)
-    db.commit()
\ No newline at end of file
+    await db.delete(review)
+    await db.commit()
\ No newline at end of file
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database import get_db
+from ..database import get_async_db
 from ..schemas import User, UserUpdate
 from ..models import User as UserModel
 from ..auth import get_current_active_user
@@ -19,7 +19,7 @@ async def get_current_user_profile(current_user: UserModel = Depends(get_current
 async def update_current_user_profile(
     user_update: UserUpdate,
     current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update current user's profile."""
 
@@ -42,8 +42,8 @@ async def update_current_user_profile(
     if user_update.max_distance is not None:
         current_user.max_distance = user_update.max_distance
 
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
 
     return current_user
 
@@ -51,8 +51,8 @@ async def update_current_user_profile(
 @router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_current_user_account(
     current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete current user's account (deactivate)."""
     current_user.is_active = False
-    db.commit()
\ No newline at end of file
+    await db.commit()
\ No newline at end of file
@@ -1,16 +1,22 @@
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
-from enum import Enum
+from enum import Enum, IntEnum
+
+
+# Compiled once by pydantic-core when the schema is built
+EMAIL_PATTERN = r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'
 
 
 class UserBase(BaseModel):
     username: str = Field(..., min_length=3, max_length=50)
-    email: str = Field(..., pattern=r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$')
+    email: str
     full_name: Optional[str] = Field(None, max_length=100)
 
 
 class UserCreate(UserBase):
+    # Checked on the way in only; User responses are built from stored, already-checked rows
+    email: str = Field(..., pattern=EMAIL_PATTERN)
     password: str = Field(..., min_length=6, max_length=50)
 
 
@@ -69,6 +75,21 @@ class Restaurant(RestaurantBase):
     distance: Optional[float] = None  # Calculated field for distance from user
 
 
+class RestaurantSummary(RestaurantBase):
+    """List-view restaurant: what the cards render, without hours or row metadata."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    latitude: float
+    longitude: float
+    google_rating: Optional[float] = None
+    google_rating_count: Optional[int] = None
+    google_photos: List[str] = Field(default_factory=list)
+    avg_rating: float = 0.0
+    rating_count: int = 0
+    distance: Optional[float] = None
+
+
 class RatingBase(BaseModel):
     rating: float = Field(..., ge=1, le=5)
 
@@ -171,6 +192,14 @@ class RestaurantCheckin(BaseModel):
     rating_id: Optional[int] = None
     created_at: datetime
 
+    @field_validator("status", mode="before")
+    @classmethod
+    def status_from_code(cls, value):
+        # The model stores status as a small integer code
+        if isinstance(value, IntEnum):
+            return value.name.lower()
+        return value
+
 
 class DetailedRatingCreate(BaseModel):
     restaurant_id: int
@@ -45,11 +45,7 @@ class BubblePreferenceResponse(BaseModel):
     message: Optional[str] = None
 
 class TasteProfile(BaseModel):
-    """User's computed taste profile"""
-    cuisine_affinities: Dict[str, float]
-    atmosphere_preferences: Dict[str, float]
-    price_sensitivity: Dict[str, float]
-    service_expectations: Dict[str, float]
+    """User's computed taste profile (raw category weights stay on BubblePreference)"""
     dietary_requirements: List[str]
     adventure_level: str
     profile_confidence: float
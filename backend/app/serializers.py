@@ -0,0 +1,25 @@
+from typing import Final, List, Optional, Sequence
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from .schemas import RestaurantCheckin, RestaurantSummary, Review
+
+# Built once at import; each validates ORM rows and encodes the list to JSON
+# bytes in pydantic-core in one pass
+RESTAURANT_LIST: Final = TypeAdapter(List[RestaurantSummary])
+REVIEW_LIST: Final = TypeAdapter(List[Review])
+CHECKIN_LIST: Final = TypeAdapter(List[RestaurantCheckin])
+
+
+def json_list_response(adapter: TypeAdapter, rows, distances: Optional[Sequence[float]] = None) -> Response:
+    """JSON response for a list of ORM rows, bypassing FastAPI's per-item response_model pass.
+
+    distances, parallel to rows, fills each item's distance field on the validated
+    models so the ORM instances are left untouched.
+    """
+    items = adapter.validate_python(rows, from_attributes=True)
+    if distances is not None:
+        for item, distance in zip(items, distances):
+            item.distance = distance
+    return Response(adapter.dump_json(items), media_type="application/json")
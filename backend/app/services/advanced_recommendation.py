@@ -1,17 +1,151 @@
 import numpy as np
 import pandas as pd
+from scipy import sparse
 from sklearn.metrics.pairwise import cosine_similarity
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import Dict, List, Tuple, Optional
 import json
 import logging
+import random
+import time
 from datetime import datetime, timedelta
+import threading
+import redis
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
+from ..config import get_settings
 from ..models import User, Restaurant, Rating, Review, UserPreference
 
 logger = logging.getLogger(__name__)
 
+# Rating-derived user profiles, keyed by (user_id, rating version). The build needs
+# the request's session, so this is a plain LRU rather than functools.lru_cache
+_PROFILE_CACHE: "OrderedDict[Tuple[int, str], Dict]" = OrderedDict()
+_PROFILE_CACHE_SIZE = 10_000
+# Guards every lookup and reorder of _PROFILE_CACHE, which concurrent requests share
+_PROFILE_LOCK = threading.Lock()
+_PROFILE_TTL_SECONDS = 3600
+
+# Personalized match reasons; {cuisine} is filled in per restaurant
+_MATCH_REASONS = (
+    "Popular {cuisine} choice",
+    "Great ratings from similar users",
+    "Matches your preferences",
+    "Trending in your area",
+)
+# Restaurant tags that answer each bubble survey category
+_BUBBLE_FEATURES = {
+    'ambiance': ['casual', 'upscale', 'romantic', 'family_friendly'],
+    'dietary': ['vegetarian_friendly', 'vegan_options', 'gluten_free'],
+    'service_style': ['fast_casual', 'full_service', 'takeout'],
+    'cuisine_specific': ['authentic', 'fusion', 'traditional'],
+    'atmosphere': ['quiet', 'lively', 'outdoor_seating']
+}
+
+# Runs the in-memory part of the social and temporal scorers; no task touches the
+# database, so pool threads never hold a connection
+_SCORER_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="recommendation-scorer")
+
+# random.Random is safe to share across threads, and skips numpy's per-call list conversion
+_reason_rng = random.Random()
+
+
+def _parse_tags(tags) -> frozenset:
+    """Restaurant tags as a set; the column holds a JSON list, a list, or nothing."""
+    if isinstance(tags, str):
+        try:
+            tags = json.loads(tags)
+        except json.JSONDecodeError:
+            return frozenset()
+    if not isinstance(tags, (list, tuple, set, frozenset)):
+        return frozenset()
+    return frozenset(tag for tag in tags if isinstance(tag, str))
+
+
+@lru_cache()
+def _get_redis() -> Optional[redis.Redis]:
+    """Shared Redis client for the profile cache, or None when Redis is unreachable."""
+    try:
+        client = redis.from_url(get_settings().redis_url, decode_responses=True)
+        client.ping()
+        return client
+    except redis.RedisError as e:
+        logger.warning(f"Redis connection failed: {e}. User profiles will only be cached in process.")
+        return None
+
+
+class _RatingsMatrix:
+    """Sparse user x restaurant ratings kept across requests.
+
+    Each refresh reads only ratings created or updated since the previous one and
+    overwrites those entries; deletions don't show up in that delta, so a row-count
+    mismatch falls back to a full reload.
+    """
+
+    # Change timestamps are taken when a write starts, not when it commits, so each
+    # refresh re-reads this far back to catch slow transactions committed since
+    COMMIT_LAG = timedelta(minutes=5)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.matrix = sparse.csr_matrix((0, 0))
+        self.user_rows: Dict[int, int] = {}
+        self.restaurant_cols: Dict[int, int] = {}
+        self.last_change = None
+        self._ids = (pd.Index([]), pd.Index([]))
+
+    def refresh(self, db: Session) -> Tuple[sparse.csr_matrix, pd.Index, pd.Index]:
+        with self._lock:
+            self._apply_changes(db)
+            if self.matrix.nnz != db.scalar(select(func.count()).select_from(Rating)):
+                self._reset()
+                self._apply_changes(db)
+            return (self.matrix, *self._ids)
+
+    def _apply_changes(self, db: Session):
+        changed_at = func.coalesce(Rating.updated_at, Rating.created_at)
+        query = select(Rating.user_id, Rating.restaurant_id, Rating.rating, changed_at)
+        if self.last_change is not None:
+            query = query.where(changed_at >= self.last_change - self.COMMIT_LAG)
+        changes = pd.DataFrame(db.execute(query).all(), columns=['user_id', 'restaurant_id', 'rating', 'changed_at'])
+        if changes.empty:
+            return
+
+        # Extend the id maps for users and restaurants seen for the first time
+        for user_id in changes['user_id'].unique().tolist():
+            self.user_rows.setdefault(user_id, len(self.user_rows))
+        for restaurant_id in changes['restaurant_id'].unique().tolist():
+            self.restaurant_cols.setdefault(restaurant_id, len(self.restaurant_cols))
+        shape = (len(self.user_rows), len(self.restaurant_cols))
+
+        # One rating per user and restaurant, so no entries are summed
+        rows = changes['user_id'].map(self.user_rows).to_numpy()
+        cols = changes['restaurant_id'].map(self.restaurant_cols).to_numpy()
+        delta = sparse.csr_matrix((changes['rating'].to_numpy(dtype=np.float64), (rows, cols)), shape=shape)
+        matrix = self.matrix
+        if matrix.shape != shape:
+            matrix = matrix.tocoo()
+            matrix = sparse.csr_matrix((matrix.data, (matrix.row, matrix.col)), shape=shape)
+
+        # Changed entries replace what was cached; a new matrix, so callers' references stay valid
+        matrix = matrix - matrix.multiply(delta > 0) + delta
+        matrix.eliminate_zeros()
+
+        self.matrix = matrix
+        self.last_change = changes['changed_at'].max()
+        self._ids = (pd.Index(list(self.user_rows)), pd.Index(list(self.restaurant_cols)))
+
+
+_RATINGS_MATRIX = _RatingsMatrix()
+
+
 class AdvancedRecommendationEngine:
     """
     Sophisticated recommendation engine using multiple ML techniques:
@@ -45,11 +179,20 @@ class AdvancedRecommendationEngine:
         restaurants = self._get_restaurant_features()
         user_ratings = self._get_user_ratings_matrix()
 
-        # Calculate different recommendation scores
-        collab_scores = self._collaborative_filtering(user_id, user_ratings)
+        # Every score vector below is aligned to this one restaurant id axis
+        restaurant_ids = restaurants['id'].to_numpy()
+
+        # Calculate different recommendation scores; every query runs here on the request's
+        # session, then the social and temporal aggregation runs on the pool while this
+        # thread does the collaborative and content scores
+        social_ratings = self._similar_user_ratings(user_id)
+        recent_ratings = self._recent_ratings(user_id)
+        social_future = _SCORER_POOL.submit(self._social_proof_scores, social_ratings, restaurants)
+        temporal_future = _SCORER_POOL.submit(self._temporal_scores, recent_ratings, restaurants)
+        collab_scores = self._collaborative_filtering(user_id, user_ratings, restaurant_ids)
         content_scores = self._content_based_filtering(user_profile, restaurants)
-        social_scores = self._social_proof_weighting(user_id, restaurants)
-        temporal_scores = self._apply_temporal_decay(user_id, restaurants)
+        social_scores = social_future.result()
+        temporal_scores = temporal_future.result()
 
         # Hybrid scoring with dynamic weights
         final_scores = self._hybrid_scoring(
@@ -58,12 +201,16 @@ class AdvancedRecommendationEngine:
 
         # Apply location filtering if provided
         if location:
-            final_scores = self._apply_location_filter(final_scores, location, restaurants)
+            final_scores = self._apply_location_filter(
+                final_scores, location, restaurants['latitude'].to_numpy(), restaurants['longitude'].to_numpy()
+            )
 
         # Diversity enhancement
-        final_recommendations = self._enhance_diversity(final_scores, restaurants, limit)
+        final_recommendations = self._enhance_diversity(
+            final_scores, restaurants['cuisine_type'].to_numpy(), restaurants['price_level'].to_numpy(), limit
+        )
 
-        return self._format_recommendations(final_recommendations, user_id)
+        return self._format_recommendations(restaurant_ids[final_recommendations].tolist(), user_id)
 
     def _build_user_profile(self, user_id: int) -> Optional[Dict]:
         """Build comprehensive user profile from ratings and preferences"""
@@ -72,6 +219,62 @@ class AdvancedRecommendationEngine:
         if not user:
             return None
 
+        # Any rating added, changed or removed moves the version; the hour bucket
+        # keeps the recency weighting from drifting in long-lived entries
+        rating_count, last_change = self.db.execute(
+            select(func.count(), func.max(func.coalesce(Rating.updated_at, Rating.created_at)))
+            .where(Rating.user_id == user_id)
+        ).one()
+        if not rating_count:
+            return None
+        version = f"{rating_count}:{last_change}:{int(time.time()) // _PROFILE_TTL_SECONDS}"
+
+        profile = self._get_rating_profile(user_id, version)
+        if profile is None:
+            return None
+
+        # Bubble survey answers change independently of ratings, so they are never cached
+        return {**profile, "bubble_preferences": self._get_bubble_preferences(user_id)}
+
+    def _get_rating_profile(self, user_id: int, version: str) -> Optional[Dict]:
+        """Rating-derived profile, from the process LRU, then Redis, then the database"""
+
+        key = (user_id, version)
+        with _PROFILE_LOCK:
+            if key in _PROFILE_CACHE:
+                _PROFILE_CACHE.move_to_end(key)
+                return _PROFILE_CACHE[key]
+
+        redis_client = _get_redis()
+        redis_key = f"profile:{user_id}:{version}"
+        profile = None
+        if redis_client:
+            try:
+                cached = redis_client.get(redis_key)
+                if cached:
+                    profile = json.loads(cached)
+            except (redis.RedisError, json.JSONDecodeError):
+                pass
+
+        if profile is None:
+            profile = self._compute_rating_profile(user_id)
+            if profile is None:
+                return None
+            if redis_client:
+                try:
+                    redis_client.setex(redis_key, _PROFILE_TTL_SECONDS, json.dumps(profile, default=float))
+                except redis.RedisError:
+                    pass
+
+        with _PROFILE_LOCK:
+            _PROFILE_CACHE[key] = profile
+            if len(_PROFILE_CACHE) > _PROFILE_CACHE_SIZE:
+                _PROFILE_CACHE.popitem(last=False)
+        return profile
+
+    def _compute_rating_profile(self, user_id: int) -> Optional[Dict]:
+        """Profile fields derived from the user's ratings"""
+
         # Get user's ratings with restaurant features
         ratings_query = """
         SELECT r.rating, r.created_at,
@@ -97,9 +300,6 @@ class AdvancedRecommendationEngine:
         # Calculate quality standards (how they rate relative to avg rating)
         quality_standards = self._calculate_quality_standards(ratings_df)
 
-        # Get bubble survey preferences
-        bubble_prefs = self._get_bubble_preferences(user_id)
-
         # Calculate exploration vs exploitation ratio
         exploration_ratio = self._calculate_exploration_ratio(ratings_df)
 
@@ -108,7 +308,6 @@ class AdvancedRecommendationEngine:
             "cuisine_preferences": cuisine_prefs,
             "price_sensitivity": price_sensitivity,
             "quality_standards": quality_standards,
-            "bubble_preferences": bubble_prefs,
             "exploration_ratio": exploration_ratio,
             "total_ratings": len(ratings_df),
             "rating_variance": ratings_df['rating'].var(),
@@ -120,30 +319,29 @@ class AdvancedRecommendationEngine:
 
         # Apply temporal decay (recent ratings weighted more heavily)
         now = datetime.now()
-        ratings_df['days_ago'] = (now - pd.to_datetime(ratings_df['created_at'])).dt.days
-        ratings_df['temporal_weight'] = np.exp(-ratings_df['days_ago'] / 90)  # 90-day half-life
-
-        # Calculate weighted preference scores
-        cuisine_scores = {}
-        for cuisine in ratings_df['cuisine_type'].unique():
-            if pd.isna(cuisine):
-                continue
-
-            cuisine_ratings = ratings_df[ratings_df['cuisine_type'] == cuisine]
+        days_ago = (now - pd.to_datetime(ratings_df['created_at'])).dt.days.to_numpy()
+        temporal_weight = np.exp(-days_ago / 90)  # 90-day half-life
 
-            # Weighted average rating for this cuisine
-            weighted_avg = np.average(
-                cuisine_ratings['rating'],
-                weights=cuisine_ratings['temporal_weight']
-            )
+        # Per-cuisine sums in one bincount pass each; missing cuisines factorize to -1
+        codes, cuisines = pd.factorize(ratings_df['cuisine_type'])
+        known = codes >= 0
+        if not known.any():
+            return {}
+        codes, temporal_weight = codes[known], temporal_weight[known]
+        ratings = ratings_df['rating'].to_numpy(dtype=np.float64)[known]
+        weight_sums = np.bincount(codes, weights=temporal_weight, minlength=len(cuisines))
+        rating_sums = np.bincount(codes, weights=ratings * temporal_weight, minlength=len(cuisines))
+        counts = np.bincount(codes, minlength=len(cuisines))
 
-            # Frequency bonus (trying more places shows preference)
-            frequency_bonus = min(len(cuisine_ratings) / 10, 1.0)
+        # Weighted average rating for each cuisine
+        weighted_avg = rating_sums / weight_sums
 
-            # Final score combines quality and frequency
-            cuisine_scores[cuisine] = (weighted_avg / 5.0) * (1 + frequency_bonus)
+        # Frequency bonus (trying more places shows preference)
+        frequency_bonus = np.minimum(counts / 10, 1.0)
 
-        return cuisine_scores
+        # Final score combines quality and frequency
+        scores = (weighted_avg / 5.0) * (1 + frequency_bonus)
+        return dict(zip(cuisines.tolist(), scores.tolist()))
 
     def _calculate_price_sensitivity(self, ratings_df: pd.DataFrame) -> Dict[str, float]:
         """Calculate user's price sensitivity patterns"""
@@ -198,286 +396,234 @@ class AdvancedRecommendationEngine:
         # Low ratio = creature of habit (sticks to few cuisines)
         return unique_cuisines / total_ratings if total_ratings > 0 else 0
 
-    def _collaborative_filtering(self, user_id: int, ratings_matrix: pd.DataFrame) -> Dict[int, float]:
+    def _collaborative_filtering(
+        self,
+        user_id: int,
+        ratings_matrix: Tuple[sparse.csr_matrix, pd.Index, pd.Index],
+        restaurant_ids: np.ndarray
+    ) -> np.ndarray:
         """Advanced collaborative filtering with user clustering"""
 
-        if ratings_matrix.empty:
-            return {}
-
-        # Create user-item matrix
-        user_item_matrix = ratings_matrix.pivot_table(
-            index='user_id',
-            columns='restaurant_id',
-            values='rating'
-        ).fillna(0)
-
-        if user_id not in user_item_matrix.index:
-            return {}
-
-        # Find similar users using cosine similarity
-        user_similarities = cosine_similarity(user_item_matrix)
-        user_sim_df = pd.DataFrame(
-            user_similarities,
-            index=user_item_matrix.index,
-            columns=user_item_matrix.index
-        )
-
-        similar_users = user_sim_df[user_id].sort_values(ascending=False)[1:21]  # Top 20
-
-        # Get restaurants rated by similar users but not by current user
-        user_ratings = user_item_matrix.loc[user_id]
-        unrated_restaurants = user_ratings[user_ratings == 0].index
-
-        recommendations = {}
-        for restaurant_id in unrated_restaurants:
-            # Calculate weighted average rating from similar users
-            similar_user_ratings = []
-            similarities = []
-
-            for similar_user_id, similarity in similar_users.items():
-                if similarity > 0.1:  # Minimum similarity threshold
-                    rating = user_item_matrix.loc[similar_user_id, restaurant_id]
-                    if rating > 0:
-                        similar_user_ratings.append(rating)
-                        similarities.append(similarity)
-
-            if similar_user_ratings:
-                weighted_rating = np.average(similar_user_ratings, weights=similarities)
-                confidence = len(similar_user_ratings) / 20  # Confidence based on sample size
-                recommendations[restaurant_id] = weighted_rating * confidence
-
+        recommendations = np.zeros(len(restaurant_ids))
+        matrix, user_ids, matrix_restaurant_ids = ratings_matrix
+        if user_id not in user_ids:
+            return recommendations
+
+        # Similarity of the current user to every user, one sparse row against the matrix
+        target = user_ids.get_loc(user_id)
+        target_row = matrix[target]
+        similarities = cosine_similarity(target_row, matrix).ravel()
+        similarities[target] = 0
+
+        # Top 20 similar users above the minimum similarity threshold
+        top = np.argpartition(-similarities, min(20, len(similarities)) - 1)[:20]
+        top = top[similarities[top] > 0.1]
+        if not top.size:
+            return recommendations
+
+        # Weighted average over the similar users who rated each restaurant, as
+        # sparse matrix-vector products instead of a loop per restaurant and user
+        neighbour_ratings = matrix[top]
+        weights = similarities[top]
+        rated = (neighbour_ratings > 0).astype(np.float64)
+        weighted_sum = neighbour_ratings.T @ weights
+        weight_total = rated.T @ weights
+        rater_count = np.asarray(rated.sum(axis=0)).ravel()
+
+        # Restaurants rated by similar users but not by current user
+        candidates = np.flatnonzero((rater_count > 0) & (target_row.toarray().ravel() == 0))
+        confidence = rater_count[candidates] / 20  # Confidence based on sample size
+        column_scores = np.zeros(matrix.shape[1])
+        column_scores[candidates] = weighted_sum[candidates] / weight_total[candidates] * confidence
+
+        # Matrix columns onto the restaurant axis; restaurants nobody rated stay 0
+        columns = matrix_restaurant_ids.get_indexer(restaurant_ids)
+        rated_columns = columns >= 0
+        recommendations[rated_columns] = column_scores[columns[rated_columns]]
         return recommendations
 
-    def _content_based_filtering(self, user_profile: Dict, restaurants: pd.DataFrame) -> Dict[int, float]:
+    def _content_based_filtering(self, user_profile: Dict, restaurants: pd.DataFrame) -> np.ndarray:
         """Content-based filtering using restaurant features"""
 
-        recommendations = {}
         cuisine_prefs = user_profile.get("cuisine_preferences", {})
         price_prefs = user_profile.get("price_sensitivity", {})
         bubble_prefs = user_profile.get("bubble_preferences", {})
 
-        for _, restaurant in restaurants.iterrows():
-            score = 0
+        # Cuisine preference matching
+        recommendations = restaurants['cuisine_type'].map(cuisine_prefs).fillna(0).to_numpy(dtype=np.float64) * 0.4
 
-            # Cuisine preference matching
-            cuisine = restaurant.get('cuisine_type', '')
-            if cuisine in cuisine_prefs:
-                score += cuisine_prefs[cuisine] * 0.4
+        # Price preference matching; profile keys are "price_<level>"
+        price_scores = {int(key.split('_')[1]): pref['preference_score'] for key, pref in price_prefs.items()}
+        recommendations += restaurants['price_level'].map(price_scores).fillna(0).to_numpy(dtype=np.float64) * 0.3
 
-            # Price preference matching
-            price_key = f"price_{restaurant.get('price_level', 2)}"
-            if price_key in price_prefs:
-                score += price_prefs[price_key]['preference_score'] * 0.3
+        # Bubble preference matching, with the survey weights resolved once for all restaurants
+        feature_weights = self._bubble_feature_weights(bubble_prefs) if bubble_prefs else {}
+        if feature_weights and 'tags' in restaurants:
+            bubble_scores = np.fromiter(
+                (self._match_bubble_preferences(_parse_tags(tags), feature_weights) for tags in restaurants['tags']),
+                dtype=np.float64, count=len(restaurants)
+            )
+            recommendations += bubble_scores * 0.3
 
-            # Bubble preference matching
-            if bubble_prefs:
-                score += self._match_bubble_preferences(restaurant, bubble_prefs) * 0.3
+        return recommendations
 
-            recommendations[restaurant['id']] = score
+    def _bubble_feature_weights(self, bubble_prefs: Dict) -> Dict[str, float]:
+        """Weight of each restaurant tag the bubble survey asked for"""
 
-        return recommendations
+        weights = {}
+        for category, preferences in bubble_prefs.items():
+            for feature in _BUBBLE_FEATURES.get(category, []):
+                if feature in preferences:
+                    weights[feature] = preferences[feature].get('weight', 1.0)
+        return weights
 
-    def _match_bubble_preferences(self, restaurant: pd.Series, bubble_prefs: Dict) -> float:
+    def _match_bubble_preferences(self, restaurant_tags: frozenset, feature_weights: Dict[str, float]) -> float:
         """Match restaurant features with bubble survey preferences"""
 
-        match_score = 0
-        total_weight = 0
+        # Only matched features add to the total weight, so any positive match scores 1
+        total_weight = sum(feature_weights[feature] for feature in restaurant_tags & feature_weights.keys())
+        return 1.0 if total_weight > 0 else 0
 
-        # Map bubble preferences to restaurant features
-        feature_mappings = {
-            'ambiance': ['casual', 'upscale', 'romantic', 'family_friendly'],
-            'dietary': ['vegetarian_friendly', 'vegan_options', 'gluten_free'],
-            'service_style': ['fast_casual', 'full_service', 'takeout'],
-            'cuisine_specific': ['authentic', 'fusion', 'traditional'],
-            'atmosphere': ['quiet', 'lively', 'outdoor_seating']
-        }
+    def _similar_user_ratings(self, user_id: int) -> pd.DataFrame:
+        """All ratings from users with similar taste, with each user's similarity"""
 
-        restaurant_tags = restaurant.get('tags', [])
-        if isinstance(restaurant_tags, str):
-            try:
-                restaurant_tags = json.loads(restaurant_tags)
-            except:
-                restaurant_tags = []
+        # Find users with similar taste profiles
+        similar_users = self._find_similar_taste_users(user_id, limit=50)
 
-        for category, preferences in bubble_prefs.items():
-            if category in feature_mappings:
-                category_features = feature_mappings[category]
-                for feature in category_features:
-                    if feature in restaurant_tags and feature in preferences:
-                        weight = preferences[feature].get('weight', 1.0)
-                        match_score += weight
-                        total_weight += weight
+        if not similar_users:
+            return pd.DataFrame(columns=['restaurant_id', 'user_id', 'rating', 'similarity'])
 
-        return match_score / total_weight if total_weight > 0 else 0
+        # All ratings from similar users in one query
+        ratings = pd.DataFrame(
+            self.db.execute(
+                select(Rating.restaurant_id, Rating.user_id, Rating.rating)
+                .where(Rating.user_id.in_(list(similar_users)))
+            ).all(),
+            columns=['restaurant_id', 'user_id', 'rating']
+        )
+        ratings['similarity'] = ratings['user_id'].map(similar_users)
+        return ratings
 
-    def _social_proof_weighting(self, user_id: int, restaurants: pd.DataFrame) -> Dict[int, float]:
-        """Weight ratings based on similar users' opinions"""
+    def _social_proof_scores(self, ratings: pd.DataFrame, restaurants: pd.DataFrame) -> np.ndarray:
+        """Similar users' ratings aggregated per restaurant; no database access"""
 
-        # Find users with similar taste profiles
-        similar_users = self._find_similar_taste_users(user_id, limit=50)
+        ratings = ratings[ratings['restaurant_id'].isin(restaurants['id'])]
+        if ratings.empty:
+            return np.zeros(len(restaurants))
 
-        social_scores = {}
-        for _, restaurant in restaurants.iterrows():
-            restaurant_id = restaurant['id']
-
-            # Get ratings from similar users
-            similar_user_ratings = self.db.execute(
-                """
-                SELECT rating, user_id FROM ratings
-                WHERE restaurant_id = :restaurant_id
-                AND user_id IN :similar_users
-                """,
-                {"restaurant_id": restaurant_id, "similar_users": tuple(similar_users)}
-            ).fetchall()
-
-            if similar_user_ratings:
-                # Weight ratings by user similarity
-                weighted_ratings = []
-                for rating, rating_user_id in similar_user_ratings:
-                    similarity = similar_users.get(rating_user_id, 0)
-                    weighted_ratings.append(rating * similarity)
-
-                avg_weighted_rating = np.mean(weighted_ratings)
-                confidence = len(similar_user_ratings) / 10  # Confidence based on sample size
-
-                social_scores[restaurant_id] = (avg_weighted_rating / 5.0) * confidence
-            else:
-                social_scores[restaurant_id] = 0
-
-        return social_scores
+        # Weight ratings by user similarity
+        ratings = ratings.assign(weighted=ratings['rating'] * ratings['similarity'])
+        per_restaurant = ratings.groupby('restaurant_id').agg(
+            avg_weighted_rating=('weighted', 'mean'), count=('rating', 'size')
+        )
+        confidence = per_restaurant['count'] / 10  # Confidence based on sample size
+        scores = (per_restaurant['avg_weighted_rating'] / 5.0) * confidence
+
+        return scores.reindex(restaurants['id'], fill_value=0).to_numpy(dtype=np.float64)
 
     def _find_similar_taste_users(self, user_id: int, limit: int = 50) -> Dict[int, float]:
         """Find users with similar taste profiles"""
 
         # Get user's rating patterns
         user_ratings = self.db.execute(
-            """
-            SELECT restaurant_id, rating FROM ratings
-            WHERE user_id = :user_id
-            """,
-            {"user_id": user_id}
-        ).fetchall()
+            select(Rating.restaurant_id, Rating.rating).where(Rating.user_id == user_id)
+        ).all()
 
         if not user_ratings:
             return {}
 
-        user_restaurants = {r[0]: r[1] for r in user_ratings}
-
-        # Find other users who rated the same restaurants
-        other_users_query = """
-        SELECT DISTINCT user_id FROM ratings
-        WHERE restaurant_id IN :restaurant_ids
-        AND user_id != :user_id
-        """
+        user_restaurants = dict(user_ratings)
+
+        # Every other user's ratings for the same restaurants, in one query
+        other_ratings = pd.DataFrame(
+            self.db.execute(
+                select(Rating.user_id, Rating.restaurant_id, Rating.rating).where(
+                    Rating.restaurant_id.in_(list(user_restaurants)),
+                    Rating.user_id != user_id
+                )
+            ).all(),
+            columns=['user_id', 'restaurant_id', 'rating']
+        )
 
-        other_users = self.db.execute(
-            other_users_query,
-            {
-                "restaurant_ids": tuple(user_restaurants.keys()),
-                "user_id": user_id
-            }
-        ).fetchall()
-
-        similarities = {}
-        for (other_user_id,) in other_users:
-            # Get other user's ratings for common restaurants
-            other_ratings = self.db.execute(
-                """
-                SELECT restaurant_id, rating FROM ratings
-                WHERE user_id = :other_user_id
-                AND restaurant_id IN :restaurant_ids
-                """,
-                {
-                    "other_user_id": other_user_id,
-                    "restaurant_ids": tuple(user_restaurants.keys())
-                }
-            ).fetchall()
+        if other_ratings.empty:
+            return {}
 
-            # Calculate cosine similarity
-            common_restaurants = []
-            user_vector = []
-            other_vector = []
+        # Other users x the current user's restaurants
+        user_index, other_user_ids = pd.factorize(other_ratings['user_id'])
+        restaurant_index = pd.Index(list(user_restaurants)).get_indexer(other_ratings['restaurant_id'])
+        matrix = sparse.csr_matrix(
+            (other_ratings['rating'].to_numpy(dtype=np.float64), (user_index, restaurant_index)),
+            shape=(len(other_user_ids), len(user_restaurants))
+        )
+        rated = (matrix > 0).astype(np.float64)
+        user_vector = np.fromiter(user_restaurants.values(), dtype=np.float64, count=len(user_restaurants))
 
-            for restaurant_id, rating in other_ratings:
-                if restaurant_id in user_restaurants:
-                    common_restaurants.append(restaurant_id)
-                    user_vector.append(user_restaurants[restaurant_id])
-                    other_vector.append(rating)
+        # Cosine similarity over the restaurants both users rated, for all users at once
+        common_count = np.asarray(rated.sum(axis=1)).ravel()
+        dot = matrix @ user_vector
+        user_norm = np.sqrt(rated @ user_vector ** 2)
+        other_norm = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        similarity = dot / (user_norm * other_norm)
 
-            if len(common_restaurants) >= 3:  # Minimum overlap
-                similarity = cosine_similarity([user_vector], [other_vector])[0][0]
-                if similarity > 0.3:  # Minimum similarity threshold
-                    similarities[other_user_id] = similarity
+        # Minimum overlap and similarity threshold
+        candidates = np.flatnonzero((common_count >= 3) & (similarity > 0.3))
 
         # Return top similar users
-        return dict(sorted(similarities.items(), key=lambda x: x[1], reverse=True)[:limit])
+        top = candidates[np.argsort(-similarity[candidates], kind='stable')[:limit]]
+        return dict(zip(other_user_ids[top].tolist(), similarity[top].tolist()))
 
-    def _apply_temporal_decay(self, user_id: int, restaurants: pd.DataFrame) -> Dict[int, float]:
-        """Apply temporal decay to user preferences"""
+    def _recent_ratings(self, user_id: int) -> pd.DataFrame:
+        """The user's ratings from the last six months, with each restaurant's cuisine and price"""
 
-        temporal_scores = {}
         cutoff_date = datetime.now() - timedelta(days=180)  # 6 months
 
         # Get recent ratings to understand current preferences
         recent_ratings = self.db.execute(
-            """
-            SELECT r.restaurant_id, r.rating, r.created_at,
-                   rest.cuisine_type, rest.price_level
-            FROM ratings r
-            JOIN restaurants rest ON r.restaurant_id = rest.id
-            WHERE r.user_id = :user_id
-            AND r.created_at > :cutoff_date
-            ORDER BY r.created_at DESC
-            """,
-            {"user_id": user_id, "cutoff_date": cutoff_date}
-        ).fetchall()
-
-        if not recent_ratings:
-            return {r['id']: 0 for _, r in restaurants.iterrows()}
-
-        # Calculate current preference trends
-        recent_cuisines = {}
-        recent_price_prefs = {}
-
-        for restaurant_id, rating, created_at, cuisine, price_level in recent_ratings:
-            days_ago = (datetime.now() - created_at).days
-            decay_factor = np.exp(-days_ago / 30)  # 30-day half-life
+            select(
+                Rating.restaurant_id, Rating.rating, Rating.created_at,
+                Restaurant.cuisine_type, Restaurant.price_level
+            )
+            .join(Restaurant, Rating.restaurant_id == Restaurant.id)
+            .where(Rating.user_id == user_id, Rating.created_at > cutoff_date)
+            .order_by(Rating.created_at.desc())
+        ).all()
 
-            if cuisine:
-                if cuisine not in recent_cuisines:
-                    recent_cuisines[cuisine] = []
-                recent_cuisines[cuisine].append(rating * decay_factor)
+        return pd.DataFrame(
+            recent_ratings, columns=['restaurant_id', 'rating', 'created_at', 'cuisine_type', 'price_level']
+        )
 
-            if price_level not in recent_price_prefs:
-                recent_price_prefs[price_level] = []
-            recent_price_prefs[price_level].append(rating * decay_factor)
+    def _temporal_scores(self, recent: pd.DataFrame, restaurants: pd.DataFrame) -> np.ndarray:
+        """Decayed recent preference trends scored for every restaurant; no database access"""
 
-        # Calculate temporal preference scores
-        for _, restaurant in restaurants.iterrows():
-            score = 0
+        if recent.empty:
+            return np.zeros(len(restaurants))
 
+        # Calculate current preference trends
+        recent = recent.copy()
+        days_ago = (datetime.now() - pd.to_datetime(recent['created_at'])).dt.days
+        recent['decayed_rating'] = recent['rating'] * np.exp(-days_ago / 30)  # 30-day half-life
+        has_cuisine = recent['cuisine_type'].fillna('') != ''
+        recent_cuisines = recent[has_cuisine].groupby('cuisine_type')['decayed_rating'].mean()
+        recent_price_prefs = recent.groupby('price_level')['decayed_rating'].mean()
+
+        # Calculate temporal preference scores for all restaurants at once
+        temporal_scores = (
             # Cuisine trend matching
-            if restaurant['cuisine_type'] in recent_cuisines:
-                avg_recent_rating = np.mean(recent_cuisines[restaurant['cuisine_type']])
-                score += (avg_recent_rating / 5.0) * 0.6
-
+            (restaurants['cuisine_type'].map(recent_cuisines).fillna(0) / 5.0) * 0.6 +
             # Price trend matching
-            if restaurant['price_level'] in recent_price_prefs:
-                avg_recent_rating = np.mean(recent_price_prefs[restaurant['price_level']])
-                score += (avg_recent_rating / 5.0) * 0.4
-
-            temporal_scores[restaurant['id']] = score
+            (restaurants['price_level'].map(recent_price_prefs).fillna(0) / 5.0) * 0.4
+        )
 
-        return temporal_scores
+        return temporal_scores.to_numpy(dtype=np.float64)
 
     def _hybrid_scoring(
         self,
-        collab_scores: Dict,
-        content_scores: Dict,
-        social_scores: Dict,
-        temporal_scores: Dict,
+        collab_scores: np.ndarray,
+        content_scores: np.ndarray,
+        social_scores: np.ndarray,
+        temporal_scores: np.ndarray,
         user_profile: Dict
-    ) -> Dict[int, float]:
+    ) -> np.ndarray:
         """Combine different scoring methods with dynamic weights"""
 
         # Dynamic weight calculation based on user profile
@@ -503,55 +649,51 @@ class AdvancedRecommendationEngine:
             social_weight = 0.2
             temporal_weight = 0.1
 
-        # Get all restaurant IDs
-        all_restaurant_ids = set()
-        for scores in [collab_scores, content_scores, social_scores, temporal_scores]:
-            all_restaurant_ids.update(scores.keys())
-
-        final_scores = {}
-        for restaurant_id in all_restaurant_ids:
-            score = (
-                collab_scores.get(restaurant_id, 0) * collab_weight +
-                content_scores.get(restaurant_id, 0) * content_weight +
-                social_scores.get(restaurant_id, 0) * social_weight +
-                temporal_scores.get(restaurant_id, 0) * temporal_weight
-            )
-            final_scores[restaurant_id] = score
-
-        return final_scores
+        # All four vectors share the restaurant axis, so this is one vector expression
+        return (
+            collab_scores * collab_weight +
+            content_scores * content_weight +
+            social_scores * social_weight +
+            temporal_scores * temporal_weight
+        )
 
-    def _enhance_diversity(self, scores: Dict[int, float], restaurants: pd.DataFrame, limit: int) -> List[int]:
-        """Enhance diversity in recommendations while maintaining relevance"""
+    def _enhance_diversity(
+        self,
+        scores: np.ndarray,
+        cuisines: np.ndarray,
+        price_levels: np.ndarray,
+        limit: int
+    ) -> List[int]:
+        """Enhance diversity in recommendations while maintaining relevance; returns positions on the restaurant axis"""
 
         # Sort by score
-        sorted_restaurants = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        sorted_positions = np.argsort(-scores, kind='stable')
+
+        # Diversity constraints
+        cuisine_limit = max(2, limit // 4)  # Max 2-3 per cuisine type
+        price_limit = max(2, limit // 3)   # Max 2-4 per price level
 
         selected = []
-        selected_cuisines = set()
-        selected_price_levels = set()
+        cuisine_counts = Counter()
+        price_counts = Counter()
 
         # First, select top candidates ensuring diversity
-        for restaurant_id, score in sorted_restaurants:
+        for position in sorted_positions.tolist():
             if len(selected) >= limit:
                 break
 
-            restaurant = restaurants[restaurants['id'] == restaurant_id].iloc[0]
-            cuisine = restaurant.get('cuisine_type', '')
-            price_level = restaurant.get('price_level', 2)
-
-            # Diversity constraints
-            cuisine_limit = max(2, limit // 4)  # Max 2-3 per cuisine type
-            price_limit = max(2, limit // 3)   # Max 2-4 per price level
+            # Missing values never count toward a limit
+            cuisine = cuisines[position]
+            price_level = price_levels[position]
+            cuisine_key = None if pd.isna(cuisine) else cuisine
+            price_key = None if pd.isna(price_level) else price_level
 
-            cuisine_count = sum(1 for r_id in selected
-                               if restaurants[restaurants['id'] == r_id].iloc[0].get('cuisine_type') == cuisine)
-            price_count = sum(1 for r_id in selected
-                             if restaurants[restaurants['id'] == r_id].iloc[0].get('price_level') == price_level)
-
-            if cuisine_count < cuisine_limit and price_count < price_limit:
-                selected.append(restaurant_id)
-                selected_cuisines.add(cuisine)
-                selected_price_levels.add(price_level)
+            if cuisine_counts[cuisine_key] < cuisine_limit and price_counts[price_key] < price_limit:
+                selected.append(position)
+                if cuisine_key is not None:
+                    cuisine_counts[cuisine_key] += 1
+                if price_key is not None:
+                    price_counts[price_key] += 1
 
         return selected
 
@@ -567,44 +709,37 @@ class AdvancedRecommendationEngine:
 
         return pd.read_sql(query, self.db.bind)
 
-    def _get_user_ratings_matrix(self) -> pd.DataFrame:
-        """Get user ratings matrix"""
+    def _get_user_ratings_matrix(self) -> Tuple[sparse.csr_matrix, pd.Index, pd.Index]:
+        """Get the sparse user x restaurant ratings matrix with its row (user) and column (restaurant) ids"""
 
-        query = """
-        SELECT user_id, restaurant_id, rating, created_at
-        FROM ratings
-        ORDER BY created_at DESC
-        """
-
-        return pd.read_sql(query, self.db.bind)
+        return _RATINGS_MATRIX.refresh(self.db)
 
-    def _apply_location_filter(self, scores: Dict[int, float], location: Tuple[float, float], restaurants: pd.DataFrame) -> Dict[int, float]:
+    def _apply_location_filter(
+        self,
+        scores: np.ndarray,
+        location: Tuple[float, float],
+        latitudes: np.ndarray,
+        longitudes: np.ndarray
+    ) -> np.ndarray:
         """Apply location-based filtering and boost nearby restaurants"""
 
         lat, lng = location
-        filtered_scores = {}
-
-        for restaurant_id, score in scores.items():
-            restaurant = restaurants[restaurants['id'] == restaurant_id].iloc[0]
-            r_lat = restaurant.get('latitude', 0)
-            r_lng = restaurant.get('longitude', 0)
-
-            # Calculate distance (simplified)
-            distance = np.sqrt((lat - r_lat) ** 2 + (lng - r_lng) ** 2)
 
-            # Distance penalty/boost
-            if distance < 0.01:  # Very close (~1km)
-                location_boost = 1.2
-            elif distance < 0.05:  # Moderate distance (~5km)
-                location_boost = 1.0
-            elif distance < 0.1:   # Far but acceptable (~10km)
-                location_boost = 0.8
-            else:  # Too far
-                location_boost = 0.3
-
-            filtered_scores[restaurant_id] = score * location_boost
+        # Calculate distance (simplified), for all restaurants at once
+        distance = np.sqrt((lat - latitudes) ** 2 + (lng - longitudes) ** 2)
+
+        # Distance penalty/boost
+        location_boost = np.select(
+            [
+                distance < 0.01,  # Very close (~1km)
+                distance < 0.05,  # Moderate distance (~5km)
+                distance < 0.1,   # Far but acceptable (~10km)
+            ],
+            [1.2, 1.0, 0.8],
+            default=0.3  # Too far
+        )
 
-        return filtered_scores
+        return scores * location_boost
 
     def _cold_start_recommendations(self, limit: int, location: Optional[Tuple[float, float]] = None) -> List[Dict]:
         """Recommendations for new users (cold start)"""
@@ -679,11 +814,4 @@ class AdvancedRecommendationEngine:
             return f"Highly rated {restaurant['cuisine_type']} restaurant"
 
         # This would use the user profile to generate personalized reasons
-        reasons = [
-            f"Popular {restaurant['cuisine_type']} choice",
-            f"Great ratings from similar users",
-            f"Matches your preferences",
-            f"Trending in your area"
-        ]
-
-        return np.random.choice(reasons)
\ No newline at end of file
+        return _reason_rng.choice(_MATCH_REASONS).format(cuisine=restaurant['cuisine_type'])
\ No newline at end of file
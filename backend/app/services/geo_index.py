@@ -0,0 +1,76 @@
+"""
+In-process coordinate index of active restaurants for nearest-neighbour lookups.
+"""
+
+import asyncio
+import time
+from typing import Final, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..geo import calculate_distance_precomputed
+from ..models import Restaurant
+
+# Restaurants change rarely; rebuild at most this often, or sooner when invalidated
+_REFRESH_SECONDS: Final = 60
+
+
+class GeoIndex:
+    """Contiguous id/radian/cosine arrays for every active restaurant.
+
+    Built from one narrow SELECT and shared by the worker's requests, so a
+    nearby lookup is a vectorized haversine with no database scan. Each worker
+    keeps its own copy; invalidate() only affects the current process, the
+    refresh interval bounds staleness elsewhere.
+    """
+
+    def __init__(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.lat_rads = np.empty(0, dtype=np.float64)
+        self.lng_rads = np.empty(0, dtype=np.float64)
+        self.cos_lats = np.empty(0, dtype=np.float64)
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    def _is_fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < _REFRESH_SECONDS
+
+    async def refresh_if_stale(self, db: AsyncSession) -> None:
+        if self._is_fresh():
+            return
+        # One request rebuilds; the others wait for it rather than all scanning at once
+        async with self._lock:
+            if self._is_fresh():
+                return
+            rows = (await db.execute(
+                select(Restaurant.id, Restaurant.lat_rad, Restaurant.lng_rad, Restaurant.cos_lat).where(
+                    Restaurant.is_active == True,
+                    Restaurant.lat_rad.is_not(None)
+                )
+            )).all()
+            columns = np.array(rows, dtype=np.float64).reshape(-1, 4).T
+            self.ids = columns[0].astype(np.int64)
+            self.lat_rads, self.lng_rads, self.cos_lats = (np.ascontiguousarray(c) for c in columns[1:])
+            self._loaded_at = time.monotonic()
+
+    async def nearest(
+        self, db: AsyncSession, lat: float, lng: float, radius_km: float, limit: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(ids, km) of up to limit restaurants within radius_km, nearest first."""
+        await self.refresh_if_stale(db)
+        km = calculate_distance_precomputed(lat, lng, self.lat_rads, self.lng_rads, self.cos_lats) / 1000
+        in_range = np.flatnonzero(km <= radius_km)
+        if len(in_range) > limit:
+            # Partial selection of the closest, then sort only those
+            in_range = in_range[np.argpartition(km[in_range], limit - 1)[:limit]]
+        order = in_range[np.argsort(km[in_range], kind="stable")]
+        return self.ids[order], km[order]
+
+
+# Global instance
+geo_index = GeoIndex()
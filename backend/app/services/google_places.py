@@ -1,13 +1,18 @@
-import requests
+import asyncio
+import httpx
 import logging
+import threading
 import time
 import json
+from functools import lru_cache
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from sqlalchemy.orm import Session
 from ..config import get_settings
 from ..models import Restaurant
 from ..database import get_db
+from .geo_index import geo_index
+from .search_intelligence import clear_search_terms_cache
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -19,14 +24,31 @@ class GooglePlacesService:
     # Free tier limits: 1000 requests per day, max 10 per second
     DAILY_REQUEST_LIMIT = 1000
     RATE_LIMIT_PER_SECOND = 10
+    MAX_CONCURRENT_REQUESTS = 16
+    MAX_NEW_PER_DISCOVERY = 50
 
     def __init__(self):
         self.api_key = settings.google_places_api_key
         self.request_count = 0
         self.last_request_time = 0
+        self.requests_date = datetime.now().strftime('%Y-%m-%d')
         self.daily_requests = self._load_daily_requests()
+        # One instance serves every request (see get_google_places), so keep
+        # connections alive and guard the shared usage counter
+        self.client = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=20)
+        )
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._throttle_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+
+    async def aclose(self):
+        """Close pooled HTTP connections."""
+        await self.client.aclose()
 
-    def search_restaurants(
+    async def search_restaurants(
         self,
         lat: float = settings.chapel_hill_lat,
         lng: float = settings.chapel_hill_lng,
@@ -47,10 +69,10 @@ class GooglePlacesService:
             "key": self.api_key
         }
 
-        data = self._make_api_request(url, params)
+        data = await self._make_api_request(url, params)
         return data.get("results", []) if data else []
 
-    def get_place_details(self, place_id: str) -> Optional[Dict[str, Any]]:
+    async def get_place_details(self, place_id: str) -> Optional[Dict[str, Any]]:
         """Get detailed information about a specific place."""
         if not self.api_key:
             logger.warning("Google Places API key not configured")
@@ -63,7 +85,7 @@ class GooglePlacesService:
             "key": self.api_key
         }
 
-        data = self._make_api_request(url, params)
+        data = await self._make_api_request(url, params)
         return data.get("result") if data else None
 
     def parse_restaurant_data(self, place_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -148,7 +170,7 @@ class GooglePlacesService:
     def _load_daily_requests(self) -> int:
         """Load today's request count from persistent storage."""
         try:
-            today = datetime.now().strftime('%Y-%m-%d')
+            today = self.requests_date
             # Use current directory for Windows compatibility
             cache_file = f'google_places_requests_{today}.json'
             try:
@@ -163,54 +185,85 @@ class GooglePlacesService:
     def _save_daily_requests(self):
         """Save today's request count to persistent storage."""
         try:
-            today = datetime.now().strftime('%Y-%m-%d')
-            # Use current directory for Windows compatibility
-            cache_file = f'google_places_requests_{today}.json'
-            with open(cache_file, 'w') as f:
-                json.dump({'count': self.daily_requests, 'date': today}, f)
+            # Writes run on worker threads; serialise them so the latest count lands last
+            with self._save_lock:
+                with self._lock:
+                    count, today = self.daily_requests, self.requests_date
+                # Use current directory for Windows compatibility
+                cache_file = f'google_places_requests_{today}.json'
+                with open(cache_file, 'w') as f:
+                    json.dump({'count': count, 'date': today}, f)
         except Exception as e:
             logger.error(f"Failed to save request count: {e}")
 
-    def _check_rate_limits(self) -> bool:
-        """Check if we can make another API request within rate limits."""
-        # Check daily limit
-        if self.daily_requests >= self.DAILY_REQUEST_LIMIT:
-            logger.warning(f"Daily API limit reached ({self.DAILY_REQUEST_LIMIT})")
-            return False
-
-        # Check per-second rate limit
-        current_time = time.time()
-        if current_time - self.last_request_time < (1.0 / self.RATE_LIMIT_PER_SECOND):
-            time.sleep(0.1)  # Brief pause to respect rate limiting
-
-        return True
+    def _reserve_request(self) -> Optional[str]:
+        """Claim one request from today's quota; returns the day charged, or None at the daily limit."""
+        today = datetime.now().strftime('%Y-%m-%d')
+        # Check and increment in one step, so concurrent requests cannot all pass the
+        # check before any of them counts
+        with self._lock:
+            # The instance outlives the day; start a fresh count at midnight
+            if today != self.requests_date:
+                self.requests_date = today
+                self.daily_requests = self._load_daily_requests()
+
+            if self.daily_requests >= self.DAILY_REQUEST_LIMIT:
+                logger.warning(f"Daily API limit reached ({self.DAILY_REQUEST_LIMIT})")
+                return None
 
-    def _make_api_request(self, url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            self.daily_requests += 1
+            return today
+
+    def _refund_request(self, day: str):
+        """Give back a reserved request that got no successful response."""
+        with self._lock:
+            # A reservation from before midnight belongs to the old day's count
+            if day == self.requests_date:
+                self.daily_requests -= 1
+
+    async def _wait_for_request_slot(self):
+        """Space out request starts to respect the per-second rate limit."""
+        async with self._throttle_lock:
+            delay = self.last_request_time + 1.0 / self.RATE_LIMIT_PER_SECOND - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.last_request_time = time.monotonic()
+
+    async def _make_api_request(self, url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Make API request with rate limiting and error handling."""
-        if not self._check_rate_limits():
+        day = self._reserve_request()
+        if day is None:
             return None
 
+        succeeded = False
         try:
-            response = requests.get(url, params=params, timeout=10)
+            async with self._semaphore:
+                await self._wait_for_request_slot()
+                response = await self.client.get(url, params=params)
             response.raise_for_status()
+            succeeded = True
 
-            self.daily_requests += 1
-            self.last_request_time = time.time()
-            self._save_daily_requests()
+        except httpx.HTTPError as e:
+            logger.error(f"Request to Google Places API failed: {e}")
+            return None
 
-            data = response.json()
+        finally:
+            # Only successful responses count against the quota; errors and cancellation
+            # give the slot back
+            if not succeeded:
+                self._refund_request(day)
 
-            if data.get("status") not in ["OK", "ZERO_RESULTS"]:
-                logger.error(f"Google Places API error: {data.get('error_message', 'Unknown error')}")
-                return None
+        await asyncio.to_thread(self._save_daily_requests)
 
-            return data
+        data = response.json()
 
-        except requests.RequestException as e:
-            logger.error(f"Request to Google Places API failed: {e}")
+        if data.get("status") not in ["OK", "ZERO_RESULTS"]:
+            logger.error(f"Google Places API error: {data.get('error_message', 'Unknown error')}")
             return None
 
-    def batch_update_restaurant_data(self, db: Session, limit: int = 50) -> Dict[str, Any]:
+        return data
+
+    async def batch_update_restaurant_data(self, db: Session, limit: int = 50) -> Dict[str, Any]:
         """
         Batch update restaurant data from Google Places API within free tier limits.
         Prioritizes restaurants with missing data or old data.
@@ -219,70 +272,77 @@ class GooglePlacesService:
             logger.warning("Google Places API key not configured")
             return {"updated": 0, "errors": 0, "message": "API key not configured"}
 
-        # Get restaurants that need updates (prioritize missing photos/data)
-        restaurants = db.query(Restaurant).filter(
-            (Restaurant.google_place_id.is_(None)) |
-            (Restaurant.google_photos == []) |
-            (Restaurant.last_google_update.is_(None)) |
-            (Restaurant.last_google_update < datetime.utcnow() - timedelta(days=7))
-        ).limit(min(limit, self.DAILY_REQUEST_LIMIT - self.daily_requests)).all()
+        # Get restaurants that need updates (prioritize missing photos/data); the
+        # session is synchronous, so its work runs off the event loop
+        restaurants = await asyncio.to_thread(
+            lambda: db.query(Restaurant).filter(
+                (Restaurant.google_place_id.is_(None)) |
+                (Restaurant.google_photos == []) |
+                (Restaurant.last_google_update.is_(None)) |
+                (Restaurant.last_google_update < datetime.utcnow() - timedelta(days=7))
+            ).limit(max(0, min(limit, self.DAILY_REQUEST_LIMIT - self.daily_requests))).all()
+        )
+
+        async def fetch(restaurant: Restaurant):
+            """Place ID and details for one restaurant; no DB access, so these run concurrently."""
+            place_id = restaurant.google_place_id
+            if not place_id:
+                # Search for restaurant if no place_id
+                search_result = await self._search_specific_restaurant(
+                    restaurant.name,
+                    restaurant.latitude,
+                    restaurant.longitude
+                )
+                place_id = search_result.get("place_id") if search_result else None
+                if not place_id:
+                    return None, None
+            return place_id, await self.get_place_details(place_id)
+
+        results = await asyncio.gather(*(fetch(r) for r in restaurants), return_exceptions=True)
 
+        updated_count, error_count = await asyncio.to_thread(self._apply_updates, db, restaurants, results)
+
+        return {
+            "updated": updated_count,
+            "errors": error_count,
+            "remaining_requests": self.DAILY_REQUEST_LIMIT - self.daily_requests,
+            "message": f"Updated {updated_count} restaurants, {error_count} errors"
+        }
+
+    def _apply_updates(self, db: Session, restaurants: List[Restaurant], results: List[Any]) -> Tuple[int, int]:
+        """Write fetched Google data to each restaurant, committing one at a time; returns (updated, errors)."""
         updated_count = 0
         error_count = 0
 
-        for restaurant in restaurants:
+        for restaurant, result in zip(restaurants, results):
             try:
-                if not self._check_rate_limits():
-                    break
+                if isinstance(result, Exception):
+                    raise result
+
+                place_id, place_details = result
+                if not place_id:
+                    logger.warning(f"Could not find Google Place ID for {restaurant.name}")
+                    error_count += 1
+                    continue
 
-                # Search for restaurant if no place_id
                 if not restaurant.google_place_id:
-                    search_result = self._search_specific_restaurant(
-                        restaurant.name,
-                        restaurant.latitude,
-                        restaurant.longitude
-                    )
-
-                    if search_result and search_result.get("place_id"):
-                        place_id = search_result["place_id"]
-
-                        # Check if this place_id is already assigned to another restaurant
-                        existing_restaurant = db.query(Restaurant).filter(
-                            Restaurant.google_place_id == place_id,
-                            Restaurant.id != restaurant.id
-                        ).first()
-
-                        if existing_restaurant:
-                            logger.warning(f"Google Place ID {place_id} already assigned to {existing_restaurant.name}, skipping {restaurant.name}")
-                            error_count += 1
-                            continue
-
-                        restaurant.google_place_id = place_id
-                    else:
-                        logger.warning(f"Could not find Google Place ID for {restaurant.name}")
+                    # Check if this place_id is already assigned to another restaurant
+                    existing_restaurant = db.query(Restaurant).filter(
+                        Restaurant.google_place_id == place_id,
+                        Restaurant.id != restaurant.id
+                    ).first()
+
+                    if existing_restaurant:
+                        logger.warning(f"Google Place ID {place_id} already assigned to {existing_restaurant.name}, skipping {restaurant.name}")
                         error_count += 1
                         continue
 
-                # Get detailed place data
-                place_details = self.get_place_details(restaurant.google_place_id)
+                    restaurant.google_place_id = place_id
 
                 if place_details:
                     # Update restaurant with fresh data
                     parsed_data = self.parse_restaurant_data(place_details)
 
-                    # Ensure google_place_id is set
-                    if not restaurant.google_place_id and parsed_data.get("google_place_id"):
-                        place_id = parsed_data.get("google_place_id")
-
-                        # Check if this place_id is already assigned to another restaurant
-                        existing_restaurant = db.query(Restaurant).filter(
-                            Restaurant.google_place_id == place_id,
-                            Restaurant.id != restaurant.id
-                        ).first()
-
-                        if not existing_restaurant:
-                            restaurant.google_place_id = place_id
-
                     restaurant.google_rating = parsed_data.get("google_rating")
                     restaurant.google_rating_count = parsed_data.get("google_rating_count")
                     restaurant.google_photos = parsed_data.get("google_photos", [])
@@ -296,9 +356,6 @@ class GooglePlacesService:
                 else:
                     error_count += 1
 
-                # Small delay to be respectful to the API
-                time.sleep(0.1)
-
                 # Commit individually to handle constraint errors gracefully
                 try:
                     db.commit()
@@ -312,14 +369,9 @@ class GooglePlacesService:
                 db.rollback()
                 error_count += 1
 
-        return {
-            "updated": updated_count,
-            "errors": error_count,
-            "remaining_requests": self.DAILY_REQUEST_LIMIT - self.daily_requests,
-            "message": f"Updated {updated_count} restaurants, {error_count} errors"
-        }
+        return updated_count, error_count
 
-    def _search_specific_restaurant(self, name: str, lat: float, lng: float) -> Optional[Dict[str, Any]]:
+    async def _search_specific_restaurant(self, name: str, lat: float, lng: float) -> Optional[Dict[str, Any]]:
         """Search for a specific restaurant by name and location."""
         # First try text search for better name matching
         text_search_url = f"{self.BASE_URL}/textsearch/json"
@@ -331,7 +383,7 @@ class GooglePlacesService:
             "key": self.api_key
         }
 
-        data = self._make_api_request(text_search_url, params)
+        data = await self._make_api_request(text_search_url, params)
 
         if data and data.get("results"):
             # Look for name matches
@@ -362,7 +414,7 @@ class GooglePlacesService:
             "key": self.api_key
         }
 
-        data = self._make_api_request(nearby_url, params)
+        data = await self._make_api_request(nearby_url, params)
 
         if data and data.get("results"):
             # Return the first result
@@ -370,7 +422,7 @@ class GooglePlacesService:
 
         return None
 
-    def discover_new_restaurants(self, db: Session,
+    async def discover_new_restaurants(self, db: Session,
                                 lat: float = settings.chapel_hill_lat,
                                 lng: float = settings.chapel_hill_lng,
                                 radius: int = 2000) -> Dict[str, Any]:
@@ -405,74 +457,41 @@ class GooglePlacesService:
             "deli"
         ]
 
-        added_count = 0
-        existing_place_ids = set(
-            db.query(Restaurant.google_place_id)
-            .filter(Restaurant.google_place_id.is_not(None))
-            .all()
+        existing_place_ids = await asyncio.to_thread(
+            lambda: {
+                pid for (pid,) in db.query(Restaurant.google_place_id)
+                .filter(Restaurant.google_place_id.is_not(None))
+            }
         )
-        existing_place_ids = {pid[0] for pid in existing_place_ids}
 
+        # Search term by term, stopping once there are enough new places so
+        # unneeded searches don't spend the daily quota
+        new_place_ids = []
         for search_term in search_terms:
-            if not self._check_rate_limits():
+            if len(new_place_ids) >= self.MAX_NEW_PER_DISCOVERY or not self._check_rate_limits():
                 break
 
-            restaurants = self.search_restaurants(lat, lng, radius, search_term)
-
-            for restaurant_data in restaurants:
+            for restaurant_data in await self.search_restaurants(lat, lng, radius, search_term):
                 place_id = restaurant_data.get("place_id")
 
                 # Skip if we already have this restaurant
-                if place_id in existing_place_ids:
+                if not place_id or place_id in existing_place_ids:
                     continue
 
-                try:
-                    # Get detailed information
-                    if not self._check_rate_limits():
-                        break
-
-                    place_details = self.get_place_details(place_id)
-
-                    if place_details:
-                        parsed_data = self.parse_restaurant_data(place_details)
-
-                        # Create new restaurant record
-                        new_restaurant = Restaurant(
-                            google_place_id=parsed_data["google_place_id"],
-                            name=parsed_data["name"],
-                            address=parsed_data["address"],
-                            phone=parsed_data.get("phone"),
-                            website=parsed_data.get("website"),
-                            cuisine_type=parsed_data["cuisine_type"],
-                            price_level=parsed_data.get("price_level"),
-                            latitude=parsed_data["latitude"],
-                            longitude=parsed_data["longitude"],
-                            hours=parsed_data["hours"],
-                            google_rating=parsed_data.get("google_rating"),
-                            google_rating_count=parsed_data.get("google_rating_count"),
-                            google_photos=parsed_data.get("google_photos", []),
-                            last_google_update=datetime.utcnow()
-                        )
-
-                        db.add(new_restaurant)
-                        existing_place_ids.add(place_id)
-                        added_count += 1
-
-                        logger.info(f"Added new restaurant: {parsed_data['name']}")
-
-                        # Don't add too many at once
-                        if added_count >= 50:
-                            break
-
-                    time.sleep(0.1)  # Respectful delay
-
-                except Exception as e:
-                    logger.error(f"Error adding restaurant {restaurant_data.get('name', 'unknown')}: {e}")
-
-            if added_count >= 50:
-                break
+                existing_place_ids.add(place_id)
+                new_place_ids.append(place_id)
 
-        db.commit()
+        # Don't add too many at once; details for those are fetched concurrently
+        new_place_ids = new_place_ids[:self.MAX_NEW_PER_DISCOVERY]
+        all_details = await asyncio.gather(
+            *(self.get_place_details(place_id) for place_id in new_place_ids),
+            return_exceptions=True
+        )
+
+        added_count = await asyncio.to_thread(self._add_discovered, db, new_place_ids, all_details)
+        if added_count:
+            clear_search_terms_cache()
+            geo_index.invalidate()
 
         return {
             "added": added_count,
@@ -480,7 +499,44 @@ class GooglePlacesService:
             "message": f"Added {added_count} new restaurants"
         }
 
-    def enhance_restaurant_data(self, restaurant_name: str, latitude: float, longitude: float) -> Optional[Dict[str, Any]]:
+    def _add_discovered(self, db: Session, place_ids: List[str], all_details: List[Any]) -> int:
+        """Insert restaurants for fetched place details in one commit; returns how many were added."""
+        added_count = 0
+        for place_id, place_details in zip(place_ids, all_details):
+            if isinstance(place_details, Exception):
+                logger.error(f"Error adding restaurant {place_id}: {place_details}")
+                continue
+
+            if place_details:
+                parsed_data = self.parse_restaurant_data(place_details)
+
+                # Create new restaurant record
+                new_restaurant = Restaurant(
+                    google_place_id=parsed_data["google_place_id"],
+                    name=parsed_data["name"],
+                    address=parsed_data["address"],
+                    phone=parsed_data.get("phone"),
+                    website=parsed_data.get("website"),
+                    cuisine_type=parsed_data["cuisine_type"],
+                    price_level=parsed_data.get("price_level"),
+                    latitude=parsed_data["latitude"],
+                    longitude=parsed_data["longitude"],
+                    hours=parsed_data["hours"],
+                    google_rating=parsed_data.get("google_rating"),
+                    google_rating_count=parsed_data.get("google_rating_count"),
+                    google_photos=parsed_data.get("google_photos", []),
+                    last_google_update=datetime.utcnow()
+                )
+
+                db.add(new_restaurant)
+                added_count += 1
+
+                logger.info(f"Added new restaurant: {parsed_data['name']}")
+
+        db.commit()
+        return added_count
+
+    async def enhance_restaurant_data(self, restaurant_name: str, latitude: float, longitude: float) -> Optional[Dict[str, Any]]:
         """Search for and enhance restaurant data using name and location."""
         if not self.api_key:
             logger.warning("Google Places API key not configured")
@@ -496,7 +552,7 @@ class GooglePlacesService:
             "key": self.api_key
         }
 
-        search_data = self._make_api_request(text_search_url, params)
+        search_data = await self._make_api_request(text_search_url, params)
         if not search_data or not search_data.get("results"):
             return None
 
@@ -510,7 +566,7 @@ class GooglePlacesService:
                 place_id = result.get("place_id")
                 if place_id:
                     # Get detailed information
-                    details = self.get_place_details(place_id)
+                    details = await self.get_place_details(place_id)
                     if details:
                         return self.parse_restaurant_data(details)
                 break
@@ -519,4 +575,10 @@ class GooglePlacesService:
 
     def get_photo_url(self, photo_reference: str, maxwidth: int = 600) -> str:
         """Generate Google Places photo URL."""
-        return f"{self.BASE_URL}/photo?maxwidth={maxwidth}&photoreference={photo_reference}&key={self.api_key}"
\ No newline at end of file
+        return f"{self.BASE_URL}/photo?maxwidth={maxwidth}&photoreference={photo_reference}&key={self.api_key}"
+
+
+@lru_cache()
+def get_google_places() -> GooglePlacesService:
+    """Shared GooglePlacesService, so the daily usage count isn't reset per request."""
+    return GooglePlacesService()
@@ -1,19 +1,28 @@
 import fake_redis  # Use fake Redis for local development
 import redis
 import json
+from functools import lru_cache
 import numpy as np
 from typing import List, Dict, Any, Optional, Tuple
-from sqlalchemy.orm import Session
-from sklearn.metrics.pairwise import cosine_similarity
-from geopy.distance import geodesic
+from sqlalchemy.orm import Session, load_only
 import logging
 
-from ..models import User, Restaurant, Rating, UserPreference
+from ..models import User, Restaurant, Rating, UserPreference, cuisine_filter_clause, within_radius_clause
+from ..geo import calculate_distance_precomputed
 from ..config import get_settings
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Columns recommendation scoring and formatting read; skips the JSON detail columns
+RESTAURANT_LIST_COLS = (
+    Restaurant.id, Restaurant.name, Restaurant.address, Restaurant.phone, Restaurant.website,
+    Restaurant.cuisine_type, Restaurant.price_level, Restaurant.latitude, Restaurant.longitude,
+    Restaurant.lat_rad, Restaurant.lng_rad, Restaurant.cos_lat,
+    Restaurant.google_rating, Restaurant.google_rating_count,
+    Restaurant.avg_rating, Restaurant.rating_count,
+)
+
 
 class RecommendationEngine:
     def __init__(self):
@@ -69,12 +78,11 @@ class RecommendationEngine:
         recommendations = []
         for restaurant in restaurants:
             score = self._calculate_restaurant_score(db, user, restaurant, user_rating_dict)
-            distance = geodesic((user_lat, user_lng), (restaurant.latitude, restaurant.longitude)).kilometers
 
             recommendations.append({
                 "restaurant": restaurant,
                 "score": score,
-                "distance": distance,
+                "distance": restaurant.distance,
                 "reasoning": self._generate_reasoning(user, restaurant, score)
             })
 
@@ -105,23 +113,35 @@ class RecommendationEngine:
     ) -> List[Restaurant]:
         """Get candidate restaurants within distance and filter criteria."""
 
-        query = db.query(Restaurant).filter(Restaurant.is_active == True)
+        # The bounding box rejects far-away rows in the database, before they are
+        # loaded or reach the haversine below
+        query = db.query(Restaurant).options(load_only(*RESTAURANT_LIST_COLS)).filter(
+            Restaurant.is_active == True,
+            within_radius_clause(user_lat, user_lng, max_distance * 1000)
+        )
 
         # Apply cuisine filter
         if cuisine_filter:
-            query = query.filter(Restaurant.cuisine_type.in_(cuisine_filter))
+            query = query.filter(cuisine_filter_clause(cuisine_filter))
 
         # Apply price filter
         if price_filter:
             query = query.filter(Restaurant.price_level.in_(price_filter))
 
         restaurants = query.all()
+        if not restaurants:
+            return []
 
-        # Filter by distance
+        # Filter by distance in one vectorized pass; keep it on the row for scoring
+        km = calculate_distance_precomputed(
+            user_lat, user_lng,
+            [r.lat_rad for r in restaurants], [r.lng_rad for r in restaurants],
+            [r.cos_lat for r in restaurants]
+        ) / 1000
         filtered_restaurants = []
-        for restaurant in restaurants:
-            distance = geodesic((user_lat, user_lng), (restaurant.latitude, restaurant.longitude)).kilometers
+        for restaurant, distance in zip(restaurants, km.tolist()):
             if distance <= max_distance:
+                restaurant.distance = distance
                 filtered_restaurants.append(restaurant)
 
         return filtered_restaurants
@@ -232,9 +252,9 @@ class RecommendationEngine:
         ratings1 = np.array([user1_ratings[r] for r in common_restaurants])
         ratings2 = np.array([user2_ratings[r] for r in common_restaurants])
 
-        # Calculate cosine similarity
-        similarity_matrix = cosine_similarity([ratings1], [ratings2])
-        return max(0, similarity_matrix[0][0])
+        # Cosine similarity of two vectors; plain numpy avoids importing sklearn at startup
+        similarity = np.dot(ratings1, ratings2) / (np.linalg.norm(ratings1) * np.linalg.norm(ratings2))
+        return max(0, float(similarity))
 
     def _generate_reasoning(self, user: User, restaurant: Restaurant, score: float) -> str:
         """Generate human-readable reasoning for the recommendation."""
@@ -372,12 +392,10 @@ class RecommendationEngine:
             if restaurant.google_rating:
                 trending_score += restaurant.google_rating * 0.2
 
-            distance = geodesic((user_lat, user_lng), (restaurant.latitude, restaurant.longitude)).kilometers
-
             trending_restaurants.append({
                 "restaurant": restaurant,
                 "score": trending_score,
-                "distance": distance,
+                "distance": restaurant.distance,
                 "reasoning": f"Trending with {restaurant.avg_rating:.1f}/5 rating, {restaurant.rating_count} reviews"
             })
 
@@ -449,12 +467,10 @@ class RecommendationEngine:
             if restaurant.avg_rating > 0:
                 similarity_score += restaurant.avg_rating * 0.3
 
-            distance = geodesic((user_lat, user_lng), (restaurant.latitude, restaurant.longitude)).kilometers
-
             similar_restaurants.append({
                 "restaurant": restaurant,
                 "score": similarity_score,
-                "distance": distance,
+                "distance": restaurant.distance,
                 "reasoning": f"Similar to restaurants you've loved - {restaurant.cuisine_type} cuisine"
             })
 
@@ -489,4 +505,10 @@ class RecommendationEngine:
             }
             formatted_results.append(restaurant_data)
 
-        return formatted_results
\ No newline at end of file
+        return formatted_results
+
+
+@lru_cache()
+def get_recommendation_engine() -> RecommendationEngine:
+    """Shared RecommendationEngine, so the Redis client is connected once rather than per request."""
+    return RecommendationEngine()
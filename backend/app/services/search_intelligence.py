@@ -3,10 +3,22 @@ Advanced search intelligence service with semantic search, fuzzy matching, and q
 """
 
 import re
-from typing import List, Dict, Set, Tuple, Optional
+import time
+from functools import lru_cache
+from typing import Awaitable, Callable, Final, List, Dict, Set, Tuple, Optional
 from difflib import SequenceMatcher
 from collections import defaultdict
 
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Restaurant, normalize_name
+
+# Distinct cuisines/names for suggestions and corrections, refreshed at most every
+# few minutes; discover_new_restaurants clears it when it adds restaurants
+_TERMS_CACHE: Dict[str, Tuple[float, List[str]]] = {}
+_TERMS_TTL_SECONDS: Final = 300
+
 class SearchIntelligence:
     def __init__(self):
         # Country to cuisine mappings
@@ -241,7 +253,11 @@ class SearchIntelligence:
         """Get auto-complete suggestions for partial queries."""
         if not partial_query or len(partial_query) < 2:
             return []
+        return list(self._cached_suggestions(partial_query, tuple(sorted(available_cuisines))))
 
+    # Suggestions depend only on the query and the cuisine set, so repeat keystrokes are lookups
+    @lru_cache(maxsize=1024)
+    def _cached_suggestions(self, partial_query: str, available_cuisines: Tuple[str, ...]) -> Tuple[str, ...]:
         normalized = self.normalize_query(partial_query)
         suggestions = set()
 
@@ -266,10 +282,14 @@ class SearchIntelligence:
         # Filter to only include available cuisines
         valid_suggestions = [s for s in suggestions if s.lower() in [c.lower() for c in available_cuisines]]
 
-        return sorted(valid_suggestions)[:8]  # Limit to 8 suggestions
+        return tuple(sorted(valid_suggestions)[:8])  # Limit to 8 suggestions
 
+    @lru_cache(maxsize=4096)
     def analyze_search_intent(self, query: str) -> Dict[str, any]:
-        """Analyze search query to understand user intent."""
+        """Analyze search query to understand user intent.
+
+        Cached per query string: the returned dict is shared, so callers must not modify it.
+        """
         normalized = self.normalize_query(query)
         words = normalized.split()
 
@@ -325,4 +345,46 @@ class SearchIntelligence:
         return analysis
 
 # Global instance
-search_intelligence = SearchIntelligence()
\ No newline at end of file
+search_intelligence = SearchIntelligence()
+
+
+async def _cached_terms(key: str, load: Callable[[], Awaitable[List[str]]]) -> List[str]:
+    entry = _TERMS_CACHE.get(key)
+    if entry and time.monotonic() - entry[0] < _TERMS_TTL_SECONDS:
+        return entry[1]
+    terms = await load()
+    _TERMS_CACHE[key] = (time.monotonic(), terms)
+    return terms
+
+
+async def get_available_cuisines(db: AsyncSession) -> List[str]:
+    """Distinct cuisine types across restaurants."""
+    async def load():
+        # NULLs are dropped by the cuisine_type index scan; '' is dropped here, since on
+        # Oracle '' is NULL and a "<> ''" predicate would match nothing
+        rows = await db.scalars(
+            select(Restaurant.cuisine_type).where(Restaurant.cuisine_type.is_not(None)).distinct()
+        )
+        return [c for c in rows if c]
+    return await _cached_terms("cuisines", load)
+
+
+async def get_restaurant_names(db: AsyncSession) -> List[str]:
+    """Up to 100 distinct restaurant names, for 'did you mean' matching."""
+    async def load():
+        rows = await db.scalars(select(Restaurant.name).distinct().limit(100))
+        return [r for r in rows if r]
+    return await _cached_terms("names", load)
+
+
+async def find_similar_restaurant_names(db: AsyncSession, query: str, limit: int = 10) -> List[str]:
+    """Names most similar to query by trigram similarity; Postgres only (pg_trgm)."""
+    target = normalize_name(query)
+    rows = await db.scalars(select(Restaurant.name).where(
+        Restaurant.name_norm.op("%")(target)
+    ).order_by(func.similarity(Restaurant.name_norm, target).desc()).limit(limit))
+    return list(rows)
+
+
+def clear_search_terms_cache() -> None:
+    _TERMS_CACHE.clear()
\ No newline at end of file
@@ -11,7 +11,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from ..models import (
-    User, Restaurant, Rating, Review, BubblePreference,
+    User, UserMLProfile, Restaurant, Rating, Review, BubblePreference,
     UserSimilarity, RestaurantFeatures, WeightedRating
 )
 
@@ -288,10 +288,12 @@ class SimilarityEngine:
                 cluster_id = int(cluster_labels[idx])
                 cluster_assignments[user_id] = cluster_id
 
-                # Update user record
-                user = self.db.query(User).filter(User.id == user_id).first()
-                if user:
-                    user.similarity_cluster = cluster_id
+                # Update (or create) the user's ML profile
+                profile = self.db.get(UserMLProfile, user_id)
+                if profile:
+                    profile.similarity_cluster = cluster_id
+                else:
+                    self.db.add(UserMLProfile(user_id=user_id, similarity_cluster=cluster_id))
 
             self.db.commit()
             logger.info(f"Updated clusters for {len(cluster_assignments)} users")
@@ -307,11 +309,11 @@ class SimilarityEngine:
         logger.info(f"Updating weighted ratings for cluster {cluster_id}")
 
         # Get users in this cluster
-        cluster_users = self.db.query(User).filter(
-            User.similarity_cluster == cluster_id
+        cluster_users = self.db.query(UserMLProfile.user_id).filter(
+            UserMLProfile.similarity_cluster == cluster_id
         ).all()
 
-        user_ids = [user.id for user in cluster_users]
+        user_ids = [row.user_id for row in cluster_users]
         if len(user_ids) < 3:  # Need minimum users for meaningful weights
             return 0
 
@@ -375,10 +377,10 @@ class SimilarityEngine:
 
         # Get ratings from cluster users
         ratings_query = text("""
-        SELECT r.rating, r.created_at, u.similarity_cluster,
+        SELECT r.rating, r.created_at, p.similarity_cluster,
                COUNT(*) OVER (PARTITION BY r.user_id) as user_total_ratings
         FROM ratings r
-        JOIN users u ON r.user_id = u.id
+        JOIN user_ml_profiles p ON r.user_id = p.user_id
         WHERE r.restaurant_id = :restaurant_id
         AND r.user_id = ANY(:user_ids)
         AND r.created_at > :cutoff_date
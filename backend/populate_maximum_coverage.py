@@ -9,9 +9,9 @@ This script maximizes restaurant discovery by:
 4. Covering Durham, Raleigh, and surrounding areas
 """
 
+import asyncio
 import os
 import sys
-import time
 from datetime import datetime
 
 # Add the project root to the Python path
@@ -22,7 +22,7 @@ from app.database import get_db
 from app.services.google_places import GooglePlacesService
 from app.models import Restaurant
 
-def main():
+async def main():
     """Main function for maximum restaurant coverage."""
     print("Rate My Rest - Maximum Coverage Script")
     print("=" * 50)
@@ -80,7 +80,7 @@ def main():
             print(f"\n--- Searching {area['name']} ---")
             print(f"Location: {area['lat']}, {area['lng']} (radius: {area['radius']}m)")
 
-            result = places_service.discover_new_restaurants(
+            result = await places_service.discover_new_restaurants(
                 db,
                 lat=area['lat'],
                 lng=area['lng'],
@@ -94,7 +94,7 @@ def main():
             print(f"API requests remaining: {result.get('remaining_requests', 0)}")
 
             # Brief pause between areas
-            time.sleep(1)
+            await asyncio.sleep(1)
 
         # Final summary
         print(f"\n" + "="*50)
@@ -138,4 +138,4 @@ def main():
         db.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
@@ -8,9 +8,9 @@ from Google Places API within free tier limits.
 Usage: python populate_real_data.py
 """
 
+import asyncio
 import os
 import sys
-import time
 import json
 from datetime import datetime
 from typing import List, Dict, Any
@@ -91,7 +91,7 @@ def get_chapel_hill_search_areas():
         }
     ]
 
-def comprehensive_restaurant_discovery(db: Session):
+async def comprehensive_restaurant_discovery(db: Session):
     """Discover restaurants using multiple search strategies."""
     places_service = GooglePlacesService()
 
@@ -118,7 +118,7 @@ def comprehensive_restaurant_discovery(db: Session):
             print(f"   Keyword: {keyword}")
 
             try:
-                restaurants = places_service.search_restaurants(
+                restaurants = await places_service.search_restaurants(
                     lat=area['lat'],
                     lng=area['lng'],
                     radius=area['radius'],
@@ -173,7 +173,7 @@ def comprehensive_restaurant_discovery(db: Session):
                     print(f"      📝 No new restaurants (all already in database)")
 
                 # Rate limiting delay
-                time.sleep(0.2)  # Stay well under 10 requests/second
+                await asyncio.sleep(0.2)  # Stay well under 10 requests/second
 
             except Exception as e:
                 print(f"      ❌ Error searching with keyword '{keyword}': {e}")
@@ -188,7 +188,7 @@ def comprehensive_restaurant_discovery(db: Session):
         "api_requests_used": api_requests_used
     }
 
-def enhance_existing_restaurants(db: Session):
+async def enhance_existing_restaurants(db: Session):
     """Enhance existing restaurants with missing Google Places data."""
     places_service = GooglePlacesService()
 
@@ -212,7 +212,7 @@ def enhance_existing_restaurants(db: Session):
 
         try:
             # Search for the restaurant by name and location
-            enhanced_data = places_service.enhance_restaurant_data(restaurant.name, restaurant.latitude, restaurant.longitude)
+            enhanced_data = await places_service.enhance_restaurant_data(restaurant.name, restaurant.latitude, restaurant.longitude)
 
             if enhanced_data:
                 # Update restaurant with enhanced data
@@ -236,7 +236,7 @@ def enhance_existing_restaurants(db: Session):
             else:
                 print(f"      📝 No additional data found")
 
-            time.sleep(0.2)  # Rate limiting
+            await asyncio.sleep(0.2)  # Rate limiting
 
         except Exception as e:
             print(f"      ❌ Error enhancing restaurant: {e}")
@@ -276,7 +276,7 @@ def generate_summary_report(db: Session):
         print(f"   🍽️  {restaurant.cuisine_type} | 💰 {'$' * (restaurant.price_level or 2)}")
         print()
 
-def main():
+async def main():
     """Main function to populate database with real restaurant data."""
     print("Rate My Rest - Real Data Population Script")
     print("=" * 50)
@@ -291,10 +291,10 @@ def main():
 
     try:
         # Step 1: Discover new restaurants
-        discovery_results = comprehensive_restaurant_discovery(db)
+        discovery_results = await comprehensive_restaurant_discovery(db)
 
         # Step 2: Enhance existing restaurants
-        enhanced_count = enhance_existing_restaurants(db)
+        enhanced_count = await enhance_existing_restaurants(db)
 
         # Step 3: Generate summary report
         generate_summary_report(db)
@@ -322,4 +322,4 @@ def main():
         db.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
\ No newline at end of file
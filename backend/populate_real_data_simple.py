@@ -8,9 +8,9 @@ from Google Places API within free tier limits.
 Usage: python populate_real_data_simple.py
 """
 
+import asyncio
 import os
 import sys
-import time
 from datetime import datetime
 
 # Add the project root to the Python path
@@ -42,7 +42,7 @@ def check_api_key():
 
     return True
 
-def main():
+async def main():
     """Main function to populate database with real restaurant data."""
     print("Rate My Rest - Real Data Population Script")
     print("=" * 50)
@@ -77,20 +77,20 @@ def main():
 
         # Step 1: Update existing restaurants
         print("\nStep 1: Updating existing restaurants with missing data...")
-        update_result = places_service.batch_update_restaurant_data(db, limit=min(30, remaining_requests // 2))
+        update_result = await places_service.batch_update_restaurant_data(db, limit=min(30, remaining_requests // 2))
 
         print(f"Updated {update_result['updated']} restaurants")
         print(f"Errors: {update_result['errors']}")
         print(f"API requests remaining: {update_result['remaining_requests']}")
 
         # Small delay between operations
-        time.sleep(1)
+        await asyncio.sleep(1)
 
         # Step 2: Discover new restaurants if we have API budget left
         if update_result['remaining_requests'] > 10:
             print(f"\nStep 2: Discovering new restaurants...")
 
-            discover_result = places_service.discover_new_restaurants(
+            discover_result = await places_service.discover_new_restaurants(
                 db,
                 lat=35.9132,  # Chapel Hill coordinates
                 lng=-79.0558,
@@ -141,4 +141,4 @@ def main():
         db.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    asyncio.run(main())
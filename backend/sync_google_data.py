@@ -4,9 +4,9 @@ Google Places data sync script
 Fetches fresh restaurant data and images from Google Places API
 """
 
+import asyncio
 import os
 import sys
-import time
 from datetime import datetime
 
 # Add the project root to the Python path
@@ -16,7 +16,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.services.google_places import GooglePlacesService
 
-def sync_restaurant_data():
+async def sync_restaurant_data():
     """Main sync function to update restaurant data from Google Places"""
 
     print("Starting Google Places data sync...")
@@ -41,20 +41,20 @@ def sync_restaurant_data():
 
         # Step 1: Update existing restaurants with missing data/photos
         print("\nStep 1: Updating existing restaurants with missing photos/data...")
-        update_result = places_service.batch_update_restaurant_data(db, limit=min(30, remaining_requests // 2))
+        update_result = await places_service.batch_update_restaurant_data(db, limit=min(30, remaining_requests // 2))
 
         print(f"Updated {update_result['updated']} restaurants")
         print(f"Errors: {update_result['errors']}")
         print(f"API requests remaining: {update_result['remaining_requests']}")
 
         # Small delay between operations
-        time.sleep(1)
+        await asyncio.sleep(1)
 
         # Step 2: Discover new restaurants if we have API budget left
         if update_result['remaining_requests'] > 10:
             print(f"\nStep 2: Discovering new restaurants...")
 
-            discover_result = places_service.discover_new_restaurants(
+            discover_result = await places_service.discover_new_restaurants(
                 db,
                 lat=35.9132,  # Chapel Hill coordinates
                 lng=-79.0558,
@@ -74,7 +74,7 @@ def sync_restaurant_data():
     finally:
         db.close()
 
-def quick_image_sync():
+async def quick_image_sync():
     """Quick sync focusing only on restaurant images"""
 
     print("Starting quick image sync...")
@@ -91,7 +91,7 @@ def quick_image_sync():
             return
 
         # Focus specifically on restaurants without photos
-        result = places_service.batch_update_restaurant_data(db, limit=20)
+        result = await places_service.batch_update_restaurant_data(db, limit=20)
 
         print(f"Updated images for {result['updated']} restaurants")
         print(f"API requests remaining: {result['remaining_requests']}")
@@ -119,11 +119,11 @@ if __name__ == "__main__":
         command = sys.argv[1].lower()
 
         if command == "images":
-            quick_image_sync()
+            asyncio.run(quick_image_sync())
         elif command == "stats":
             show_usage_stats()
         elif command == "full":
-            sync_restaurant_data()
+            asyncio.run(sync_restaurant_data())
         else:
             print("Usage: python sync_google_data.py [full|images|stats]")
             print("  full   - Complete sync (restaurants + images)")
@@ -131,4 +131,4 @@ if __name__ == "__main__":
             print("  stats  - Show API usage statistics")
     else:
         # Default to quick image sync
-        quick_image_sync()
\ No newline at end of file
+        asyncio.run(quick_image_sync())
\ No newline at end of file
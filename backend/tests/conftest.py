@@ -2,14 +2,17 @@ import pytest
 import os
 from typing import Generator
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 from app.main import app
-from app.database import get_db, Base
+from app.database import get_db, get_async_db, set_sqlite_pragmas, Base
 from app.config import get_settings
 from app.models import User, Restaurant, Rating, Review
+from app.services.geo_index import geo_index
+from app.services.search_intelligence import clear_search_terms_cache
 
 # Test database URL
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -21,6 +24,19 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine over the same database file; NullPool because each TestClient
+# runs the app on its own event loop
+async_engine = create_async_engine(
+    "sqlite+aiosqlite:///./test.db",
+    poolclass=NullPool,
+)
+TestingAsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, expire_on_commit=False, autoflush=False
+)
+
+event.listen(engine, "connect", set_sqlite_pragmas)
+event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+
 
 @pytest.fixture(scope="session")
 def db_engine():
@@ -31,15 +47,15 @@ def db_engine():
 
 @pytest.fixture
 def db_session(db_engine):
-    connection = db_engine.connect()
-    transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
+    # Data is committed so the async sessions can see it; tables are emptied afterwards
+    session = TestingSessionLocal()
 
     yield session
 
     session.close()
-    transaction.rollback()
-    connection.close()
+    with db_engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
 
 
 @pytest.fixture
@@ -50,8 +66,18 @@ def client(db_session):
         finally:
             pass
 
+    async def get_test_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
+
     app.dependency_overrides[get_db] = get_test_db
+    app.dependency_overrides[get_async_db] = get_test_async_db
+    # Per-process caches would otherwise outlive each test's data
+    geo_index.invalidate()
+    clear_search_terms_cache()
     with TestClient(app) as test_client:
+        # Background tasks open their sessions from app state, not the dependency
+        app.state.AsyncSessionLocal = TestingAsyncSessionLocal
         yield test_client
     app.dependency_overrides.clear()
 
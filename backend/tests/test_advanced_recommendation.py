@@ -0,0 +1,128 @@
+import pytest
+from datetime import datetime, timedelta
+from app.models import Rating as RatingModel, User
+from app.services.advanced_recommendation import _RatingsMatrix
+
+BASE_TIME = datetime(2026, 1, 1, 12, 0)
+
+
+@pytest.fixture
+def ratings_matrix():
+    """A fresh matrix, so the module-level one doesn't carry data between tests."""
+    return _RatingsMatrix()
+
+
+@pytest.fixture
+def second_user(db_session):
+    user = User(username="otheruser", email="other@example.com", hashed_password="x", is_active=True)
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+def add_rating(db_session, user, restaurant, value, created_at=BASE_TIME):
+    rating = RatingModel(user_id=user.id, restaurant_id=restaurant.id, rating=value, created_at=created_at)
+    db_session.add(rating)
+    db_session.commit()
+    return rating
+
+
+def matrix_entries(ratings_matrix, db_session):
+    """Refresh and return the matrix as {(user_id, restaurant_id): rating}."""
+    matrix, user_ids, restaurant_ids = ratings_matrix.refresh(db_session)
+    matrix = matrix.tocoo()
+    return {
+        (user_ids[row], restaurant_ids[col]): value
+        for row, col, value in zip(matrix.row, matrix.col, matrix.data)
+    }
+
+
+class TestRatingsMatrix:
+    def test_refresh_adds_new_ratings(self, ratings_matrix, db_session, test_user, second_user, sample_restaurants):
+        """Test that ratings created after a refresh appear in the next one."""
+        pizza, sushi, burger = sample_restaurants
+        add_rating(db_session, test_user, pizza, 4.0)
+        assert matrix_entries(ratings_matrix, db_session) == {(test_user.id, pizza.id): 4.0}
+
+        add_rating(db_session, second_user, sushi, 5.0, BASE_TIME + timedelta(minutes=1))
+        add_rating(db_session, test_user, burger, 2.0, BASE_TIME + timedelta(minutes=2))
+        assert matrix_entries(ratings_matrix, db_session) == {
+            (test_user.id, pizza.id): 4.0,
+            (second_user.id, sushi.id): 5.0,
+            (test_user.id, burger.id): 2.0,
+        }
+
+    def test_refresh_applies_edits(self, ratings_matrix, db_session, test_user, sample_restaurants):
+        """Test that an edited rating replaces the cached value."""
+        pizza, sushi, _ = sample_restaurants
+        rating = add_rating(db_session, test_user, pizza, 4.0)
+        add_rating(db_session, test_user, sushi, 3.0)
+        matrix_entries(ratings_matrix, db_session)
+
+        rating.rating = 1.5
+        rating.updated_at = BASE_TIME + timedelta(hours=1)
+        db_session.commit()
+
+        assert matrix_entries(ratings_matrix, db_session) == {
+            (test_user.id, pizza.id): 1.5,
+            (test_user.id, sushi.id): 3.0,
+        }
+
+    def test_refresh_reloads_after_delete(self, ratings_matrix, db_session, test_user, sample_restaurants):
+        """Test that a deletion, which the delta can't see, triggers a full reload."""
+        pizza, sushi, _ = sample_restaurants
+        rating = add_rating(db_session, test_user, pizza, 4.0)
+        add_rating(db_session, test_user, sushi, 3.0)
+        matrix_entries(ratings_matrix, db_session)
+
+        db_session.delete(rating)
+        db_session.commit()
+
+        assert matrix_entries(ratings_matrix, db_session) == {(test_user.id, sushi.id): 3.0}
+
+    def test_refresh_reloads_after_delete_and_insert(self, ratings_matrix, db_session, test_user, sample_restaurants):
+        """Test that a deletion hidden by an insert of the same count is still caught."""
+        pizza, sushi, burger = sample_restaurants
+        rating = add_rating(db_session, test_user, pizza, 4.0)
+        add_rating(db_session, test_user, sushi, 3.0)
+        matrix_entries(ratings_matrix, db_session)
+
+        db_session.delete(rating)
+        db_session.commit()
+        add_rating(db_session, test_user, burger, 5.0, BASE_TIME + timedelta(minutes=1))
+
+        assert matrix_entries(ratings_matrix, db_session) == {
+            (test_user.id, sushi.id): 3.0,
+            (test_user.id, burger.id): 5.0,
+        }
+
+    def test_refresh_sees_late_edit(self, ratings_matrix, db_session, test_user, second_user, sample_restaurants):
+        """Test that an edit committed after a refresh with an older timestamp is not skipped."""
+        pizza, sushi, _ = sample_restaurants
+        rating = add_rating(db_session, test_user, pizza, 4.0)
+        add_rating(db_session, second_user, sushi, 3.0, BASE_TIME + timedelta(minutes=10))
+        matrix_entries(ratings_matrix, db_session)
+
+        # The edit started before the last change seen but committed after the refresh;
+        # the row count is unchanged, so only the delta can pick it up
+        rating.rating = 2.5
+        rating.updated_at = BASE_TIME + timedelta(minutes=10) - _RatingsMatrix.COMMIT_LAG / 2
+        db_session.commit()
+
+        assert matrix_entries(ratings_matrix, db_session) == {
+            (test_user.id, pizza.id): 2.5,
+            (second_user.id, sushi.id): 3.0,
+        }
+
+    def test_refresh_sees_late_insert(self, ratings_matrix, db_session, test_user, second_user, sample_restaurants):
+        """Test that a rating committed after a refresh with an older timestamp is not skipped."""
+        pizza, sushi, _ = sample_restaurants
+        add_rating(db_session, second_user, sushi, 3.0, BASE_TIME + timedelta(hours=1))
+        matrix_entries(ratings_matrix, db_session)
+
+        add_rating(db_session, test_user, pizza, 4.5)
+
+        assert matrix_entries(ratings_matrix, db_session) == {
+            (test_user.id, pizza.id): 4.5,
+            (second_user.id, sushi.id): 3.0,
+        }
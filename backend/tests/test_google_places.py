@@ -0,0 +1,59 @@
+import asyncio
+import httpx
+import pytest
+from app.services.google_places import GooglePlacesService
+
+
+class _StubClient:
+    """Stands in for httpx.AsyncClient; fails the first `failures` calls with a connect error."""
+
+    def __init__(self, failures: int = 0):
+        self.calls = 0
+        self.failures = failures
+
+    async def get(self, url, params=None):
+        self.calls += 1
+        # Yield so the other gathered requests interleave with this one
+        await asyncio.sleep(0)
+        request = httpx.Request("GET", url, params=params)
+        if self.calls <= self.failures:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json={"status": "OK", "result": {}}, request=request)
+
+
+@pytest.fixture
+def places(tmp_path, monkeypatch):
+    # The daily count is persisted to a file in the working directory
+    monkeypatch.chdir(tmp_path)
+    service = GooglePlacesService()
+    service.api_key = "test-key"
+    service.RATE_LIMIT_PER_SECOND = 1000
+    return service
+
+
+class TestGooglePlaces:
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_stop_at_daily_limit(self, places):
+        """Test that requests gathered near the cap never push the count past it."""
+        places.client = _StubClient()
+        places.daily_requests = places.DAILY_REQUEST_LIMIT - 3
+
+        results = await asyncio.gather(*(places.get_place_details(f"place-{i}") for i in range(10)))
+
+        assert places.client.calls == 3
+        assert sum(result is not None for result in results) == 3
+        assert places.daily_requests == places.DAILY_REQUEST_LIMIT
+
+    @pytest.mark.asyncio
+    async def test_failed_requests_are_refunded(self, places):
+        """Test that a request that gets no response gives its quota slot back."""
+        places.client = _StubClient(failures=2)
+        places.daily_requests = places.DAILY_REQUEST_LIMIT - 3
+
+        results = await asyncio.gather(*(places.get_place_details(f"place-{i}") for i in range(3)))
+        assert results.count(None) == 2
+        assert places.daily_requests == places.DAILY_REQUEST_LIMIT - 2
+
+        # The refunded slots can be used again
+        assert await places.get_place_details("place-retry") is not None
+        assert places.daily_requests == places.DAILY_REQUEST_LIMIT - 1
@@ -0,0 +1,70 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.models import MonthlyLottery, Rating as RatingModel, UserPoints
+from app.routers import lottery as lottery_router
+
+
+class TestLottery:
+    def test_bulk_import_updates_rating_stats(self, client: TestClient, auth_headers, sample_restaurants, db_session, test_user):
+        """Test that bulk-imported ratings are folded into each restaurant's average."""
+        pizza, sushi, burger = sample_restaurants
+        # Already rated restaurants are skipped by the import
+        db_session.add(RatingModel(user_id=test_user.id, restaurant_id=burger.id, rating=2.0))
+        db_session.commit()
+
+        import_data = {
+            "restaurants": [
+                {"name": "Pizza Palace", "rating": 5.0},
+                {"name": "sushi spot", "rating": 1.0},
+                {"name": "Burger Bar", "rating": 5.0},
+                {"name": "Nowhere Diner", "rating": 4.0}
+            ]
+        }
+        response = client.post("/lottery/bulk-import", json=import_data, headers=auth_headers)
+        assert response.status_code == 200
+
+        for restaurant in sample_restaurants:
+            db_session.refresh(restaurant)
+        assert pizza.rating_count == 11
+        assert pizza.avg_rating == pytest.approx((4.2 * 10 + 5.0) / 11)
+        assert sushi.rating_count == 16
+        assert sushi.avg_rating == pytest.approx((4.8 * 15 + 1.0) / 16)
+        assert burger.rating_count == 8
+        assert burger.avg_rating == pytest.approx(3.5)
+
+    def test_draw_lottery_twice(self, client: TestClient, test_user, db_session):
+        """Test that a month's lottery can only be drawn once."""
+        db_session.add(MonthlyLottery(month="2026-01"))
+        db_session.add(UserPoints(user_id=test_user.id, current_month="2026-01", monthly_points=30))
+        db_session.commit()
+
+        response = client.post("/lottery/lottery/draw?month=2026-01")
+        assert response.status_code == 200
+        assert response.json()["winner_user_id"] == test_user.id
+        assert response.json()["total_tickets"] == 30
+
+        response = client.post("/lottery/lottery/draw?month=2026-01")
+        assert response.status_code == 400
+
+    def test_draw_lottery_concurrent_draw_wins(self, client: TestClient, test_user, db_session, monkeypatch):
+        """Test that a draw committed between the check and the update is not overwritten."""
+        lottery = MonthlyLottery(month="2026-01")
+        db_session.add(lottery)
+        db_session.add(UserPoints(user_id=test_user.id, current_month="2026-01", monthly_points=30))
+        db_session.commit()
+
+        def concurrent_draw(total_tickets):
+            # Another draw commits after this one has seen the lottery undrawn
+            lottery.is_drawn = True
+            lottery.winning_ticket_number = 7
+            db_session.commit()
+            return 0
+
+        monkeypatch.setattr(lottery_router.secrets, "randbelow", concurrent_draw)
+
+        response = client.post("/lottery/lottery/draw?month=2026-01")
+        assert response.status_code == 400
+
+        db_session.refresh(lottery)
+        assert lottery.winning_ticket_number == 7
+        assert lottery.winner_user_id is None
@@ -0,0 +1,118 @@
+from types import SimpleNamespace
+
+import pytest
+import redis.asyncio as redis
+from fastapi import HTTPException
+from starlette.requests import Request
+from app.rate_limit import RateLimiter
+
+
+class _StubRedis:
+    """Just enough of redis.asyncio.Redis for RateLimiter: INCR and EXPIRE NX in a pipeline, on a manual clock."""
+
+    def __init__(self, error: Exception = None):
+        self.now = 0
+        self.counts = {}
+        self.expires_at = {}
+        self.error = error
+
+    def pipeline(self, transaction=True):
+        return _StubPipeline(self)
+
+    def _expire_keys(self):
+        for key, deadline in list(self.expires_at.items()):
+            if self.now >= deadline:
+                del self.expires_at[key]
+                self.counts.pop(key, None)
+
+
+class _StubPipeline:
+    def __init__(self, client: _StubRedis):
+        self.client = client
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def incr(self, key):
+        self.commands.append(("incr", key))
+
+    def expire(self, key, seconds, nx=False):
+        self.commands.append(("expire", key, seconds, nx))
+
+    async def execute(self):
+        client = self.client
+        if client.error is not None:
+            raise client.error
+
+        client._expire_keys()
+        results = []
+        for command, key, *args in self.commands:
+            if command == "incr":
+                client.counts[key] = client.counts.get(key, 0) + 1
+                results.append(client.counts[key])
+            else:
+                seconds, nx = args
+                if nx and key in client.expires_at:
+                    results.append(False)
+                else:
+                    client.expires_at[key] = client.now + seconds
+                    results.append(True)
+        return results
+
+
+def _request(client, ip: str = "203.0.113.7") -> Request:
+    app = SimpleNamespace(state=SimpleNamespace(redis=client))
+    return Request({"type": "http", "app": app, "client": (ip, 12345), "headers": []})
+
+
+class TestRateLimiter:
+    @pytest.mark.asyncio
+    async def test_rejects_over_limit_with_retry_after(self):
+        """Test that the request after the limit gets a 429 with Retry-After."""
+        client = _StubRedis()
+        limiter = RateLimiter("login", limit=3, window_seconds=60)
+
+        for _ in range(3):
+            await limiter(_request(client))
+
+        with pytest.raises(HTTPException) as exc_info:
+            await limiter(_request(client))
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.headers["Retry-After"] == "60"
+
+        # Other clients have their own counter
+        await limiter(_request(client, ip="198.51.100.1"))
+
+    @pytest.mark.asyncio
+    async def test_window_is_not_extended(self):
+        """Test that later requests in a window do not push its expiry back."""
+        client = _StubRedis()
+        limiter = RateLimiter("login", limit=2, window_seconds=60)
+
+        await limiter(_request(client))
+        client.now = 30
+        await limiter(_request(client))
+        assert client.expires_at["rl:login:203.0.113.7"] == 60
+
+        client.now = 59
+        with pytest.raises(HTTPException):
+            await limiter(_request(client))
+
+        # The window opened by the first request has closed, so the count starts over
+        client.now = 60
+        await limiter(_request(client))
+        assert client.counts["rl:login:203.0.113.7"] == 1
+        assert client.expires_at["rl:login:203.0.113.7"] == 120
+
+    @pytest.mark.asyncio
+    async def test_fails_open_on_redis_error(self):
+        """Test that requests are let through when Redis fails."""
+        client = _StubRedis(error=redis.ConnectionError("Connection refused"))
+        limiter = RateLimiter("login", limit=1, window_seconds=60)
+
+        for _ in range(3):
+            await limiter(_request(client))
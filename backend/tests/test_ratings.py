@@ -147,4 +147,41 @@ class TestRatings:
 
         # Check that average and count were updated
         assert test_restaurant.rating_count == initial_count + 1
-        # The average should have changed (exact calculation depends on previous ratings)
\ No newline at end of file
+        # The average should have changed (exact calculation depends on previous ratings)
+
+    def test_rating_stats_follow_create_edit_delete(self, client: TestClient, auth_headers, test_restaurant, db_session):
+        """Test that the stored average and count track every rating write."""
+        # The fixture starts at 5 ratings averaging 4.0
+        response = client.post("/ratings/", json={"restaurant_id": test_restaurant.id, "rating": 5.0}, headers=auth_headers)
+        rating_id = response.json()["id"]
+        db_session.refresh(test_restaurant)
+        assert test_restaurant.rating_count == 6
+        assert test_restaurant.avg_rating == pytest.approx(25.0 / 6)
+
+        # Editing replaces the old rating without changing the count
+        client.post("/ratings/", json={"restaurant_id": test_restaurant.id, "rating": 2.0}, headers=auth_headers)
+        db_session.refresh(test_restaurant)
+        assert test_restaurant.rating_count == 6
+        assert test_restaurant.avg_rating == pytest.approx(22.0 / 6)
+
+        # Deleting takes the current rating back out
+        client.delete(f"/ratings/{rating_id}", headers=auth_headers)
+        db_session.refresh(test_restaurant)
+        assert test_restaurant.rating_count == 5
+        assert test_restaurant.avg_rating == pytest.approx(4.0)
+
+    def test_rating_stats_last_rating_deleted(self, client: TestClient, auth_headers, test_restaurant, db_session):
+        """Test that removing the only rating resets the average to zero."""
+        test_restaurant.avg_rating = None
+        test_restaurant.rating_count = 0
+        db_session.commit()
+
+        response = client.post("/ratings/", json={"restaurant_id": test_restaurant.id, "rating": 3.5}, headers=auth_headers)
+        db_session.refresh(test_restaurant)
+        assert test_restaurant.rating_count == 1
+        assert test_restaurant.avg_rating == pytest.approx(3.5)
+
+        client.delete(f"/ratings/{response.json()['id']}", headers=auth_headers)
+        db_session.refresh(test_restaurant)
+        assert test_restaurant.rating_count == 0
+        assert test_restaurant.avg_rating == 0.0
@@ -116,4 +116,52 @@ class TestRestaurants:
         data2 = response2.json()
         if len(data) > 1 and len(data2) > 0:
             # Make sure we're getting different results with offset
-            assert data[1]["id"] != data2[0]["id"] or len(data) == 1
\ No newline at end of file
+            assert data[1]["id"] != data2[0]["id"] or len(data) == 1
+
+    def test_get_restaurant_not_modified(self, client: TestClient, auth_headers, test_restaurant):
+        """Test that a matching If-None-Match gets an empty 304."""
+        response = client.get(f"/restaurants/{test_restaurant.id}", headers=auth_headers)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert response.headers["cache-control"] == "private, max-age=60"
+
+        response = client.get(f"/restaurants/{test_restaurant.id}", headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+        # Weak comparison ignores the W/ prefix; other tags still get the body
+        strong = etag.removeprefix("W/")
+        response = client.get(f"/restaurants/{test_restaurant.id}", headers={**auth_headers, "If-None-Match": strong})
+        assert response.status_code == 304
+        response = client.get(f"/restaurants/{test_restaurant.id}", headers={**auth_headers, "If-None-Match": 'W/"x"'})
+        assert response.status_code == 200
+        assert response.json()["id"] == test_restaurant.id
+
+    def test_restaurant_etag_changes_on_rating(self, client: TestClient, auth_headers, test_restaurant, db_session):
+        """Test that a rating write invalidates the restaurant's ETag, even within the same second."""
+        updated_at = test_restaurant.updated_at
+        etag = client.get(f"/restaurants/{test_restaurant.id}", headers=auth_headers).headers["etag"]
+
+        client.post("/ratings/", json={"restaurant_id": test_restaurant.id, "rating": 5.0}, headers=auth_headers)
+        # A write in the same second leaves updated_at unchanged at SQLite's resolution
+        db_session.refresh(test_restaurant)
+        test_restaurant.updated_at = updated_at
+        db_session.commit()
+
+        response = client.get(f"/restaurants/{test_restaurant.id}", headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.json()["rating_count"] == 6
+
+    def test_search_suggestions_not_modified(self, client: TestClient, auth_headers, sample_restaurants):
+        """Test that unchanged search suggestions revalidate with 304."""
+        response = client.get("/restaurants/search/suggestions?q=piz", headers=auth_headers)
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        response = client.get("/restaurants/search/suggestions?q=piz", headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 304
+
+        response = client.get("/restaurants/search/suggestions?q=sus", headers={**auth_headers, "If-None-Match": etag})
+        assert response.status_code == 200